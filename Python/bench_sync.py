@@ -0,0 +1,359 @@
+"""Benchmarks de los scripts de sincronización (specs, carpetas, descargas).
+
+- Genera catálogos sintéticos a 1x, 10x y 100x el tamaño de collections.json,
+  en el esquema nuevo ("collection-name"/"variations") y en el antiguo ("collection"/"variation")
+  (el esquema antiguo no trae patterns: no tiene caso download, solo specs y folders)
+- Sirve imágenes falsas desde un servidor HTTP local con latencia, tamaño y tasa de error configurables
+- Mide throughput, latencia por ítem (p50/p99) y RSS pico de cada etapa:
+    specs     -> carga del JSON + create_materials.iter_material_specs
+    folders   -> create-folders.create_structure sobre un directorio temporal
+    download  -> downloadTextures.process_all contra el servidor local
+- Cada caso corre en un proceso nuevo para que el RSS pico sea solo de esa etapa
+- Compara contra un baseline guardado y marca regresiones por encima de un umbral
+
+Uso:
+    python bench_sync.py                               # specs/folders a 1x,10x,100x; download a 1x
+    python bench_sync.py --stages specs --scales 1 10
+    python bench_sync.py --latency-ms 20 --error-rate 0.05 --image-kb 512
+    python bench_sync.py --save-baseline               # guarda bench_baseline.json
+    python bench_sync.py --threshold 0.15              # compara y falla (exit 1) si hay regresión > 15%
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import copy
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+TEMPLATE_JSON = SCRIPT_DIR / 'collections.json'
+BASELINE_FILENAME = 'bench_baseline.json'
+
+STAGES = ('specs', 'folders', 'download')
+SCHEMAS = ('new', 'old')
+# Variaciones del esquema antiguo = strings sin pattern: no hay nada que descargar
+SCHEMA_STAGES = {'new': STAGES, 'old': ('specs', 'folders')}
+
+# Métricas comparadas con el baseline y si "más alto es mejor"
+COMPARED_METRICS = {'throughput': True, 'p50_ms': False, 'p99_ms': False, 'peak_rss_mb': False}
+
+
+# ------------------------------ Catálogos sintéticos ------------------------------
+def make_synthetic_catalog(template: List[Dict[str, Any]], scale: int, schema: str = 'new') -> List[Dict[str, Any]]:
+    """Replica el catálogo `scale` veces con nombres/patterns únicos por copia."""
+    out: List[Dict[str, Any]] = []
+    for copy_idx in range(scale):
+        suffix = '' if copy_idx == 0 else f" {copy_idx + 1}"
+        for coll in template:
+            coll = copy.deepcopy(coll)
+            coll['collection-name'] = f"{coll.get('collection-name', 'Collection')}{suffix}"
+            for sub in coll.get('subcollection') or []:
+                for var in sub.get('variations') or []:
+                    if copy_idx and var.get('variation-pattern'):
+                        var['variation-pattern'] = f"{var['variation-pattern']}-x{copy_idx}"
+            out.append(coll if schema == 'new' else _to_old_schema(coll))
+    return out
+
+
+def _to_old_schema(coll: Dict[str, Any]) -> Dict[str, Any]:
+    """Esquema antiguo: "collection", subcolecciones con "name" y "variation" como lista de strings."""
+    return {
+        'collection': coll.get('collection-name'),
+        'subcollection': [
+            {
+                'name': sub.get('subcollection-name'),
+                'variation': [v.get('variation-name') or '' for v in sub.get('variations') or []],
+            }
+            for sub in coll.get('subcollection') or []
+        ],
+    }
+
+
+def write_catalog(root: Path, catalog: List[Dict[str, Any]]) -> Path:
+    """Escribe <root>/Python/collections.json (misma estructura que el repo)."""
+    json_path = root / 'Python' / 'collections.json'
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    return json_path
+
+
+# ------------------------------ Servidor de imágenes ------------------------------
+class FakeImageServer:
+    """Servidor HTTP local que responde /item/<pattern>/image con bytes aleatorios."""
+
+    def __init__(self, latency_ms: float = 0.0, size_kb: int = 64, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.size = size_kb * 1024
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._payload = b'\xff\xd8\xff\xe0' + os.urandom(max(self.size - 4, 0))
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+                with server._lock:
+                    fail = server._rng.random() < server.error_rate
+                if fail or not self.path.startswith('/item/'):
+                    self.send_error(503 if fail else 404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.send_header('Content-Length', str(len(server._payload)))
+                self.end_headers()
+                self.wfile.write(server._payload)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> 'FakeImageServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ---------------------------------- Métricas ----------------------------------
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    pos = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[pos]
+
+
+def _summarize(latencies: List[float], elapsed: float, **extra: Any) -> Dict[str, Any]:
+    lat = sorted(latencies)
+    return {
+        'items': len(lat),
+        'elapsed_s': round(elapsed, 4),
+        'throughput': round(len(lat) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(lat, 0.50) * 1000, 4),
+        'p99_ms': round(percentile(lat, 0.99) * 1000, 4),
+        'peak_rss_mb': round(peak_rss_mb() or 0.0, 1),
+        **extra,
+    }
+
+
+def _timed(fn: Callable, latencies: List[float]) -> Callable:
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - t0)
+    return wrapper
+
+
+def _load_create_folders():
+    spec = importlib.util.spec_from_file_location('create_folders', SCRIPT_DIR / 'create-folders.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+# ---------------------------------- Etapas ----------------------------------
+def bench_specs(json_path: Path) -> Dict[str, Any]:
+    import create_materials
+
+    roots = create_materials.resolve_roots(json_path)
+    latencies: List[float] = []
+    t0 = time.perf_counter()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    load_s = time.perf_counter() - t0
+    it = create_materials.iter_material_specs(data, roots['base_fs_root_vendor'], roots['base_asset_root_vendor'])
+    while True:
+        t_item = time.perf_counter()
+        try:
+            next(it)
+        except StopIteration:
+            break
+        latencies.append(time.perf_counter() - t_item)
+    return _summarize(latencies, time.perf_counter() - t0, json_load_s=round(load_s, 4))
+
+
+def bench_folders(json_path: Path) -> Dict[str, Any]:
+    module = _load_create_folders()
+    dest = json_path.parent.parent / 'Content' / 'Texture' / 'MayerFabrics'
+    latencies: List[float] = []
+    module.ensure_dir = _timed(module.ensure_dir, latencies)
+    t0 = time.perf_counter()
+    # create-folders imprime ~10 líneas por subcolección: se descartan para medir el trabajo real
+    with contextlib.redirect_stdout(io.StringIO()):
+        collections = module.load_collections(json_path)
+        module.create_structure(collections, dest)
+    return _summarize(latencies, time.perf_counter() - t0)
+
+
+def bench_download(json_path: Path) -> Dict[str, Any]:
+    import downloadTextures
+
+    dest = json_path.parent.parent / downloadTextures.DEST_RELATIVE
+    latencies: List[float] = []
+    downloadTextures.download_with_retries = _timed(downloadTextures.download_with_retries, latencies)
+    t0 = time.perf_counter()
+    downloaded, skipped, failed, _ = downloadTextures.process_all(json_path, dest, use_cache=False)
+    return _summarize(latencies, time.perf_counter() - t0, downloaded=downloaded, skipped=skipped, failed=failed)
+
+
+STAGE_FUNCS = {'specs': bench_specs, 'folders': bench_folders, 'download': bench_download}
+
+
+def _run_case(stage: str, json_path: str, image_base_url: Optional[str]) -> Dict[str, Any]:
+    """Punto de entrada del proceso hijo."""
+    if image_base_url:
+        os.environ['MAYER_IMAGES_BASE_URL'] = image_base_url
+    os.environ['CLOTHFIG_NO_CACHE'] = '1'
+    if str(SCRIPT_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPT_DIR))
+    return STAGE_FUNCS[stage](Path(json_path))
+
+
+def run_case_isolated(stage: str, json_path: Path, image_base_url: Optional[str]) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(_run_case, stage, str(json_path), image_base_url).result()
+
+
+def plan_cases(stages: List[str], schemas: List[str], scales: List[int],
+               download_scales: List[int]) -> List[Tuple[str, str, str, int]]:
+    """(caso, etapa, esquema, escala) a ejecutar; omite las etapas que el esquema no soporta."""
+    cases = []
+    for schema in schemas:
+        for stage in stages:
+            if stage not in SCHEMA_STAGES[schema]:
+                continue
+            for scale in (download_scales if stage == 'download' else scales):
+                cases.append((f"{stage}/{schema}/{scale}x", stage, schema, scale))
+    return cases
+
+
+# ---------------------------------- Baseline ----------------------------------
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """Lista de regresiones (variación relativa peor que `threshold`)."""
+    regressions: List[str] = []
+    for case, res in results.items():
+        base = baseline.get(case)
+        if not base:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base.get(metric), res.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            res.setdefault('delta', {})[metric] = round(change, 4)
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append(f"{case} {metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'caso':<22}{'ítems':>9}{'ítems/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}  Δ throughput")
+    for case, r in results.items():
+        delta = r.get('delta', {}).get('throughput')
+        delta_txt = '' if delta is None else f"{delta:+.1%}"
+        print(f"{case:<22}{r['items']:>9}{r['throughput']:>12.1f}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['peak_rss_mb']:>9.1f}  {delta_txt}")
+
+
+# ---------------------------------- CLI ----------------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de specs, carpetas y descargas con catálogos sintéticos")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10, 100], help='Multiplicadores del catálogo')
+    parser.add_argument('--download-scales', nargs='+', type=int, default=[1],
+                        help='Multiplicadores para la etapa download (por defecto solo 1x)')
+    parser.add_argument('--schemas', nargs='+', choices=SCHEMAS, default=list(SCHEMAS))
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latencia del servidor de imágenes')
+    parser.add_argument('--image-kb', type=int, default=64, help='Tamaño de cada imagen servida (KB)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de respuestas 503 (0-1)')
+    parser.add_argument('--template', default=str(TEMPLATE_JSON), help='JSON base para generar los catálogos')
+    parser.add_argument('--baseline', default=str(SCRIPT_DIR / BASELINE_FILENAME), help='Archivo de baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como nuevo baseline')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Regresión relativa tolerada (por defecto 10%%)')
+    parser.add_argument('--output', help='Guardar resultados en JSON')
+    args = parser.parse_args(argv)
+
+    with open(args.template, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+
+    if 'download' in args.stages and 'old' in args.schemas:
+        print("[bench] download/old se omite: el esquema antiguo no tiene patterns que descargar")
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix='clothfig-bench-') as tmp, \
+            FakeImageServer(args.latency_ms, args.image_kb, args.error_rate) as server:
+        for case, stage, schema, scale in plan_cases(args.stages, args.schemas, args.scales, args.download_scales):
+            # Árbol nuevo por caso: folders/download empiezan siempre vacíos
+            root = Path(tmp) / case.replace('/', '_')
+            json_path = write_catalog(root, make_synthetic_catalog(template, scale, schema))
+            print(f"[bench] {case} ...", flush=True)
+            results[case] = run_case_isolated(stage, json_path, server.base_url)
+
+    baseline_path = Path(args.baseline)
+    regressions: List[str] = []
+    if baseline_path.exists() and not args.save_baseline:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+        regressions = compare(results, baseline, args.threshold)
+
+    print_table(results)
+    meta = {'python': sys.version.split()[0], 'platform': sys.platform, 'args': vars(args)}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"Baseline guardado: {baseline_path}")
+        return 0
+
+    if regressions:
+        print("Regresiones:")
+        for r in regressions:
+            print(" -", r)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
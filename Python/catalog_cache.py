@@ -0,0 +1,163 @@
+"""Caché en disco del catálogo parseado y de los datos derivados (nombres, rutas, tareas).
+
+Los tres scripts (create-folders.py, downloadTextures.py, create_materials.py) parsean
+collections.json y recalculan en cada ejecución lo mismo: sanitize_token/strip_accents,
+sanitize_folder, slugify y un Path.resolve() por variación. Este módulo guarda cada
+resultado en un pickle binario independiente bajo Python/.cache/catalog/.
+
+- Clave: SHA-256 del contenido del JSON + ruta del JSON + TOOL_VERSION (+ `inputs` del dato:
+  rutas de destino u otros parámetros que el builder incrusta en el resultado)
+- Cambia el JSON, su ubicación o TOOL_VERSION => cambia la clave => se recalcula solo
+- Cada dato derivado va en su propio archivo: cargar las specs no deserializa el JSON crudo
+- Al guardar se borran las versiones anteriores del mismo dato para el mismo JSON e `inputs`;
+  las de otro proyecto u otro destino se conservan
+- Desactivar con --no-cache en los scripts o con la variable de entorno CLOTHFIG_NO_CACHE=1
+
+Subir TOOL_VERSION cuando cambie la lógica de nombres/rutas de cualquiera de los scripts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+# `typing` solo para el verificador de tipos: con las anotaciones diferidas no hace falta
+# importarlo, y en `clothfig plan` con la caché caliente cuesta tanto como el resto del trabajo
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, Optional, TypeVar
+
+    T = TypeVar('T')
+
+# ---------------------------------- Config ----------------------------------
+TOOL_VERSION = '2'
+
+CACHE_DIR = Path(__file__).resolve().parent / '.cache' / 'catalog'
+
+# Última ubicación de collections.json encontrada por find_json_file (evita probar ~20 rutas)
+JSON_LOCATION_FILE = CACHE_DIR.parent / 'json_location.txt'
+
+# Clave ya calculada por JSON durante este proceso: (mtime_ns, tamaño) -> clave
+_key_memo: Dict[str, Any] = {}
+
+
+def cache_disabled() -> bool:
+    return os.environ.get('CLOTHFIG_NO_CACHE', '').strip().lower() in ('1', 'true', 'yes')
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def catalog_key(json_path: Path) -> str:
+    """Clave corta del catálogo: hash(TOOL_VERSION, ruta, contenido)."""
+    st = os.stat(json_path)
+    memo_id = str(json_path)
+    cached = _key_memo.get(memo_id)
+    if cached and cached[0] == (st.st_mtime_ns, st.st_size):
+        return cached[1]
+    h = hashlib.sha256()
+    h.update(TOOL_VERSION.encode())
+    h.update(b'\0')
+    h.update(str(json_path).encode('utf-8'))
+    h.update(b'\0')
+    h.update(file_sha256(json_path).encode())
+    key = h.hexdigest()[:20]
+    _key_memo[memo_id] = ((st.st_mtime_ns, st.st_size), key)
+    return key
+
+
+def _write_atomic(path: Path, value: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.part')
+    with open(tmp, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(path)
+
+
+def _prune(name: str, scope: str, keep: Path) -> None:
+    """Elimina entradas antiguas del mismo dato en el mismo ámbito (versiones anteriores del JSON).
+
+    Otro destino u otras raíces conviven: alternar entre dos proyectos no recalcula nada.
+    """
+    try:
+        for old in CACHE_DIR.glob(f"{name}-{scope}-*.pickle"):
+            if old != keep:
+                old.unlink()
+    except OSError:
+        pass
+
+
+def cached(json_path: Path, name: str, builder: Callable[[], T], enabled: Optional[bool] = None,
+           inputs: Iterable[Any] = ()) -> T:
+    """Devuelve el dato `name` del catálogo desde la caché o lo construye con `builder` y lo guarda.
+
+    `inputs`: todo lo que el builder usa además del JSON (p. ej. dest_root). Entra en la clave,
+    así que otro destino nunca recibe rutas calculadas para el anterior.
+    Errores de lectura/escritura de la caché nunca interrumpen el flujo: se recalcula.
+    """
+    if enabled is None:
+        enabled = not cache_disabled()
+    if not enabled:
+        return builder()
+
+    key = catalog_key(json_path)
+    inputs = [str(i) for i in inputs]
+    # Ámbito = ruta del JSON + inputs, sin su contenido: la poda nunca toca otro proyecto u otro destino
+    scope = hashlib.sha256('\0'.join([str(json_path)] + inputs).encode('utf-8')).hexdigest()[:8]
+    if inputs:
+        key = hashlib.sha256('\0'.join([key] + inputs).encode('utf-8')).hexdigest()[:20]
+    path = CACHE_DIR / f"{name}-{scope}-{key}.pickle"
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+        print(f"[catalog_cache] Entrada inválida, se recalcula: {path.name} ({e})")
+
+    value = builder()
+    try:
+        _write_atomic(path, value)
+        _prune(name, scope, path)
+    except OSError as e:
+        print(f"[catalog_cache] No se pudo escribir la caché: {e}")
+    return value
+
+
+def load_json_cached(json_path: Path, enabled: Optional[bool] = None) -> Any:
+    """collections.json parseado (desde la caché binaria si el contenido no cambió)."""
+    def _parse() -> Any:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return cached(json_path, 'data', _parse, enabled=enabled)
+
+
+def remembered_json_path() -> Optional[Path]:
+    """Ubicación recordada de collections.json, si sigue existiendo."""
+    if cache_disabled():
+        return None
+    try:
+        text = JSON_LOCATION_FILE.read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    if text and os.path.isfile(text):
+        return Path(text)
+    return None
+
+
+def remember_json_path(json_path: Path) -> None:
+    if cache_disabled():
+        return
+    try:
+        JSON_LOCATION_FILE.parent.mkdir(parents=True, exist_ok=True)
+        JSON_LOCATION_FILE.write_text(str(json_path), encoding='utf-8')
+    except OSError:
+        pass
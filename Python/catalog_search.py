@@ -0,0 +1,236 @@
+"""Índice de búsqueda en memoria sobre collections.json (para el buscador de WBP_Menu).
+
+- Un documento por variación: colección, subcolección, nombre de variación, pattern y
+  los términos de `subcollection-description`
+- Índice invertido término -> (documentos, puntuación) con peso por campo
+- Búsqueda por prefijo sobre la lista ordenada de términos (trie aplanado: bisect sobre
+  el rango [prefijo, prefijo + '\\uffff'))
+- Se serializa con `marshal`; los postings van empaquetados como arrays binarios
+  (`array('I')` / `array('f')`) para que la carga no cree un objeto por entrada
+- Solo se reconstruye cuando cambia el hash (SHA-256) del JSON
+
+Uso:
+    python catalog_search.py "sanctuary ivory"
+    python catalog_search.py 643 -n 5
+    python catalog_search.py --rebuild
+"""
+
+import argparse
+import heapq
+import json
+import marshal
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from catalog_cache import file_sha256
+from create_materials import (
+    _get_collection_name,
+    _get_subcollection_list,
+    _get_subcollection_name,
+    _get_variation_pattern,
+    _get_variations_list,
+    find_json_file,
+    strip_accents,
+)
+
+
+# ---------------------------------- Config ----------------------------------
+INDEX_FILENAME = 'catalog_search.idx'
+INDEX_VERSION = 1
+
+# Peso de cada campo en la puntuación
+FIELD_WEIGHTS = {
+    'pattern': 8.0,
+    'variation': 6.0,
+    'subcollection': 4.0,
+    'collection': 3.0,
+    'description': 1.0,
+}
+# Una coincidencia por prefijo puntúa menos que una palabra completa
+PREFIX_FACTOR = 0.5
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has in is it its of on or that the this to with'.split()
+)
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+(?:-[a-z0-9]+)*')
+
+
+def tokenize(text: str) -> List[str]:
+    """Minúsculas sin acentos; los tokens con guion ('804-004') se indexan completos y por partes."""
+    tokens: List[str] = []
+    for tok in _TOKEN_RE.findall(strip_accents(text or '').lower()):
+        tokens.append(tok)
+        if '-' in tok:
+            tokens.extend(tok.split('-'))
+    return tokens
+
+
+# ---------------------------------- Construcción ----------------------------------
+def build_search_data(data) -> Dict[str, object]:
+    """Construye docs + términos ordenados + postings a partir del JSON ya parseado."""
+    docs: List[Tuple[str, str, str, str]] = []  # (pattern, colección, subcolección, variación)
+    scores: Dict[str, Dict[int, float]] = {}
+
+    def add(doc_id: int, text: str, field: str) -> None:
+        # Cada término suma el peso del campo una sola vez por documento
+        weight = FIELD_WEIGHTS[field]
+        for tok in set(tokenize(text)):
+            if field == 'description' and tok in STOPWORDS:
+                continue
+            posting = scores.setdefault(tok, {})
+            posting[doc_id] = posting.get(doc_id, 0.0) + weight
+
+    for coll in data or []:
+        coll_name = _get_collection_name(coll)
+        if not coll_name:
+            continue
+        for sub in _get_subcollection_list(coll):
+            sub_name = _get_subcollection_name(sub)
+            if not sub_name:
+                continue
+            description = (sub.get('subcollection-description') or '').strip()
+            for var in _get_variations_list(sub):
+                if isinstance(var, dict):
+                    var_name = (var.get('variation-name') or '').strip()
+                else:
+                    var_name = str(var).strip()
+                pattern = _get_variation_pattern(var)
+                doc_id = len(docs)
+                docs.append((pattern, coll_name, sub_name, var_name))
+                add(doc_id, pattern, 'pattern')
+                add(doc_id, var_name, 'variation')
+                add(doc_id, sub_name, 'subcollection')
+                add(doc_id, coll_name, 'collection')
+                add(doc_id, description, 'description')
+
+    terms = sorted(scores)
+    offsets = array('I', [0])
+    doc_ids = array('I')
+    doc_scores = array('f')
+    for term in terms:
+        for d, sc in sorted(scores[term].items()):
+            doc_ids.append(d)
+            doc_scores.append(sc)
+        offsets.append(len(doc_ids))
+    return {
+        'docs': docs,
+        'terms': '\n'.join(terms),
+        'offsets': offsets.tobytes(),
+        'doc_ids': doc_ids.tobytes(),
+        'scores': doc_scores.tobytes(),
+    }
+
+
+# ---------------------------------- Índice ----------------------------------
+class CatalogSearchIndex:
+    """Índice cargado: términos ordenados + postings en arrays planos (rango por término vía offsets)."""
+
+    def __init__(self, payload: Dict[str, object]):
+        self.docs: List[Tuple[str, str, str, str]] = payload['docs']
+        self.terms: List[str] = payload['terms'].split('\n') if payload['terms'] else []
+        self.offsets = array('I', payload['offsets'])
+        self.doc_ids = array('I', payload['doc_ids'])
+        self.scores = array('f', payload['scores'])
+
+    def _token_scores(self, token: str) -> Dict[int, float]:
+        """Puntuación por documento para un token de consulta (palabra exacta + prefijos)."""
+        lo = bisect_left(self.terms, token)
+        hi = bisect_left(self.terms, token + '\uffff', lo)
+        out: Dict[int, float] = {}
+        for t in range(lo, hi):
+            factor = 1.0 if self.terms[t] == token else PREFIX_FACTOR
+            start, stop = self.offsets[t], self.offsets[t + 1]
+            for d, s in zip(self.doc_ids[start:stop], self.scores[start:stop]):
+                s *= factor
+                if s > out.get(d, 0.0):
+                    out[d] = s
+        return out
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[float, Tuple[str, str, str, str]]]:
+        """Documentos que contienen TODOS los tokens (o prefijos) de la consulta, por puntuación."""
+        tokens = [t for t in dict.fromkeys(tokenize(query)) if t not in STOPWORDS]
+        if not tokens:
+            return []
+        per_token = sorted((self._token_scores(t) for t in tokens), key=len)
+        total = dict(per_token[0])
+        for scores in per_token[1:]:
+            total = {d: s + scores[d] for d, s in total.items() if d in scores}
+            if not total:
+                return []
+        best = heapq.nlargest(limit, total.items(), key=lambda item: (item[1], -item[0]))
+        return [(score, self.docs[d]) for d, score in best]
+
+
+def save_index(index_path: Path, catalog_hash: str, search_data: Dict[str, object]) -> None:
+    payload = {'version': INDEX_VERSION, 'catalog_hash': catalog_hash, **search_data}
+    tmp = index_path.with_suffix(index_path.suffix + '.part')
+    with open(tmp, 'wb') as f:
+        marshal.dump(payload, f)
+    tmp.replace(index_path)
+
+
+def _read_index(index_path: Path) -> Optional[dict]:
+    try:
+        with open(index_path, 'rb') as f:
+            payload = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(payload, dict) or payload.get('version') != INDEX_VERSION:
+        return None
+    return payload
+
+
+def load_search_index(json_path: Path, index_path: Optional[Path] = None, rebuild: bool = False) -> CatalogSearchIndex:
+    """Carga el índice; lo reconstruye si no existe, es de otra versión o el JSON cambió."""
+    index_path = index_path or json_path.parent / INDEX_FILENAME
+    current_hash = file_sha256(json_path)
+    payload = None if rebuild else _read_index(index_path)
+    if payload is None or payload.get('catalog_hash') != current_hash:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        search_data = build_search_data(data)
+        save_index(index_path, current_hash, search_data)
+        payload = search_data
+    return CatalogSearchIndex(payload)
+
+
+# ---------------------------------- CLI ----------------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Búsqueda rápida sobre collections.json")
+    parser.add_argument('query', nargs='?', default='', help='Texto a buscar (colección, subcolección, variación, pattern, descripción)')
+    parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
+    parser.add_argument('--index', dest='index_path', help=f'Ruta del índice (por defecto: junto al JSON, {INDEX_FILENAME})')
+    parser.add_argument('-n', '--limit', type=int, default=20, help='Máximo de resultados (por defecto 20)')
+    parser.add_argument('--rebuild', action='store_true', help='Forzar reconstrucción del índice')
+    args = parser.parse_args(argv)
+
+    try:
+        json_file = find_json_file(args.json_path)
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+
+    t0 = time.perf_counter()
+    index = load_search_index(json_file, Path(args.index_path) if args.index_path else None, rebuild=args.rebuild)
+    load_ms = (time.perf_counter() - t0) * 1000
+    print(f"Índice: {len(index.docs)} variaciones, {len(index.terms)} términos ({load_ms:.1f} ms)")
+    if not args.query:
+        return 0
+
+    t0 = time.perf_counter()
+    results = index.search(args.query, limit=args.limit)
+    elapsed_us = (time.perf_counter() - t0) * 1e6
+    for score, (pattern, coll, sub, var) in results:
+        print(f"  {score:6.1f}  {pattern:<12} {coll} / {sub} / {var}")
+    print(f"{len(results)} resultados ({elapsed_us:.0f} µs)")
+    return 0 if results else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""Punto de entrada único para los scripts de sincronización.
+
+Uso:
+    python clothfig.py folders   [opciones de create-folders.py]
+    python clothfig.py download  [--gui] [opciones de downloadTextures.py]
+    python clothfig.py materials [opciones de create_materials.py]
+    python clothfig.py plan      [--json RUTA] [--no-cache]
+    python clothfig.py watch     [opciones de sync_watch.py]
+    python clothfig.py reconcile [opciones de sync_reconcile.py]
+    python clothfig.py compress  [opciones de compress_textures.py]
+    python clothfig.py crawl     [opciones de crawl_catalog.py]
+
+Cada subcomando importa solo su módulo al ejecutarse (nada de urllib, tkinter,
+cProfile... para `plan` o `--help`), de modo que se puede llamar desde hooks del
+Editor o scripts sin pagar el arranque completo. `download` corre en consola por
+defecto; `--gui` muestra la ventana de progreso de Tk.
+
+La ruta de collections.json resuelta se recuerda en Python/.cache/json_location.txt
+(ver catalog_cache.remembered_json_path); --json o COLLECTIONS_JSON la sustituyen.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+if _SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, _SCRIPT_DIR)
+
+
+def _cmd_folders(argv: list[str]) -> int:
+    # create-folders.py lleva guion: no es importable con `import`
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location('create_folders', os.path.join(_SCRIPT_DIR, 'create-folders.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module.main(argv)
+
+
+def _cmd_download(argv: list[str]) -> int:
+    import downloadTextures
+
+    if '--gui' in argv:
+        argv = [a for a in argv if a != '--gui']
+    elif '--no-gui' not in argv:
+        argv = ['--no-gui'] + argv
+    return downloadTextures.main(argv)
+
+
+def _cmd_materials(argv: list[str]) -> int:
+    import create_materials
+
+    return create_materials.main(argv)
+
+
+def _plan_summary(json_file: Path, dest_root: Path, use_cache: bool | None) -> tuple:
+    """Conteos del catálogo + destinos con pattern, en una sola entrada pequeña de la caché.
+
+    Con la caché caliente `plan` no importa create_materials ni deserializa las specs
+    completas (~600 KB): solo necesita cuántas hay.
+    """
+    from catalog_cache import cached
+
+    def build() -> tuple:
+        import create_materials
+        from downloadTextures import load_download_plan
+
+        plan = load_download_plan(json_file, dest_root, use_cache)
+        specs = create_materials.load_material_specs(json_file, create_materials.resolve_roots(json_file), use_cache)
+        return (
+            len({c for c, _s, _p, _d in plan}),
+            len({(c, s) for c, s, _p, _d in plan}),
+            len(plan),
+            len(specs),
+            [dest for _c, _s, pattern, dest in plan if pattern],
+        )
+
+    # Las raíces de los materiales salen de la ruta del JSON, que ya está en la clave
+    return cached(json_file, 'plan_summary', build, enabled=use_cache, inputs=(dest_root.resolve(),))
+
+
+def _cmd_plan(argv: list[str]) -> int:
+    """Resumen del catálogo: conteos, texturas que faltan y MIs esperados (desde la caché)."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='clothfig plan', description='Resumen de lo que harían folders/download/materials')
+    parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignorar la caché del catálogo (Python/.cache)')
+    args = parser.parse_args(argv)
+
+    from downloadTextures import DEST_RELATIVE, existing_files, find_json_file, resolve_project_root
+
+    try:
+        json_file = find_json_file(args.json_path)
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+    use_cache = False if args.no_cache else None
+    dest_root = resolve_project_root(json_file) / DEST_RELATIVE
+    collections, subcollections, variations, n_specs, dests = _plan_summary(json_file, dest_root, use_cache)
+
+    # Mismo criterio que process_all: un recorrido scandir y rutas comparadas con normcase
+    present = existing_files(dest_root)
+    missing = sum(1 for dest in dests if os.path.normcase(dest) not in present)
+    no_pattern = variations - len(dests)
+
+    print(f"JSON            : {json_file}")
+    print(f"Colecciones     : {collections}")
+    print(f"Subcolecciones  : {subcollections}")
+    print(f"Variaciones     : {variations} ({no_pattern} sin pattern)")
+    print(f"Texturas        : {len(dests) - missing} presentes, {missing} por descargar")
+    print(f"MIs esperados   : {n_specs}")
+    return 0
+
+
+def _cmd_watch(argv: list[str]) -> int:
+    import sync_watch
+
+    return sync_watch.main(argv)
+
+
+def _cmd_reconcile(argv: list[str]) -> int:
+    import sync_reconcile
+
+    return sync_reconcile.main(argv)
+
+
+def _cmd_compress(argv: list[str]) -> int:
+    import compress_textures
+
+    return compress_textures.main(argv)
+
+
+def _cmd_crawl(argv: list[str]) -> int:
+    import crawl_catalog
+
+    return crawl_catalog.main(argv)
+
+
+# `typing` no se importa aquí: cuesta más que todo `plan` con la caché caliente
+COMMANDS = {
+    'folders': _cmd_folders,
+    'download': _cmd_download,
+    'materials': _cmd_materials,
+    'plan': _cmd_plan,
+    'watch': _cmd_watch,
+    'reconcile': _cmd_reconcile,
+    'compress': _cmd_compress,
+    'crawl': _cmd_crawl,
+}
+
+
+def _usage() -> str:
+    return (
+        "uso: clothfig <comando> [opciones]\n\n"
+        "comandos:\n"
+        "  folders    crea carpetas de colecciones/subcolecciones (create-folders.py)\n"
+        "  download   descarga texturas; consola por defecto, --gui para la ventana Tk (downloadTextures.py)\n"
+        "  materials  genera specs de Material Instances / las crea en Unreal (create_materials.py)\n"
+        "  plan       resumen: conteos, texturas que faltan y MIs esperados\n"
+        "  watch      vigila collections.json y las texturas; aplica solo los cambios (sync_watch.py)\n"
+        "  reconcile  compara el árbol de texturas con el catálogo y migra carpetas antiguas (sync_reconcile.py)\n"
+        "  compress   comprime las texturas a DDS BC1/BC5 con mips (compress_textures.py)\n"
+        "  crawl      regenera collections.json desde el sitio del fabricante, solo páginas cambiadas (crawl_catalog.py)\n\n"
+        "`clothfig <comando> --help` muestra las opciones de cada comando."
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(_usage())
+        return 0 if argv else 2
+    command = COMMANDS.get(argv[0])
+    if command is None:
+        print(f"Comando desconocido: {argv[0]}\n\n{_usage()}", file=sys.stderr)
+        return 2
+    return command(argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
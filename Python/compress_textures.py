@@ -0,0 +1,454 @@
+"""Compresión offline de texturas a DDS (BC1 para albedo, BC5 para normal maps).
+
+Al importar 1500+ JPEG, Unreal comprime cada textura durante la importación. Este script
+lo hace antes, en lote y en paralelo, escribiendo junto a cada imagen un `.dds` con la
+cadena completa de mips:
+
+- Albedo (`<pattern>.jpg`)         -> BC1 (DXT1), RGB 5:6:5 + 2 bits por píxel
+- Normal map (`<pattern>_normal.*`) -> BC5 (canales X/Y), cada mip renormalizado
+- Codificador por bloques 4x4 vectorizado con NumPy (todos los bloques de un mip a la vez)
+- Un proceso por imagen (ProcessPoolExecutor); incremental: salta DDS más nuevos que su fuente
+- Reporte por imagen con PSNR del mip 0 en compressed_textures.json (junto al JSON)
+
+Calidad (--quality):
+    fast     endpoints = caja mínima/máxima del bloque
+    normal   endpoints sobre el eje principal del bloque (PCA)            [por defecto]
+    high     PCA + 2 iteraciones de ajuste por mínimos cuadrados
+
+Requiere Pillow y NumPy.
+
+Uso:
+    python compress_textures.py [--json RUTA] [--quality high] [--workers 8] [--force]
+    python downloadTextures.py --no-gui --compress      # como etapa después de las descargas
+    python clothfig.py compress ...
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sync_metrics import configure as configure_metrics, get_metrics
+
+# ---------------------------------- Config ----------------------------------
+REPORT_FILENAME = 'compressed_textures.json'
+REPORT_VERSION = 1
+
+QUALITIES = ('fast', 'normal', 'high')
+DEFAULT_QUALITY = 'normal'
+# Iteraciones de mínimos cuadrados por calidad
+_REFINE_STEPS = {'fast': 0, 'normal': 0, 'high': 2}
+
+NORMAL_SUFFIX = '_normal'
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+# Salida junto a cada fuente: <stem>.dds (sync_reconcile la considera esperada)
+DDS_EXTENSION = '.dds'
+
+# Peores imágenes (por PSNR) que se listan en consola
+REPORT_WORST = 10
+
+
+def _require_imaging():
+    try:
+        import numpy as np
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("Se necesitan Pillow y NumPy (pip install pillow numpy).") from e
+    return np, Image
+
+
+# ---------------------------------- Bloques ----------------------------------
+def _to_blocks(img):
+    """(H, W, C) -> (N, 16, C) en bloques 4x4 fila a fila; rellena los bordes repitiendo píxeles."""
+    np, _ = _require_imaging()
+    h, w, c = img.shape
+    ph, pw = (-h) % 4, (-w) % 4
+    if ph or pw:
+        img = np.pad(img, ((0, ph), (0, pw), (0, 0)), mode='edge')
+    bh, bw = img.shape[0] // 4, img.shape[1] // 4
+    return img.reshape(bh, 4, bw, 4, c).transpose(0, 2, 1, 3, 4).reshape(bh * bw, 16, c)
+
+
+def _from_blocks(blocks, h: int, w: int):
+    bh, bw = (h + 3) // 4, (w + 3) // 4
+    c = blocks.shape[-1]
+    img = blocks.reshape(bh, bw, 4, 4, c).transpose(0, 2, 1, 3, 4).reshape(bh * 4, bw * 4, c)
+    return img[:h, :w]
+
+
+def _pack_indices(idx, bits: int):
+    """(N, 16) índices -> uint64 con el píxel 0 en los bits bajos."""
+    np, _ = _require_imaging()
+    shifts = (np.arange(16, dtype=np.uint64) * np.uint64(bits))
+    return (idx.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+
+
+def _refine_endpoints(x, weights, e0, e1):
+    """Mínimos cuadrados: e0, e1 que mejor aproximan x = w*e0 + (1-w)*e1 con los pesos actuales."""
+    np, _ = _require_imaging()
+    a = weights
+    b = 1.0 - weights
+    aa = (a * a).sum(axis=1)
+    bb = (b * b).sum(axis=1)
+    ab = (a * b).sum(axis=1)
+    ax = (a[..., None] * x).sum(axis=1)
+    bx = (b[..., None] * x).sum(axis=1)
+    det = aa * bb - ab * ab
+    ok = np.abs(det) > 1e-6
+    safe = np.where(ok, det, 1.0)[:, None]
+    n0 = (bb[:, None] * ax - ab[:, None] * bx) / safe
+    n1 = (aa[:, None] * bx - ab[:, None] * ax) / safe
+    return np.where(ok[:, None], n0, e0), np.where(ok[:, None], n1, e1)
+
+
+# ---------------------------------- BC1 ----------------------------------
+_BC1_WEIGHTS = (1.0, 0.0, 2.0 / 3.0, 1.0 / 3.0)  # peso de c0 para cada índice
+
+
+def _quantize_565(c):
+    np, _ = _require_imaging()
+    c = np.clip(c, 0.0, 255.0)
+    r = np.rint(c[:, 0] * 31.0 / 255.0).astype(np.uint16)
+    g = np.rint(c[:, 1] * 63.0 / 255.0).astype(np.uint16)
+    b = np.rint(c[:, 2] * 31.0 / 255.0).astype(np.uint16)
+    packed = (r << 11) | (g << 5) | b
+    decoded = np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=1).astype(np.float32)
+    return packed, decoded
+
+
+def _bc1_indices(x, d0, d1):
+    np, _ = _require_imaging()
+    w = np.array(_BC1_WEIGHTS, dtype=np.float32)
+    palette = w[None, :, None] * d0[:, None, :] + (1.0 - w)[None, :, None] * d1[:, None, :]  # (N, 4, 3)
+    dist = ((x[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1)                    # (N, 16, 4)
+    return dist.argmin(axis=-1), palette
+
+
+def encode_bc1(blocks, quality: str = DEFAULT_QUALITY) -> Tuple[bytes, Any]:
+    """(N, 16, 3) uint8 -> (datos BC1, bloques decodificados) en modo de 4 colores."""
+    np, _ = _require_imaging()
+    x = blocks.astype(np.float32)
+    if quality == 'fast':
+        e0, e1 = x.max(axis=1), x.min(axis=1)
+    else:
+        mean = x.mean(axis=1)
+        centered = x - mean[:, None, :]
+        cov = np.einsum('nki,nkj->nij', centered, centered)
+        axis = np.ones((len(x), 3), dtype=np.float32)
+        for _ in range(8):  # iteración de potencias: eje principal de cada bloque
+            axis = np.einsum('nij,nj->ni', cov, axis)
+            norm = np.linalg.norm(axis, axis=1, keepdims=True)
+            axis = np.where(norm > 1e-8, axis / np.maximum(norm, 1e-8), 1.0 / np.sqrt(3.0))
+        proj = np.einsum('nki,ni->nk', centered, axis)
+        e0 = mean + axis * proj.max(axis=1, keepdims=True)
+        e1 = mean + axis * proj.min(axis=1, keepdims=True)
+
+    w = np.array(_BC1_WEIGHTS, dtype=np.float32)
+    for step in range(_REFINE_STEPS[quality] + 1):
+        c0, d0 = _quantize_565(e0)
+        c1, d1 = _quantize_565(e1)
+        idx, palette = _bc1_indices(x, d0, d1)
+        if step == _REFINE_STEPS[quality]:
+            break
+        e0, e1 = _refine_endpoints(x, w[idx], e0, e1)
+
+    # Modo de 4 colores exige c0 > c1: intercambiar endpoints invierte los índices (0<->1, 2<->3)
+    swap = c0 < c1
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+    idx = np.where(swap[:, None], idx ^ 1, idx)
+    palette = np.where(swap[:, None, None], palette[:, [1, 0, 3, 2], :], palette)
+    # c0 == c1: el bloque es un solo color, índice 0 (evita el modo de 3 colores)
+    idx = np.where((c0 == c1)[:, None], 0, idx)
+
+    out = np.empty(len(x), dtype=[('c0', '<u2'), ('c1', '<u2'), ('idx', '<u4')])
+    out['c0'], out['c1'] = c0, c1
+    out['idx'] = _pack_indices(idx, 2).astype(np.uint32)
+    decoded = np.take_along_axis(palette, idx[..., None].repeat(3, axis=-1), axis=1)
+    return out.tobytes(), decoded
+
+
+# ---------------------------------- BC4 / BC5 ----------------------------------
+# Posición en la rampa (0 = r0 ... 7 = r1) -> índice BC4 (0 = r0, 1 = r1, 2..7 = intermedios)
+_BC4_RAMP_TO_INDEX = (0, 2, 3, 4, 5, 6, 7, 1)
+
+
+def encode_bc4(values, quality: str = DEFAULT_QUALITY) -> Tuple[Any, Any]:
+    """(N, 16) uint8 -> (bloques BC4 como uint64, valores decodificados) en modo de 8 valores."""
+    np, _ = _require_imaging()
+    x = values.astype(np.float32)
+    e0, e1 = x.max(axis=1), x.min(axis=1)
+    ramp_to_index = np.array(_BC4_RAMP_TO_INDEX, dtype=np.uint8)
+
+    for step in range(_REFINE_STEPS[quality] + 1):
+        r0 = np.clip(np.rint(e0), 0, 255)
+        r1 = np.clip(np.rint(e1), 0, 255)
+        # Modo de 8 valores exige r0 > r1
+        r0, r1 = np.maximum(r0, r1), np.minimum(r0, r1)
+        span = np.maximum(r0 - r1, 1.0)
+        pos = np.clip(np.rint((r0[:, None] - x) / span[:, None] * 7.0), 0, 7)
+        if step == _REFINE_STEPS[quality]:
+            break
+        w = (7.0 - pos) / 7.0
+        n0, n1 = _refine_endpoints(x[..., None], w, e0[:, None], e1[:, None])
+        e0, e1 = n0[:, 0], n1[:, 0]
+
+    # r0 == r1: bloque plano, índice 0 en todos los píxeles (válido en cualquier modo)
+    pos = np.where((r0 == r1)[:, None], 0, pos).astype(np.uint8)
+    decoded = np.rint(((7.0 - pos) * r0[:, None] + pos * r1[:, None]) / 7.0)
+    idx = ramp_to_index[pos]
+    block = (r0.astype(np.uint64) | (r1.astype(np.uint64) << np.uint64(8))
+             | (_pack_indices(idx, 3) << np.uint64(16)))
+    return block, decoded
+
+
+def encode_bc5(blocks, quality: str = DEFAULT_QUALITY) -> Tuple[bytes, Any]:
+    """(N, 16, >=2) uint8 -> (datos BC5, bloques decodificados R/G)."""
+    np, _ = _require_imaging()
+    red, dec_r = encode_bc4(blocks[:, :, 0], quality)
+    green, dec_g = encode_bc4(blocks[:, :, 1], quality)
+    out = np.empty((len(blocks), 2), dtype='<u8')
+    out[:, 0], out[:, 1] = red, green
+    return out.tobytes(), np.stack([dec_r, dec_g], axis=-1)
+
+
+# ---------------------------------- Mips ----------------------------------
+def _renormalize(rgb):
+    """Normal map 8 bits: reconstruye Z y normaliza (los mips promediados acortan el vector)."""
+    np, _ = _require_imaging()
+    v = rgb.astype(np.float32) / 127.5 - 1.0
+    v[..., 2] = np.sqrt(np.clip(1.0 - v[..., 0] ** 2 - v[..., 1] ** 2, 0.0, 1.0))
+    v /= np.maximum(np.linalg.norm(v, axis=-1, keepdims=True), 1e-6)
+    return np.clip(np.rint((v + 1.0) * 127.5), 0, 255).astype(np.uint8)
+
+
+def mip_chain(image, normal: bool) -> List[Any]:
+    """Nivel 0 + mips con filtro caja hasta 1x1 (arrays uint8 H x W x 3)."""
+    np, Image = _require_imaging()
+    levels = []
+    current = image
+    while True:
+        arr = np.asarray(current, dtype=np.uint8)
+        if normal:
+            arr = _renormalize(arr)
+            current = Image.fromarray(arr)
+        levels.append(arr)
+        w, h = current.size
+        if w == 1 and h == 1:
+            return levels
+        current = current.resize((max(1, w // 2), max(1, h // 2)), Image.BOX)
+
+
+# ---------------------------------- DDS ----------------------------------
+_DDSD_FLAGS = 0x1 | 0x2 | 0x4 | 0x1000 | 0x20000 | 0x80000  # CAPS|HEIGHT|WIDTH|PIXELFORMAT|MIPMAPCOUNT|LINEARSIZE
+_DDSCAPS = 0x8 | 0x1000 | 0x400000                           # COMPLEX|TEXTURE|MIPMAP
+_DDPF_FOURCC = 0x4
+_DXGI_FORMAT_BC5_UNORM = 83
+_D3D10_RESOURCE_DIMENSION_TEXTURE2D = 3
+
+
+def dds_header(width: int, height: int, mips: int, kind: str, top_level_size: int) -> bytes:
+    """Cabecera DDS: BC1 con FourCC 'DXT1'; BC5 con extensión DX10 (DXGI_FORMAT_BC5_UNORM)."""
+    fourcc = b'DXT1' if kind == 'bc1' else b'DX10'
+    pixel_format = struct.pack('<II4s5I', 32, _DDPF_FOURCC, fourcc, 0, 0, 0, 0, 0)
+    header = struct.pack('<7I44x', 124, _DDSD_FLAGS, height, width, top_level_size, 0, mips)
+    header += pixel_format + struct.pack('<5I', _DDSCAPS, 0, 0, 0, 0)
+    out = b'DDS ' + header
+    if kind == 'bc5':
+        out += struct.pack('<5I', _DXGI_FORMAT_BC5_UNORM, _D3D10_RESOURCE_DIMENSION_TEXTURE2D, 0, 1, 0)
+    return out
+
+
+def _psnr(original, decoded) -> float:
+    np, _ = _require_imaging()
+    mse = float(((original.astype(np.float64) - decoded.astype(np.float64)) ** 2).mean())
+    return float('inf') if mse == 0 else 10.0 * np.log10(255.0 ** 2 / mse)
+
+
+def encode_file(src: str, dst: str, quality: str = DEFAULT_QUALITY) -> Dict[str, Any]:
+    """Codifica una imagen a DDS con todos sus mips (escritura atómica). Se ejecuta en un proceso hijo."""
+    np, Image = _require_imaging()
+    t0 = time.perf_counter()
+    normal = os.path.splitext(os.path.basename(src))[0].endswith(NORMAL_SUFFIX)
+    kind = 'bc5' if normal else 'bc1'
+    with Image.open(src) as im:
+        levels = mip_chain(im.convert('RGB'), normal)
+
+    height, width = levels[0].shape[:2]
+    chunks: List[bytes] = []
+    psnr = 0.0
+    for level, arr in enumerate(levels):
+        blocks = _to_blocks(arr)
+        data, decoded = encode_bc5(blocks, quality) if normal else encode_bc1(blocks, quality)
+        chunks.append(data)
+        if level == 0:
+            channels = 2 if normal else 3
+            psnr = _psnr(arr[..., :channels], _from_blocks(decoded, height, width))
+
+    payload = dds_header(width, height, len(levels), kind, len(chunks[0])) + b''.join(chunks)
+    tmp = dst + '.part'
+    with open(tmp, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp, dst)
+    return {
+        'format': kind.upper(),
+        'width': width,
+        'height': height,
+        'mips': len(levels),
+        'psnr_db': round(psnr, 2) if psnr != float('inf') else None,
+        'bytes': len(payload),
+        'seconds': round(time.perf_counter() - t0, 4),
+    }
+
+
+# ---------------------------------- Lote ----------------------------------
+def find_sources(images_root: Path, force: bool = False) -> Tuple[List[Tuple[str, str]], int, Dict[str, List[str]]]:
+    """(fuente, destino .dds) pendientes con un recorrido os.scandir; cuántos están al día; colisiones.
+
+    Dos fuentes con el mismo nombre base (x.jpg y x.png) escribirían el mismo x.dds: ninguna se
+    comprime y se devuelven en `colisiones` (destino -> fuentes) para reportarlas.
+    """
+    from sync_reconcile import TreeSnapshot
+
+    snap = TreeSnapshot.scan(str(images_root))
+    by_dst: Dict[str, List[str]] = {}
+    for path in snap.files:
+        stem, ext = os.path.splitext(path)
+        if ext.lower() in SOURCE_EXTENSIONS:
+            by_dst.setdefault(os.path.normcase(stem + DDS_EXTENSION), []).append(path)
+
+    pending: List[Tuple[str, str]] = []
+    collisions: Dict[str, List[str]] = {}
+    fresh = 0
+    for sources in by_dst.values():
+        dst = os.path.splitext(sources[0])[0] + DDS_EXTENSION
+        if len(sources) > 1:
+            collisions[dst] = sorted(sources)
+            continue
+        done = snap.files.get(dst)
+        if not force and done and done[0] >= snap.files[sources[0]][0]:
+            fresh += 1
+            continue
+        pending.append((sources[0], dst))
+    pending.sort()
+    return pending, fresh, collisions
+
+
+def _rel(path: str, images_root: Path) -> str:
+    return os.path.relpath(path, images_root).replace(os.sep, '/')
+
+
+def compress_tree(images_root: Path, report_path: Optional[Path] = None, quality: str = DEFAULT_QUALITY,
+                  workers: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
+    """Comprime las imágenes pendientes en paralelo y actualiza el reporte. Retorna el reporte."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    _require_imaging()
+    metrics = get_metrics()
+    pending, fresh, collisions = find_sources(images_root, force)
+    report: Dict[str, Any] = {}
+    if report_path and report_path.exists():
+        try:
+            with open(report_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = {}
+    if report.get('version') != REPORT_VERSION or report.get('root') != str(images_root):
+        report = {'version': REPORT_VERSION, 'root': str(images_root), 'images': {}}
+    images: Dict[str, Any] = report['images']
+
+    print(f"Comprimiendo {len(pending)} texturas ({fresh} al día, calidad '{quality}')")
+    report['collisions'] = {_rel(dst, images_root): [_rel(s, images_root) for s in sources]
+                            for dst, sources in sorted(collisions.items())}
+    for dst, sources in report['collisions'].items():
+        for src in sources:
+            images.pop(src, None)
+        metrics.inc('textures_compressed_total', result='collision')
+        print(f"[WARN] {dst}: varias fuentes con el mismo nombre, no se comprime ({', '.join(sources)})")
+    failed = 0
+    with metrics.stage('compress', quality=quality) as info:
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(encode_file, src, dst, quality): src for src, dst in pending}
+                for n, future in enumerate(as_completed(futures), start=1):
+                    src = futures[future]
+                    rel = _rel(src, images_root)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # Cualquier fallo (imagen corrupta, MemoryError en el worker, BrokenProcessPool
+                        # si el SO mata un proceso) marca solo esa textura; el lote sigue
+                        failed += 1
+                        images.pop(rel, None)
+                        metrics.inc('textures_compressed_total', result='error')
+                        print(f"[WARN] {rel}: {type(e).__name__}: {e}")
+                        continue
+                    images[rel] = {'quality': quality, **result}
+                    metrics.inc('textures_compressed_total', result='ok', format=result['format'])
+                    metrics.observe('compress_seconds', result['seconds'], format=result['format'])
+                    if n % 100 == 0:
+                        print(f"  {n}/{len(pending)}")
+        info.update(compressed=len(pending) - failed, fresh=fresh, failed=failed)
+
+    report['failed'] = failed
+    if report_path:
+        tmp = report_path.with_suffix(report_path.suffix + '.part')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        tmp.replace(report_path)
+    return report
+
+
+def print_summary(report: Dict[str, Any], limit: int = REPORT_WORST) -> None:
+    rows = [(v['psnr_db'], k, v) for k, v in report['images'].items() if v.get('psnr_db') is not None]
+    if not rows:
+        return
+    for fmt in ('BC1', 'BC5'):
+        values = [p for p, _k, v in rows if v['format'] == fmt]
+        if values:
+            print(f"{fmt}: {len(values)} texturas, PSNR medio {sum(values) / len(values):.2f} dB, mínimo {min(values):.2f} dB")
+    print(f"Peores {min(limit, len(rows))} por PSNR:")
+    for psnr, rel, v in sorted(rows)[:limit]:
+        print(f"  {psnr:6.2f} dB  {v['format']}  {v['width']}x{v['height']}  {rel}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Comprime texturas descargadas a DDS BC1/BC5 con mips")
+    parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
+    parser.add_argument('--images', help='Carpeta de texturas (por defecto Content/Texture/MayerFabrics)')
+    parser.add_argument('--quality', choices=QUALITIES, default=DEFAULT_QUALITY, help='Calidad/velocidad (por defecto normal)')
+    parser.add_argument('--workers', type=int, help='Procesos en paralelo (por defecto: núcleos de CPU)')
+    parser.add_argument('--force', action='store_true', help='Recomprimir aunque el DDS esté al día')
+    parser.add_argument('--metrics', help='Eventos JSON lines a este archivo (o CLOTHFIG_METRICS)')
+    parser.add_argument('--prom', help='Snapshot Prometheus textfile al terminar (o CLOTHFIG_METRICS_PROM)')
+    args = parser.parse_args(argv)
+
+    from downloadTextures import DEST_RELATIVE, find_json_file, resolve_project_root
+
+    try:
+        json_file = find_json_file(args.json_path)
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+    images_root = Path(args.images) if args.images else resolve_project_root(json_file) / DEST_RELATIVE
+
+    metrics = configure_metrics('compress', args.metrics, args.prom)
+    try:
+        t0 = time.perf_counter()
+        try:
+            report = compress_tree(images_root, json_file.parent / REPORT_FILENAME, args.quality, args.workers, args.force)
+        except RuntimeError as e:
+            print(str(e))
+            return 2
+        print_summary(report)
+        print(f"Listo en {time.perf_counter() - t0:.1f} s (reporte: {json_file.parent / REPORT_FILENAME})")
+        return 0 if not report['failed'] else 1
+    finally:
+        metrics.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,511 @@
+"""Regenera collections.json recorriendo las páginas de colecciones del sitio del fabricante.
+
+Estructura recorrida (tres niveles, cada nivel en paralelo):
+    índice de colecciones  ->  página de colección  ->  página de subcolección (variaciones)
+
+- Peticiones concurrentes (ThreadPoolExecutor, --workers) con límite por host (--rate, peticiones/s),
+  User-Agent propio que identifica la herramienta y respeto de robots.txt
+- Caché por página en Python/.cache/crawl/: cuerpo + ETag/Last-Modified + resultado parseado;
+  cada visita envía If-None-Match / If-Modified-Since y un 304 reutiliza lo guardado sin
+  volver a descargar ni parsear. --max-age evita incluso la revalidación de páginas recientes
+- Si una página falla se usa su última copia en caché; si no hay copia, no se escribe nada
+  (salvo --allow-partial). Una subcolección sin variaciones o una colección sin subcolecciones
+  cuenta como fallo de parseo (probable cambio del HTML): tampoco se escribe un catálogo encogido
+- Salida con el esquema nuevo que leen los helpers `_get_*` (collection-name, subcollection,
+  variations...), escrita de forma atómica y solo si el contenido cambió
+- Por defecto NO toca el collections.json mantenido a mano: escribe collections.crawled.json a su
+  lado. --in-place lo reemplaza guardando antes una copia .bak
+
+El HTML se interpreta con html.parser (sin dependencias). Las rutas de enlaces y miniaturas
+que identifican cada nivel están en la sección Config: ajústalas si el sitio cambia.
+
+Uso:
+    python crawl_catalog.py [--output salida.json | --in-place] [--workers 4] [--rate 2] [--max-age 3600]
+    python crawl_catalog.py --dry-run          # muestra el resumen sin escribir
+    python clothfig.py crawl ...
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from sync_metrics import configure as configure_metrics, get_metrics
+
+# ---------------------------------- Config ----------------------------------
+SITE_BASE_URL = os.environ.get('MAYER_SITE_BASE_URL', 'https://www.mayerfabrics.com').rstrip('/')
+INDEX_PATH = '/collections'
+
+# Enlaces del índice a cada colección y de cada colección a sus subcolecciones
+COLLECTION_PATH_RE = re.compile(r'^/collections/([^/?#]+)/?$')
+SUBCOLLECTION_PATH_RE = re.compile(r'^/collections/([^/?#]+)/([^/?#]+)/?$')
+# Miniatura de una variación: .../item/<pattern>/image/thumbnail (misma forma que en collections.json)
+THUMBNAIL_RE = re.compile(r'/item/([^/?#]+)/image/thumbnail(?:[?#].*)?$')
+
+CACHE_DIR = Path(__file__).resolve().parent / '.cache' / 'crawl'
+# Nombre de la salida por defecto, junto al collections.json encontrado
+CRAWLED_JSON_NAME = 'collections.crawled.json'
+# Subir si cambia lo que se extrae de cada página: invalida los resultados parseados en caché
+PARSER_VERSION = 1
+
+DEFAULT_WORKERS = 4
+# Peticiones por segundo como máximo a un mismo host (0 = sin límite)
+DEFAULT_RATE = 2.0
+REQUEST_TIMEOUT_S = 20.0
+
+# Identificación honesta: el sitio puede ver quién recorre sus páginas y a quién avisar
+CRAWLER_CONTACT = os.environ.get('CLOTHFIG_CRAWLER_CONTACT', '').strip()
+USER_AGENT = 'clothfigurator-crawler/1' + (f' (+{CRAWLER_CONTACT})' if CRAWLER_CONTACT else '')
+
+
+# ---------------------------------- HTML ----------------------------------
+class PageParser(HTMLParser):
+    """Extrae de una página: título (h1), descripción, enlaces con su imagen e imágenes sueltas."""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ''
+        self.meta_description = ''
+        self.description = ''
+        self.links: List[Dict[str, str]] = []    # href, text, img, alt (absolutos)
+        self.images: List[Dict[str, str]] = []   # src, alt, title, link
+        self._in_h1 = False
+        self._h1_done = False
+        self._link: Optional[Dict[str, str]] = None
+        self._desc_depth = 0
+        self._desc_done = False
+        self._depth = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        a = {k: (v or '') for k, v in attrs}
+        if tag not in ('img', 'meta', 'br', 'hr', 'input', 'link', 'source'):
+            self._depth += 1
+        if tag == 'h1' and not self._h1_done:
+            self._in_h1 = True
+        elif tag == 'meta' and a.get('name', '').lower() == 'description':
+            self.meta_description = a.get('content', '').strip()
+        elif tag == 'a' and a.get('href'):
+            self._link = {'href': urljoin(self.base_url, a['href']), 'text': '', 'img': '', 'alt': ''}
+            self.links.append(self._link)
+        elif tag == 'img':
+            src = a.get('src') or a.get('data-src') or ''
+            if src:
+                src = urljoin(self.base_url, src)
+                self.images.append({'src': src, 'alt': a.get('alt', '').strip(), 'title': a.get('title', '').strip(),
+                                    'link': self._link['href'] if self._link else ''})
+                if self._link is not None and not self._link['img']:
+                    self._link['img'] = src
+                    self._link['alt'] = a.get('alt', '').strip()
+        if not self._desc_done and not self._desc_depth and 'description' in a.get('class', '').lower():
+            self._desc_depth = self._depth
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'h1' and self._in_h1:
+            self._in_h1 = False
+            self._h1_done = True
+        elif tag == 'a':
+            self._link = None
+        if self._desc_depth and self._depth <= self._desc_depth:
+            self._desc_depth = 0
+            self._desc_done = True
+        if tag not in ('img', 'meta', 'br', 'hr', 'input', 'link', 'source'):
+            self._depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._in_h1:
+            self.title += data
+        if self._link is not None:
+            self._link['text'] += data
+        if self._desc_depth:
+            self.description += data
+
+
+def _clean(text: str) -> str:
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def _parse(url: str, html: str) -> PageParser:
+    parser = PageParser(url)
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def _same_site_path(url: str) -> str:
+    parts = urlsplit(url)
+    if parts.netloc and parts.netloc != urlsplit(SITE_BASE_URL).netloc:
+        return ''
+    return parts.path
+
+
+def parse_index(url: str, html: str) -> Dict[str, Any]:
+    """Índice -> [{url, image, name}] de colecciones en el orden de la página."""
+    page = _parse(url, html)
+    seen: Dict[str, Dict[str, str]] = {}
+    for link in page.links:
+        if not COLLECTION_PATH_RE.match(_same_site_path(link['href'])):
+            continue
+        entry = seen.setdefault(link['href'], {'url': link['href'], 'image': '', 'name': ''})
+        entry['image'] = entry['image'] or link['img']
+        entry['name'] = entry['name'] or _clean(link['text']) or link['alt']
+    return {'collections': list(seen.values())}
+
+
+def parse_collection(url: str, html: str) -> Dict[str, Any]:
+    """Colección -> nombre + [{url, image}] de subcolecciones."""
+    page = _parse(url, html)
+    own = COLLECTION_PATH_RE.match(_same_site_path(url))
+    seen: Dict[str, Dict[str, str]] = {}
+    for link in page.links:
+        m = SUBCOLLECTION_PATH_RE.match(_same_site_path(link['href']))
+        if not m or (own and m.group(1) != own.group(1)):
+            continue
+        entry = seen.setdefault(link['href'], {'url': link['href'], 'image': ''})
+        entry['image'] = entry['image'] or link['img']
+    return {'name': _clean(page.title), 'subcollections': list(seen.values())}
+
+
+def parse_subcollection(url: str, html: str) -> Dict[str, Any]:
+    """Subcolección -> nombre, descripción y variaciones (una por miniatura /item/<pattern>/image/thumbnail)."""
+    page = _parse(url, html)
+    name = _clean(page.title)
+    variations: Dict[str, Dict[str, str]] = {}
+    for img in page.images:
+        m = THUMBNAIL_RE.search(img['src'])
+        if not m:
+            continue
+        pattern = m.group(1)
+        if pattern in variations:
+            continue
+        label = _clean(img['alt'] or img['title'])
+        # Los alt suelen repetir subcolección y pattern ("Fuse Berry 804-001"): queda el color
+        label = _clean(label.replace(pattern, ''))
+        if name and label.lower().startswith(name.lower() + ' '):
+            label = label[len(name):].strip()
+        variations[pattern] = {
+            'variation-name': label or pattern,
+            'variation-pattern': pattern,
+            'variation-image-thumbnail': img['src'].split('?')[0],
+        }
+    return {
+        'name': name,
+        'description': _clean(page.description) or page.meta_description,
+        'variations': list(variations.values()),
+    }
+
+
+PARSERS = {'index': parse_index, 'collection': parse_collection, 'subcollection': parse_subcollection}
+
+
+# ---------------------------------- Caché + HTTP ----------------------------------
+def _cache_path(url: str) -> Path:
+    return CACHE_DIR / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]}.json"
+
+
+def _read_cache(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_cache_path(url), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get('url') == url else None
+
+
+def _write_cache(entry: Dict[str, Any]) -> None:
+    path = _cache_path(entry['url'])
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.json.part')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        tmp.replace(path)
+    except OSError as e:
+        print(f"[crawl] No se pudo escribir la caché de {entry['url']}: {e}")
+
+
+class HostRateLimiter:
+    """Espaciado mínimo entre peticiones al mismo host, compartido por todos los hilos."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next: Dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, 0.0))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Fetcher:
+    """GET condicional con caché por página. Seguro entre hilos (cada URL va a un archivo propio)."""
+
+    def __init__(self, max_age: float = 0.0, timeout: float = REQUEST_TIMEOUT_S, rate: float = DEFAULT_RATE):
+        self.max_age = max_age
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(rate)
+        self.errors: List[str] = []
+        self.stale: List[str] = []   # páginas servidas desde la caché por un fallo de red
+        self._robots: Dict[str, Any] = {}
+        self._robots_lock = threading.Lock()
+
+    def allowed(self, url: str) -> bool:
+        """robots.txt del host (leído una vez). Sin robots.txt o si no responde, se permite."""
+        import urllib.error
+        import urllib.request
+        import urllib.robotparser
+
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._robots_lock:
+            rules = self._robots.get(origin)
+            if rules is None:
+                rules = urllib.robotparser.RobotFileParser(origin + '/robots.txt')
+                self.limiter.wait(origin)
+                try:
+                    request = urllib.request.Request(origin + '/robots.txt', headers={'User-Agent': USER_AGENT})
+                    with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                        rules.parse(resp.read().decode('utf-8', errors='replace').splitlines())
+                except urllib.error.HTTPError as e:
+                    # Convención de robots.txt: 401/403 = todo prohibido; otro 4xx = sin restricciones
+                    if e.code in (401, 403):
+                        rules.disallow_all = True
+                    else:
+                        rules.allow_all = True
+                except (urllib.error.URLError, TimeoutError, OSError):
+                    rules.allow_all = True  # sin red: las páginas saldrán de la caché
+                self._robots[origin] = rules
+        return rules.can_fetch(USER_AGENT, url)
+
+    def page(self, url: str, kind: str) -> Optional[Dict[str, Any]]:
+        """Resultado parseado de la página (de red o de caché); None si falla y no hay copia."""
+        import urllib.error
+        import urllib.request
+
+        metrics = get_metrics()
+        cached = _read_cache(url)
+        if cached and cached.get('parser_version') != PARSER_VERSION:
+            cached['parsed'] = None
+        if cached and cached.get('parsed') is not None and self.max_age and time.time() - cached.get('fetched_at', 0) < self.max_age:
+            metrics.inc('crawl_pages_total', kind=kind, result='fresh')
+            return cached['parsed']
+
+        if not self.allowed(url):
+            get_metrics().inc('crawl_pages_total', kind=kind, result='robots')
+            self.errors.append(f"{url}: prohibida por robots.txt")
+            return None
+
+        headers = {'User-Agent': USER_AGENT, 'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8'}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        self.limiter.wait(url)
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout) as resp:
+                body = resp.read().decode(resp.headers.get_content_charset() or 'utf-8', errors='replace')
+                etag, last_modified = resp.headers.get('ETag'), resp.headers.get('Last-Modified')
+            result = 'changed'
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or not cached:
+                return self._fallback(url, kind, cached, f"HTTP {e.code}")
+            body = cached['body']
+            etag = e.headers.get('ETag') or cached.get('etag')
+            last_modified = e.headers.get('Last-Modified') or cached.get('last_modified')
+            result = 'not_modified'
+        except (urllib.error.URLError, TimeoutError, OSError) as e:
+            return self._fallback(url, kind, cached, str(e))
+        metrics.observe('crawl_seconds', time.perf_counter() - t0, kind=kind, result=result)
+        metrics.inc('crawl_pages_total', kind=kind, result=result)
+
+        parsed = cached.get('parsed') if (cached and result == 'not_modified' and cached.get('parsed') is not None) else None
+        if parsed is None:
+            parsed = PARSERS[kind](url, body)
+        _write_cache({'url': url, 'etag': etag, 'last_modified': last_modified, 'fetched_at': time.time(),
+                      'parser_version': PARSER_VERSION, 'body': body, 'parsed': parsed})
+        return parsed
+
+    def _fallback(self, url: str, kind: str, cached: Optional[Dict[str, Any]], error: str) -> Optional[Dict[str, Any]]:
+        get_metrics().inc('crawl_pages_total', kind=kind, result='error')
+        if cached and cached.get('body'):
+            self.stale.append(f"{url}: {error}")
+            return cached.get('parsed') or PARSERS[kind](url, cached['body'])
+        self.errors.append(f"{url}: {error}")
+        return None
+
+
+# ---------------------------------- Crawl ----------------------------------
+def crawl(index_url: str, workers: int = DEFAULT_WORKERS, max_age: float = 0.0,
+          rate: float = DEFAULT_RATE) -> Tuple[List[Dict[str, Any]], Fetcher]:
+    """Recorre índice -> colecciones -> subcolecciones. Devuelve (catálogo, fetcher con errores/copias usadas).
+
+    Subcolecciones sin variaciones y colecciones sin subcolecciones se omiten y quedan en
+    fetcher.errors: con el HTML del sitio cambiado, el catálogo no encoge en silencio.
+    """
+    metrics = get_metrics()
+    fetcher = Fetcher(max_age=max_age, rate=rate)
+    index = fetcher.page(index_url, 'index')
+    if index is None:
+        return [], fetcher
+    refs = index['collections']
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        with metrics.stage('crawl_collections') as info:
+            collection_pages = list(pool.map(lambda r: fetcher.page(r['url'], 'collection'), refs))
+            info['pages'] = len(refs)
+
+        sub_refs = [(ci, sref) for ci, page in enumerate(collection_pages) if page for sref in page['subcollections']]
+        with metrics.stage('crawl_subcollections') as info:
+            sub_pages = list(pool.map(lambda item: fetcher.page(item[1]['url'], 'subcollection'), sub_refs))
+            info['pages'] = len(sub_refs)
+
+    subs_by_collection: Dict[int, List[Dict[str, Any]]] = {}
+    for (ci, sref), page in zip(sub_refs, sub_pages):
+        if page is None:
+            continue
+        if not page['variations']:
+            fetcher.errors.append(f"{sref['url']}: subcolección sin variaciones (¿cambió el HTML?)")
+            continue
+        subs_by_collection.setdefault(ci, []).append({
+            'subcollection-name': page['name'] or sref['url'].rstrip('/').rsplit('/', 1)[-1],
+            'subcollection-description': page['description'],
+            'subcollection-image': sref['image'],
+            'variations': page['variations'],
+        })
+
+    catalog: List[Dict[str, Any]] = []
+    for ci, (ref, page) in enumerate(zip(refs, collection_pages)):
+        if page is None:
+            continue
+        if not page['subcollections']:
+            fetcher.errors.append(f"{ref['url']}: colección sin subcolecciones (¿cambió el HTML?)")
+        if ci not in subs_by_collection:
+            continue
+        catalog.append({
+            'collection-name': page['name'] or ref['name'],
+            'collection-image': ref['image'],
+            'subcollection': subs_by_collection[ci],
+        })
+    return catalog, fetcher
+
+
+def write_catalog(catalog: List[Dict[str, Any]], output: Path, backup: bool = False) -> bool:
+    """Escribe el JSON de forma atómica. False si el contenido no cambió (no se toca el archivo).
+
+    Con backup=True, el archivo anterior se conserva como <output>.bak antes de reemplazarlo.
+    """
+    text = json.dumps(catalog, indent=2, ensure_ascii=False) + '\n'
+    try:
+        if output.read_text(encoding='utf-8') == text:
+            return False
+    except OSError:
+        pass
+    tmp = output.with_suffix(output.suffix + '.part')
+    with open(tmp, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(text)
+    if backup and output.exists():
+        shutil.copy2(output, output.with_suffix(output.suffix + '.bak'))
+    tmp.replace(output)
+    return True
+
+
+def _print_some(lines: List[str], limit: int = 10) -> None:
+    for line in lines[:limit]:
+        print(" -", line)
+    if len(lines) > limit:
+        print(f" ... y {len(lines) - limit} más")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Regenera collections.json desde el sitio del fabricante")
+    parser.add_argument('--json', dest='json_path', help='collections.json de referencia (por defecto el que encuentra find_json_file)')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--output', help=f'Ruta de salida (por defecto {CRAWLED_JSON_NAME} junto al collections.json)')
+    target.add_argument('--in-place', action='store_true', help='Reemplazar el collections.json (se guarda una copia .bak)')
+    parser.add_argument('--index-url', default=SITE_BASE_URL + INDEX_PATH, help='Página índice de colecciones (o MAYER_SITE_BASE_URL)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help=f'Peticiones en paralelo (por defecto {DEFAULT_WORKERS})')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'Máximo de peticiones por segundo al sitio (por defecto {DEFAULT_RATE:g}; 0 = sin límite)')
+    parser.add_argument('--max-age', type=float, default=0.0, help='No revalidar páginas en caché más nuevas que N segundos')
+    parser.add_argument('--allow-partial', action='store_true',
+                        help='Escribir aunque alguna página haya fallado sin copia en caché o no tenga contenido reconocible')
+    parser.add_argument('--dry-run', action='store_true', help='Solo mostrar el resumen')
+    parser.add_argument('--metrics', help='Eventos JSON lines a este archivo (o CLOTHFIG_METRICS)')
+    parser.add_argument('--prom', help='Snapshot Prometheus textfile al terminar (o CLOTHFIG_METRICS_PROM)')
+    args = parser.parse_args(argv)
+
+    metrics = configure_metrics('crawl', args.metrics, args.prom)
+    exit_code = 1
+    try:
+        exit_code = _run(args)
+        return exit_code
+    finally:
+        metrics.close(exit_code=exit_code)
+
+
+def _run(args: argparse.Namespace) -> int:
+    if args.output:
+        output = Path(args.output)
+    else:
+        from downloadTextures import find_json_file
+
+        try:
+            json_file = find_json_file(args.json_path)
+        except FileNotFoundError as e:
+            if args.in_place:
+                print(str(e))
+                return 2
+            json_file = Path(__file__).resolve().parent / 'collections.json'
+        output = json_file if args.in_place else json_file.with_name(CRAWLED_JSON_NAME)
+
+    t0 = time.perf_counter()
+    catalog, fetcher = crawl(args.index_url, workers=args.workers, max_age=args.max_age, rate=args.rate)
+    errors = fetcher.errors
+    variations = sum(len(s['variations']) for c in catalog for s in c['subcollection'])
+    subcollections = sum(len(c['subcollection']) for c in catalog)
+    print(f"Colecciones: {len(catalog)}, subcolecciones: {subcollections}, variaciones: {variations} "
+          f"({time.perf_counter() - t0:.1f} s)")
+    if fetcher.stale:
+        print(f"{len(fetcher.stale)} páginas no respondieron; se usó su copia en caché:")
+        _print_some(fetcher.stale)
+    if errors:
+        print(f"{len(errors)} páginas fallaron (sin copia en caché, prohibidas o sin contenido reconocible):")
+        _print_some(errors)
+
+    if not catalog:
+        print("No se obtuvo ninguna colección: no se escribe nada.")
+        return 1
+    if errors and not args.allow_partial:
+        print("Hubo páginas fallidas: no se escribe un catálogo incompleto (usa --allow-partial para forzarlo).")
+        return 1
+    if args.dry_run:
+        return 0
+    if write_catalog(catalog, output, backup=args.in_place):
+        print(f"Escrito: {output}" + (f" (anterior en {output.name}.bak)" if args.in_place else ''))
+    else:
+        print(f"Sin cambios: {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
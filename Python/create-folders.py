@@ -1,36 +1,43 @@
 """Crea carpetas de colecciones y subcolecciones a partir de `collections.json`.
 
 Requerimientos actuales:
- - El script y el JSON están en:  C:\\Users\\Tatooine\\Documents\\GitHub\\cloth_configurator\\Python
- - Debe crear las carpetas en:    C:\\Users\\Tatooine\\Documents\\GitHub\\cloth_configurator\\Content\\Texture\\MayerFabrics
+ - El script y el JSON están en:  <proyecto>\\Python
+ - Debe crear las carpetas en:    <proyecto>\\Content\\Texture\\MayerFabrics
  - Una carpeta por cada collection.
  - Dentro de cada collection, una carpeta por cada subcollection.
  - NO crear carpetas de variaciones.
- - Nombres: minúsculas, espacios -> '_', eliminar caracteres especiales (solo a-z 0-9 y _). Múltiples '_' se reducen.
+ - Nombres: `sanitize_folder` (el mismo esquema que downloadTextures.py y create_materials.py).
+   Las carpetas `slugify` de versiones anteriores (minúsculas, '_') se migran con sync_reconcile.py.
 
 Uso:
-    python create-folders.py
+    python create-folders.py [--metrics eventos.jsonl] [--prom snapshot.prom] [--profile [DIR]]
 
 Idempotente: no sobrescribe ni borra; solo crea lo que falta.
 """
 
 from __future__ import annotations
 
+import argparse
 import json
 import os
 import re
 import sys
 import traceback
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+from catalog_cache import cached
+from downloadTextures import _get_collection_name, _get_subcollection_list, _get_subcollection_name, sanitize_folder
+from sync_metrics import configure as configure_metrics, get_metrics
+from sync_profile import profile_session
 
 
 JSON_FILENAME = "collections.json"
-DEST_DIR = Path(r"C:\Users\Tatooine\Documents\GitHub\cloth_configurator\Content\Texture\MayerFabrics")
+DEST_DIR = Path(__file__).resolve().parent.parent / "Content" / "Texture" / "MayerFabrics"
 
 
 def slugify(name: str) -> str:
-    """Convierte un nombre en un nombre de carpeta válido.
+    """Esquema antiguo de nombres de carpeta (solo para migrar con sync_reconcile.py).
 
     - Minúsculas
     - Espacios y separadores -> '_'
@@ -75,42 +82,62 @@ def ensure_dir(path: Path) -> bool:
         return True
     except Exception as e:
         print(f"[ERROR] Falló crear '{path}': {e}")
+        get_metrics().event("folder_error", path=str(path), error=str(e))
         traceback.print_exc()
         return False
 
 
-def create_structure(collections: List[Dict[str, Any]], dest: Path) -> Dict[str, int]:
+# (nombre colección, carpeta colección, [(nombre subcolección, carpeta subcolección), ...])
+FolderPlan = List[Tuple[str, str, List[Tuple[str, str]]]]
+
+
+def build_folder_plan(collections: List[Dict[str, Any]]) -> FolderPlan:
+    """Nombres originales + carpetas de colecciones y subcolecciones (sin tocar el disco)."""
+    plan: FolderPlan = []
+    for collection in collections:
+        # Mismos nombres (y mismas entradas vacías omitidas) que downloadTextures.build_download_plan
+        col_name = _get_collection_name(collection)
+        if not col_name:
+            continue
+        subs = []
+        for sub in _get_subcollection_list(collection):
+            sub_name = _get_subcollection_name(sub)
+            if sub_name:
+                subs.append((sub_name, sanitize_folder(sub_name)))
+        plan.append((col_name, sanitize_folder(col_name), subs))
+    return plan
+
+
+def create_structure(collections: List[Dict[str, Any]], dest: Path, plan: FolderPlan | None = None) -> Dict[str, int]:
     created_collections = 0
     existing_collections = 0
     created_subcollections = 0
     existing_subcollections = 0
 
-    for idx, collection in enumerate(collections, start=1):
-        print(f"[DEBUG] Procesando colección #{idx}: {collection.get('collection-name')}")
-        col_name = collection.get("collection-name") or collection.get("name") or "collection"
-        col_slug = slugify(col_name)
-        col_path = dest / col_slug
-        print(f"[DEBUG]  Nombre original: '{col_name}' -> slug: '{col_slug}'")
+    if plan is None:
+        plan = build_folder_plan(collections)
+
+    for idx, (col_name, col_folder, subcollections) in enumerate(plan, start=1):
+        print(f"[DEBUG] Procesando colección #{idx}: {col_name}")
+        col_path = dest / col_folder
+        print(f"[DEBUG]  Nombre original: '{col_name}' -> carpeta: '{col_folder}'")
         if ensure_dir(col_path):
             created_collections += 1
-            print(f"[CREADO] colección: {col_slug}")
+            print(f"[CREADO] colección: {col_folder}")
         else:
             existing_collections += 1
-            print(f"[EXISTE] colección: {col_slug}")
-
-        subcollections = collection.get("subcollection") or []
-        for sidx, sub in enumerate(subcollections, start=1):
-            print(f"[DEBUG]    Subcolección #{sidx}: {sub.get('subcollection-name')}")
-            sub_name = sub.get("subcollection-name") or sub.get("name") or "subcollection"
-            sub_slug = slugify(sub_name)
-            sub_path = col_path / sub_slug
-            print(f"[DEBUG]      Nombre original: '{sub_name}' -> slug: '{sub_slug}'")
+            print(f"[EXISTE] colección: {col_folder}")
+
+        for sidx, (sub_name, sub_folder) in enumerate(subcollections, start=1):
+            print(f"[DEBUG]    Subcolección #{sidx}: {sub_name}")
+            sub_path = col_path / sub_folder
+            print(f"[DEBUG]      Nombre original: '{sub_name}' -> carpeta: '{sub_folder}'")
             if ensure_dir(sub_path):
                 created_subcollections += 1
-                print(f"  [CREADO] subcolección: {col_slug}/{sub_slug}")
+                print(f"  [CREADO] subcolección: {col_folder}/{sub_folder}")
             else:
                 existing_subcollections += 1
-                print(f"  [EXISTE] subcolección: {col_slug}/{sub_slug}")
+                print(f"  [EXISTE] subcolección: {col_folder}/{sub_folder}")
 
     return {
         "created_collections": created_collections,
@@ -120,7 +147,27 @@ def create_structure(collections: List[Dict[str, Any]], dest: Path) -> Dict[str,
     }
 
 
-def main() -> None:
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Crea carpetas de colecciones/subcolecciones según collections.json")
+    parser.add_argument("--metrics", help="Eventos JSON lines a este archivo (o CLOTHFIG_METRICS)")
+    parser.add_argument("--prom", help="Snapshot Prometheus textfile al terminar (o CLOTHFIG_METRICS_PROM)")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="DIR",
+                        help="Perfilar con cProfile + tracemalloc; escribe .pstats/.collapsed/.alloc.txt en DIR "
+                             "(por defecto Python/.profile). En el Editor: CLOTHFIG_PROFILE=1")
+    args = parser.parse_args(argv)
+
+    metrics = configure_metrics("folders", args.metrics, args.prom)
+    exit_code = 1
+    try:
+        with profile_session("folders", args.profile):
+            exit_code = _run()
+        return exit_code
+    finally:
+        metrics.close(exit_code=exit_code)
+
+
+def _run() -> int:
+    metrics = get_metrics()
     json_path = Path(__file__).parent / JSON_FILENAME
 
     print(f"[DEBUG] Python executable : {sys.executable}")
@@ -145,15 +192,17 @@ def main() -> None:
     if not json_path.exists():
         print(f"[ERROR] No se encuentra el JSON en: {json_path}")
         print("[SUGERENCIA] Asegúrate de que 'collections.json' está en la carpeta Python junto al script.")
-        return
+        return 2
 
     try:
-        collections = load_collections(json_path)
-        print(f"[DEBUG] Colecciones cargadas: {len(collections)}")
+        with metrics.stage("json_load") as info:
+            plan = cached(json_path, "folder_plan", lambda: build_folder_plan(load_collections(json_path)))
+            info["collections"] = len(plan)
+        print(f"[DEBUG] Colecciones cargadas: {len(plan)}")
     except Exception as e:
         print(f"ERROR al leer JSON: {e}")
         traceback.print_exc()
-        return
+        return 1
 
     print("[DEBUG] Creando (si falta) directorio destino raíz...")
     if ensure_dir(DEST_DIR):
@@ -162,7 +211,12 @@ def main() -> None:
         print("[DEBUG] Directorio destino ya existía.")
     print(f"[DEBUG] Verificación post mkdir destino existe?: {DEST_DIR.exists()}")
 
-    summary = create_structure(collections, DEST_DIR)
+    with metrics.stage("folder_creation") as info:
+        summary = create_structure([], DEST_DIR, plan=plan)
+        info.update(summary)
+    for level in ("collections", "subcollections"):
+        metrics.inc("folders_total", summary[f"created_{level}"], level=level, result="created")
+        metrics.inc("folders_total", summary[f"existing_{level}"], level=level, result="existing")
 
     print("-------------------------------------")
     print("Resumen:")
@@ -172,6 +226,7 @@ def main() -> None:
     print(f"  Subcolecciones existentes: {summary['existing_subcollections']}")
     print("-------------------------------------")
     print("Finalizado.")
+    return 0
 
 
 if __name__ == "__main__":
@@ -1,10 +1,23 @@
 import argparse
+import contextlib
 import json
 import os
 import re
+import sys
+import time
 import unicodedata
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# Permite importar los módulos hermanos de Python/ también al ejecutar desde el Editor de Unreal
+_SCRIPT_DIR = str(Path(__file__).resolve().parent)
+if _SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, _SCRIPT_DIR)
+
+from catalog_cache import cached, load_json_cached, remember_json_path, remembered_json_path  # noqa: E402
+from sync_metrics import configure as configure_metrics, get_metrics  # noqa: E402
+from sync_profile import profile_session  # noqa: E402
 
 # ---------------- Config ----------------
 # Padres en Unreal
@@ -102,6 +115,13 @@ def _get_variation_label(variation_item: Any) -> str:
     return str(variation_item).strip()
 
 
+def _get_variation_pattern(variation_item: Any) -> str:
+    # Solo el formato nuevo trae "variation-pattern"; el antiguo (string) no tiene patrón
+    if isinstance(variation_item, dict):
+        return (variation_item.get("variation-pattern") or "").strip()
+    return ""
+
+
 def find_json_file(cli_path: Optional[str]) -> Path:
     """Localiza el archivo JSON de colecciones.
 
@@ -110,10 +130,9 @@ def find_json_file(cli_path: Optional[str]) -> Path:
       2. Variable de entorno COLLECTIONS_JSON
       3. Lista JSON (rutas absolutas definidas arriba)
       4. Misma carpeta del script (collections.json / okcollections.json)
-      5. Directorios ascendentes (hasta 4 niveles) buscando 'Python/collections.json' o 'collections.json'
+      5. Ubicación recordada de una ejecución anterior (evita el recorrido del paso 6)
+      6. Directorios ascendentes (hasta 4 niveles) buscando 'Python/collections.json' o 'collections.json'
     """
-    candidates: List[Path] = []
-
     # 1. CLI
     if cli_path:
         p = Path(cli_path).expanduser().resolve()
@@ -121,25 +140,33 @@ def find_json_file(cli_path: Optional[str]) -> Path:
             return p
         raise FileNotFoundError(f"No existe JSON en ruta proporcionada: {cli_path}")
 
-    # 2. Variable de entorno
+    # 2-4. Fuentes explícitas: siempre antes que la ubicación recordada
+    explicit: List[Path] = []
     env_path = os.environ.get("COLLECTIONS_JSON")
     if env_path:
-        p = Path(env_path).expanduser().resolve()
-        candidates.append(p)
-
-    # 3. Lista manual JSON
+        explicit.append(Path(env_path).expanduser().resolve())
     for c in JSON:
         try:
-            candidates.append(Path(c).expanduser().resolve())
+            explicit.append(Path(c).expanduser().resolve())
         except Exception:
             pass
-
-    # 4. Misma carpeta del script
     script_dir = Path(__file__).parent.resolve()
-    candidates.append(script_dir / 'collections.json')
-    candidates.append(script_dir / 'okcollections.json')
+    explicit.append(script_dir / 'collections.json')
+    explicit.append(script_dir / 'okcollections.json')
+
+    for cand in explicit:
+        if cand.exists():
+            print(f"[find_json_file] Usando JSON: {cand}")
+            return cand
+
+    # 5. Ubicación recordada
+    remembered = remembered_json_path()
+    if remembered:
+        print(f"[find_json_file] Usando JSON: {remembered}")
+        return remembered
 
-    # 5. Ascender buscando
+    # 6. Ascender buscando
+    candidates: List[Path] = []
     current = script_dir
     for _ in range(4):  # subir hasta 4 niveles por seguridad
         # a) <nivel>/Python/collections.json (si estamos fuera de Python)
@@ -150,7 +177,7 @@ def find_json_file(cli_path: Optional[str]) -> Path:
         current = current.parent
 
     # Filtrar duplicados preservando orden
-    seen = set()
+    seen = set(explicit)
     unique_candidates = []
     for c in candidates:
         if c not in seen:
@@ -160,10 +187,11 @@ def find_json_file(cli_path: Optional[str]) -> Path:
     for cand in unique_candidates:
         if cand.exists():
             print(f"[find_json_file] Usando JSON: {cand}")
+            remember_json_path(cand)
             return cand
 
     # Mensaje de depuración para ayudar
-    debug_list = "\n".join(str(c) for c in unique_candidates)
+    debug_list = "\n".join(str(c) for c in explicit + unique_candidates)
     raise FileNotFoundError(
         "No se encontró 'collections.json' en rutas conocidas. Usa --json <ruta> o define COLLECTIONS_JSON.\n"
         f"Candidatos probados:\n{debug_list}"
@@ -189,45 +217,104 @@ def resolve_roots(json_file: Path) -> Dict[str, Path | str]:
     }
 
 
-def build_material_specs(data, base_fs_root_vendor: Path, base_asset_root_vendor: str) -> List[Dict[str, Any]]:
-    """Devuelve objetos con name + rutas (asset, object, filesystem).
-    Compatible con JSON antiguo y nuevo.
+def iter_material_specs(data, base_fs_root_vendor: Path, base_asset_root_vendor: str,
+                        collections: Optional[Iterable[str]] = None,
+                        subcollections: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Genera las specs una a una (mismo contenido y orden que build_material_specs).
+
+    Filtros opcionales por nombre de colección / subcolección (sin distinguir mayúsculas).
     """
-    specs: List[Dict[str, Any]] = []
+    coll_filter = {c.strip().lower() for c in collections} if collections else None
+    sub_filter = {s.strip().lower() for s in subcollections} if subcollections else None
     for coll in data or []:
         coll_raw = _get_collection_name(coll)
         if not coll_raw:
             continue
+        if coll_filter is not None and coll_raw.lower() not in coll_filter:
+            continue
         coll_folder = sanitize_folder(coll_raw)
+        coll_tok = sanitize_token(coll_raw)
         sub_list = _get_subcollection_list(coll)
         for sub in sub_list:
             sub_raw = _get_subcollection_name(sub)
             if not sub_raw:
                 continue
+            if sub_filter is not None and sub_raw.lower() not in sub_filter:
+                continue
             sub_folder = sanitize_folder(sub_raw)
+            sub_tok = sanitize_token(sub_raw)
+            folder_rel = f"{coll_folder}/{sub_folder}" if sub_folder else coll_folder
+            package_path = f"{base_asset_root_vendor}/{folder_rel}" if folder_rel else base_asset_root_vendor
+            fs_dir = (base_fs_root_vendor / coll_folder / sub_folder).resolve()
             for var in _get_variations_list(sub):
                 var_raw = _get_variation_label(var)
-                coll_tok = sanitize_token(coll_raw)
-                sub_tok = sanitize_token(sub_raw)
                 var_tok = sanitize_token(var_raw)
                 if not (coll_tok and sub_tok and var_tok):
                     # Saltar entradas incompletas para evitar nombres inválidos
                     continue
                 name = f"MI_{coll_tok}_{sub_tok}_{var_tok}"
-                folder_rel = f"{coll_folder}/{sub_folder}" if sub_folder else coll_folder
-                package_path = f"{base_asset_root_vendor}/{folder_rel}" if folder_rel else base_asset_root_vendor
                 asset_path = f"{package_path}/{name}"
                 object_path = f"{asset_path}.{name}"
-                fs_path = (base_fs_root_vendor / coll_folder / sub_folder / f"{name}.uasset").resolve()
-                specs.append({
+                yield {
                     'name': name,
                     'package_path': package_path,
                     'asset_path': asset_path,
                     'object_path': object_path,
-                    'filesystem_path': str(fs_path),
+                    'filesystem_path': str(fs_dir / f"{name}.uasset"),
                     'parent': PARENT_MATERIAL_OBJECT_PATH,
-                })
-    return specs
+                    'pattern': _get_variation_pattern(var),
+                }
+
+
+def build_material_specs(data, base_fs_root_vendor: Path, base_asset_root_vendor: str) -> List[Dict[str, Any]]:
+    """Devuelve objetos con name + rutas (asset, object, filesystem).
+    Compatible con JSON antiguo y nuevo.
+    """
+    return list(iter_material_specs(data, base_fs_root_vendor, base_asset_root_vendor))
+
+
+def load_material_specs(json_file: Path, roots: Dict[str, Any], use_cache: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """build_material_specs desde la caché del catálogo; las raíces y el parent entran en la clave."""
+    return cached(
+        json_file,
+        'material_specs',
+        lambda: build_material_specs(load_json_cached(json_file, use_cache), roots['base_fs_root_vendor'], roots['base_asset_root_vendor']),
+        enabled=use_cache,
+        inputs=(roots['base_fs_root_vendor'], roots['base_asset_root_vendor'], PARENT_MATERIAL_OBJECT_PATH),
+    )
+
+
+def write_specs_jsonl(specs: Iterable[Dict[str, Any]], out: TextIO) -> Iterator[Dict[str, Any]]:
+    """Escribe cada spec como una línea JSON y la vuelve a entregar (para encadenar con la creación)."""
+    for spec in specs:
+        out.write(json.dumps(spec, ensure_ascii=False))
+        out.write('\n')
+        yield spec
+    out.flush()
+
+
+def load_duplicate_patterns(report_path: Path) -> Dict[str, str]:
+    """Lee el reporte de duplicate_textures.py: mapa pattern duplicado -> pattern canónico."""
+    if not report_path.exists():
+        raise FileNotFoundError(f"No existe el reporte de duplicados: {report_path} (ejecuta duplicate_textures.py)")
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    return report.get('duplicates') or {}
+
+
+def skip_duplicate_specs(specs: Iterable[Dict[str, Any]], duplicates: Dict[str, str],
+                         counts: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Omite las specs de patterns duplicados; counts['skipped'] lleva las omitidas hasta ahora.
+
+    El reporte puede listar patterns que ya no están en el catálogo (o fuera de --collection):
+    solo cuentan las specs realmente descartadas, a medida que se consume el stream.
+    """
+    counts.setdefault('skipped', 0)
+    for spec in specs:
+        if spec['pattern'] in duplicates:
+            counts['skipped'] += 1
+        else:
+            yield spec
 
 
 def create_folders_from_json(data) -> None:
@@ -265,8 +352,8 @@ def create_folders_from_json(data) -> None:
                 unreal.log(f"  Creada subcarpeta: {sub_pkg}")
 
 
-def create_material_instances(specs: List[Dict[str, Any]], dry_run: bool = False) -> None:
-    """Crea MaterialInstanceConstant en Unreal según specs. Requiere entorno Unreal."""
+def create_material_instances(specs: Iterable[Dict[str, Any]], dry_run: bool = False) -> None:
+    """Crea MaterialInstanceConstant en Unreal según specs (lista o stream). Requiere entorno Unreal."""
     try:
         import unreal  # type: ignore
     except Exception as e:
@@ -286,6 +373,7 @@ def create_material_instances(specs: List[Dict[str, Any]], dry_run: bool = False
         except Exception:
             pass
 
+    metrics = get_metrics()
     for spec in specs:
         name = spec['name']
         package_path = spec['package_path']
@@ -294,6 +382,7 @@ def create_material_instances(specs: List[Dict[str, Any]], dry_run: bool = False
 
         if dry_run:
             unreal.log(f"[DRY] Crear MI: {object_path}  (parent: {PARENT_MATERIAL_OBJECT_PATH})")
+            metrics.inc('material_instances_total', action='dry_run')
             continue
 
         # Asegura el directorio en el Content Browser
@@ -301,8 +390,10 @@ def create_material_instances(specs: List[Dict[str, Any]], dry_run: bool = False
 
         # Si ya existe, cargar y actualizar parent si hace falta
         if unreal.EditorAssetLibrary.does_asset_exist(asset_path):
+            t0 = time.perf_counter()
             existing = unreal.EditorAssetLibrary.load_asset(asset_path)
             if existing:
+                load_s = time.perf_counter() - t0
                 try:
                     existing.set_editor_property('parent', parent_asset)
                 except Exception:
@@ -310,20 +401,25 @@ def create_material_instances(specs: List[Dict[str, Any]], dry_run: bool = False
                         existing.parent = parent_asset
                     except Exception:
                         unreal.log_warning(f"No se pudo asignar el parent a existente: {object_path}")
+                t1 = time.perf_counter()
                 unreal.EditorAssetLibrary.save_asset(asset_path, only_if_is_dirty=False)
+                _record_mi(metrics, object_path, 'update', load_s=load_s, save_s=time.perf_counter() - t1)
                 unreal.log(f"Actualizado parent: {object_path}")
                 continue
 
         # Crea el asset (parent establecido en factory)
+        t0 = time.perf_counter()
         new_asset = asset_tools.create_asset(
             asset_name=name,
             package_path=package_path,
             asset_class=unreal.MaterialInstanceConstant,
             factory=factory,
         )
+        create_s = time.perf_counter() - t0
 
         if not new_asset:
             unreal.log_warning(f"No se pudo crear el MI: {object_path}")
+            _record_mi(metrics, object_path, 'create', result='error', create_s=create_s)
             continue
 
         # Asigna parent
@@ -337,45 +433,158 @@ def create_material_instances(specs: List[Dict[str, Any]], dry_run: bool = False
                 unreal.log_warning(f"No se pudo asignar el parent a: {object_path}")
 
         # Guarda el asset
+        t1 = time.perf_counter()
         unreal.EditorAssetLibrary.save_asset(asset_path, only_if_is_dirty=False)
+        _record_mi(metrics, object_path, 'create', create_s=create_s, save_s=time.perf_counter() - t1)
         unreal.log(f"Creado: {object_path}")
 
 
-def main() -> None:
+def _in_unreal() -> bool:
+    # Si estamos dentro de Unreal, crear por defecto aunque no se pase --create
+    try:
+        import unreal  # type: ignore
+        return True
+    except Exception:
+        return False
+
+
+def _record_mi(metrics, object_path: str, action: str, result: str = 'ok', **durations: float) -> None:
+    metrics.inc('material_instances_total', action=action, result=result)
+    for step, seconds in durations.items():
+        metrics.observe('material_instance_seconds', seconds, action=action, step=step[:-2])
+    metrics.event('material_instance', object_path=object_path, action=action, result=result,
+                  **{k: round(v, 6) for k, v in durations.items()})
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Genera nombres MI + rutas; opcionalmente crea los assets en Unreal.")
     parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
     parser.add_argument('--create', action='store_true', help='Crear Material Instances en Unreal (por defecto solo imprime).')
     parser.add_argument('--dry-run', action='store_true', help='Con --create, solo mostrar acciones sin crear.')
-    args = parser.parse_args()
-
-    json_file = find_json_file(args.json_path)
-    roots = resolve_roots(json_file)
-
-    print("Starting material spec generation (names + paths)...")
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    parser.add_argument('--no-cache', action='store_true', help='Ignorar la caché del catálogo (Python/.cache).')
+    parser.add_argument('--skip-duplicates', nargs='?', const='', default=None, metavar='REPORTE',
+                        help='Omitir MI de patterns marcados como duplicados (reporte de duplicate_textures.py; '
+                             'por defecto duplicate_textures.json junto al JSON).')
+    parser.add_argument('--jsonl', nargs='?', const='-', default=None, metavar='ARCHIVO',
+                        help="Stream de specs en JSON lines (una por línea) a ARCHIVO o stdout ('-'), "
+                             "en lugar del volcado indentado completo. Con '-', los mensajes van a stderr.")
+    parser.add_argument('--collection', action='append', metavar='NOMBRE',
+                        help='Solo esta colección (repetible). Las specs se generan una a una, sin la caché; '
+                             'la salida sigue siendo el volcado indentado salvo con --jsonl.')
+    parser.add_argument('--subcollection', action='append', metavar='NOMBRE',
+                        help='Solo esta subcolección (repetible). Igual que --collection.')
+    parser.add_argument('--audit', action='store_true',
+                        help='(Unreal) Auditar los MI existentes con el Asset Registry y cargar/corregir solo '
+                             'los que faltan o tienen otro parent.')
+    parser.add_argument('--audit-report', metavar='ARCHIVO', help='Con --audit, guardar el reporte en ARCHIVO (JSON).')
+    parser.add_argument('--metrics', help='Eventos JSON lines a este archivo (o CLOTHFIG_METRICS)')
+    parser.add_argument('--prom', help='Snapshot Prometheus textfile al terminar (o CLOTHFIG_METRICS_PROM)')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='DIR',
+                        help='Perfilar con cProfile + tracemalloc; escribe .pstats/.collapsed/.alloc.txt en DIR (por defecto Python/.profile). En el Editor: CLOTHFIG_PROFILE=1')
+    args = parser.parse_args(argv)
+
+    stdout = sys.stdout
+    with contextlib.ExitStack() as stack:
+        if args.jsonl == '-':
+            # stdout queda solo para las líneas JSON: mensajes, perfil y --metrics - van a stderr
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        metrics = configure_metrics('materials', args.metrics, args.prom)
+        exit_code = 1
+        try:
+            with profile_session('materials', args.profile):
+                exit_code = _run(args, stdout)
+            return exit_code
+        finally:
+            metrics.close(exit_code=exit_code)
 
-    specs = build_material_specs(data, roots['base_fs_root_vendor'], roots['base_asset_root_vendor'])
 
-    # Siempre imprimimos el super array para validar
-    print(json.dumps(specs, indent=2, ensure_ascii=False))
+def _run(args: argparse.Namespace, stdout: TextIO) -> int:
+    metrics = get_metrics()
 
-    # Si estamos dentro de Unreal, crear por defecto aunque no se pase --create
-    def _in_unreal() -> bool:
-        try:
-            import unreal  # type: ignore
-            return True
-        except Exception:
-            return False
-
-    # Crear carpetas primero (si estamos en Unreal)
-    if _in_unreal():
-        create_folders_from_json(data)
+    try:
+        json_file = find_json_file(args.json_path)
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+    roots = resolve_roots(json_file)
+    skip_counts: Dict[str, int] = {}
 
-    if args.create or _in_unreal():
-        # Ejecutar creación dentro de Unreal Editor
-        create_material_instances(specs, dry_run=args.dry_run)
+    print("Starting material spec generation (names + paths)...")
+    use_cache = False if args.no_cache else None
+    if args.jsonl is not None or args.collection or args.subcollection:
+        # Stream: las specs se generan una a una, sin construir la lista completa
+        with metrics.stage('json_load'):
+            data = load_json_cached(json_file, use_cache)
+        specs: Iterable[Dict[str, Any]] = iter_material_specs(
+            data,
+            roots['base_fs_root_vendor'],
+            roots['base_asset_root_vendor'],
+            collections=args.collection,
+            subcollections=args.subcollection,
+        )
+    else:
+        with metrics.stage('spec_build') as info:
+            specs = load_material_specs(json_file, roots, use_cache)
+            info['specs'] = len(specs)
+
+    if args.skip_duplicates is not None:
+        report_path = Path(args.skip_duplicates) if args.skip_duplicates else json_file.parent / 'duplicate_textures.json'
+        duplicates = load_duplicate_patterns(report_path)
+        specs = skip_duplicate_specs(specs, duplicates, skip_counts)
+
+    if args.audit:
+        if not _in_unreal():
+            print("--audit necesita el Asset Registry: ejecuta dentro del Editor de Unreal.")
+            return 2
+        from mi_audit import audit_material_instances, print_audit_report, read_registry, specs_to_fix, write_audit_report
+
+        with metrics.stage('mi_audit') as info:
+            specs = list(specs)
+            report = audit_material_instances(specs, read_registry(str(roots['base_asset_root_vendor'])),
+                                              PARENT_MATERIAL_OBJECT_PATH)
+            if args.collection or args.subcollection:
+                report['orphaned'] = []  # con filtros, el resto del catálogo no es huérfano
+            info.update({category: len(items) for category, items in report.items()})
+        print_audit_report(report)
+        if args.audit_report:
+            write_audit_report(report, Path(args.audit_report))
+        # Solo los MI que cambian: el resto no se carga
+        specs = specs_to_fix(report)
+
+    with contextlib.ExitStack() as stack:
+        if args.jsonl is not None:
+            if args.jsonl == '-':
+                out = stdout
+            else:
+                out = stack.enter_context(open(args.jsonl, 'w', encoding='utf-8'))
+                print(f"Escribiendo specs (JSON lines) en: {args.jsonl}")
+            specs = write_specs_jsonl(specs, out)
+        else:
+            # Siempre imprimimos el super array para validar
+            specs = list(specs)
+            print(json.dumps(specs, indent=2, ensure_ascii=False))
+
+        # Crear carpetas primero (si estamos en Unreal)
+        if _in_unreal():
+            with metrics.stage('unreal_folders'):
+                create_folders_from_json(load_json_cached(json_file, use_cache))
+
+        with metrics.stage('material_instances' if (args.create or _in_unreal()) else 'spec_output'):
+            if args.create or _in_unreal():
+                # Ejecutar creación dentro de Unreal Editor
+                create_material_instances(specs, dry_run=args.dry_run)
+            else:
+                # Sin creación: consumir el stream (escribe las líneas pendientes)
+                deque(specs, maxlen=0)
+    if args.skip_duplicates is not None:
+        # Tras consumir el stream: las specs omitidas, no el tamaño del reporte
+        print(f"Omitidos {skip_counts['skipped']} MI de patterns duplicados (reporte: {report_path})")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    if _in_unreal():
+        # En el Editor no se lanza SystemExit: el intérprete es compartido y lo registraría como error
+        main()
+    else:
+        sys.exit(main())
@@ -1,14 +1,19 @@
+from __future__ import annotations
+
 import argparse
-import json
 import os
 import re
 import sys
 import time
-import urllib.request
-import urllib.error
-import socket
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+
+from catalog_cache import cached, load_json_cached, remember_json_path, remembered_json_path
+from sync_metrics import configure as configure_metrics, get_metrics
+
+# Solo para anotaciones: `clothfig plan` importa este módulo y no debe cargar `typing`
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Set, Tuple
 
 
 # ---------------------------------- Config ----------------------------------
@@ -22,11 +27,15 @@ DEFAULT_JSON_CANDIDATES = [
 ]
 
 
+# Host de imágenes. MAYER_IMAGES_BASE_URL permite redirigirlo (p. ej. al servidor local de bench_sync.py)
+IMAGE_BASE_URL = os.environ.get('MAYER_IMAGES_BASE_URL', 'https://images.mayerfabrics.com').rstrip('/')
+
+
 # URL builder (no thumbnails):
 # Ejemplo proporcionado: https://images.mayerfabrics.com/item/804-004/image?download=804-004
 def build_download_url(variation_pattern: str) -> str:
     pat = variation_pattern.strip()
-    return f"https://images.mayerfabrics.com/item/{pat}/image?download={pat}"
+    return f"{IMAGE_BASE_URL}/item/{pat}/image?download={pat}"
 
 
 # ----------------------------- Sanitización nombres -----------------------------
@@ -82,7 +91,9 @@ def find_json_file(cli_path: Optional[str]) -> Path:
     Prioridad:
       1) --json de CLI
       2) Var entorno COLLECTIONS_JSON
-      3) Mismos directorios cercanos (Python/, raíz proyecto)
+      3) Misma carpeta del script (Python/)
+      4) Ubicación recordada de una ejecución anterior (Python/.cache/json_location.txt)
+      5) Directorios cercanos (raíz proyecto y hasta 3 niveles arriba)
     """
     if cli_path:
         p = Path(cli_path).expanduser().resolve()
@@ -96,12 +107,19 @@ def find_json_file(cli_path: Optional[str]) -> Path:
         if p.exists():
             return p
 
-    # Buscar a partir del directorio de este script
+    # En misma carpeta: siempre antes que la ubicación recordada
     script_dir = Path(__file__).parent.resolve()
-    candidates: List[Path] = []
-    # En misma carpeta
     for name in DEFAULT_JSON_CANDIDATES:
-        candidates.append(script_dir / name)
+        p = script_dir / name
+        if p.exists():
+            return p
+
+    remembered = remembered_json_path()
+    if remembered:
+        return remembered
+
+    # Buscar a partir del directorio de este script
+    candidates: List[Path] = []
     # En carpeta Python padre
     if script_dir.name.lower() == 'python':
         project_root = script_dir.parent
@@ -126,6 +144,7 @@ def find_json_file(cli_path: Optional[str]) -> Path:
             continue
         seen.add(c)
         if c.exists():
+            remember_json_path(c)
             return c
 
     raise FileNotFoundError("No se encontró 'collections.json'. Usa --json <ruta> o define COLLECTIONS_JSON.")
@@ -140,7 +159,10 @@ def resolve_project_root(json_file: Path) -> Path:
 
 
 # -------------------------------- Descargas --------------------------------
+# urllib/socket se importan al descargar: `plan`, `--help` o el CLI clothfig no pagan su coste
 def http_get(url: str, timeout: float = 20.0) -> bytes:
+    import urllib.request
+
     req = urllib.request.Request(
         url,
         method='GET',
@@ -157,6 +179,11 @@ def http_get(url: str, timeout: float = 20.0) -> bytes:
 
 
 def download_with_retries(url: str, dest_path: Path, retries: int = 3, timeout: float = 20.0, backoff: float = 1.5) -> Tuple[bool, str]:
+    import socket
+    import urllib.error
+
+    metrics = get_metrics()
+    t0 = time.perf_counter()
     last_err: Optional[BaseException] = None
     for attempt in range(1, retries + 1):
         try:
@@ -167,29 +194,37 @@ def download_with_retries(url: str, dest_path: Path, retries: int = 3, timeout:
             with open(tmp, 'wb') as f:
                 f.write(data)
             tmp.replace(dest_path)
+            _record_download(metrics, url, dest_path, t0, attempt, len(data), "ok")
             return True, "ok"
         except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError, socket.timeout, OSError) as e:
             last_err = e
             if attempt < retries:
+                metrics.inc('download_retries_total')
                 time.sleep(backoff ** attempt)
             else:
                 break
-    return False, str(last_err) if last_err else "error"
+    msg = str(last_err) if last_err else "error"
+    _record_download(metrics, url, dest_path, t0, retries, 0, "error", error=msg)
+    return False, msg
+
+
+def _record_download(metrics, url: str, dest_path: Path, t0: float, attempts: int, size: int, result: str, **extra: Any) -> None:
+    latency = time.perf_counter() - t0
+    metrics.observe('download_seconds', latency, result=result)
+    metrics.inc('downloads_total', result=result)
+    metrics.inc('download_bytes_total', size)
+    metrics.event('download', url=url, file=str(dest_path), bytes=size, latency_s=round(latency, 6),
+                  retries=attempts - 1, result=result, **extra)
 
 
 # ---------------------------------- Proceso ----------------------------------
-def process_all(json_path: Path, dest_root: Path) -> Tuple[int, int, int, List[str]]:
-    """Procesa el JSON y descarga imágenes.
-    Retorna: (descargados, saltados, fallidos, errores[])
-    """
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+# Entrada del plan: (colección, subcolección, pattern | None, archivo destino)
+PlanItem = tuple[str, str, str | None, str]
 
-    downloaded = 0
-    skipped = 0
-    failed = 0
-    errors: List[str] = []
 
+def build_download_plan(data, dest_root: Path) -> List[PlanItem]:
+    """Lista de descargas esperadas según el JSON (incluye variaciones sin pattern con None)."""
+    plan: List[PlanItem] = []
     for coll in data or []:
         coll_name = _get_collection_name(coll)
         if not coll_name:
@@ -201,32 +236,86 @@ def process_all(json_path: Path, dest_root: Path) -> Tuple[int, int, int, List[s
                 continue
             sub_folder = sanitize_folder(sub_name)
             target_dir = (dest_root / coll_folder / sub_folder).resolve()
-
             for var in _get_variations_list(sub):
                 pattern = _get_variation_pattern(var)
-                if not pattern:
-                    failed += 1
-                    errors.append(f"Sin 'variation-pattern' -> {coll_name}/{sub_name}")
-                    continue
-
-                url = build_download_url(pattern)
-                filename = f"{pattern}.jpg"  # Preferencia explícita del usuario
-                dest_file = target_dir / filename
-
-                if dest_file.exists():
-                    skipped += 1
-                    continue
-
-                ok, msg = download_with_retries(url, dest_file)
-                if ok:
-                    downloaded += 1
-                else:
-                    failed += 1
-                    errors.append(f"{pattern}: {msg}")
+                dest_file = str(target_dir / f"{pattern}.jpg") if pattern else ''  # Preferencia explícita del usuario
+                plan.append((coll_name, sub_name, pattern, dest_file))
+    return plan
+
+
+def load_download_plan(json_path: Path, dest_root: Path, use_cache: Optional[bool] = None) -> List[PlanItem]:
+    return cached(
+        json_path,
+        'download_plan',
+        lambda: build_download_plan(load_json_cached(json_path, use_cache), dest_root),
+        enabled=use_cache,
+        inputs=(Path(dest_root).resolve(),),
+    )
+
+
+def existing_files(dest_root: Path) -> Set[str]:
+    """Archivos presentes bajo dest_root: un recorrido os.scandir en lugar de un stat por textura.
+
+    Rutas pasadas por os.path.normcase: en Windows (volúmenes sin distinción de mayúsculas)
+    `804-001.JPG` cuenta como `804-001.jpg`. Compara siempre con normcase(dest).
+    """
+    from sync_reconcile import TreeSnapshot
+
+    return {os.path.normcase(p) for p in TreeSnapshot.scan(str(dest_root.resolve())).files}
+
+
+def process_all(json_path: Path, dest_root: Path, use_cache: Optional[bool] = None) -> Tuple[int, int, int, List[str]]:
+    """Procesa el JSON y descarga imágenes.
+    Retorna: (descargados, saltados, fallidos, errores[])
+    """
+    metrics = get_metrics()
+    downloaded = 0
+    skipped = 0
+    failed = 0
+    errors: List[str] = []
+
+    with metrics.stage('plan_load') as info:
+        plan = load_download_plan(json_path, dest_root, use_cache)
+        info['items'] = len(plan)
+
+    with metrics.stage('tree_scan') as info:
+        present = existing_files(dest_root)
+        info['files'] = len(present)
+
+    with metrics.stage('downloads') as info:
+        for coll_name, sub_name, pattern, dest in plan:
+            if not pattern:
+                failed += 1
+                errors.append(f"Sin 'variation-pattern' -> {coll_name}/{sub_name}")
+                metrics.inc('downloads_total', result='no_pattern')
+                continue
+
+            dest_key = os.path.normcase(dest)
+            if dest_key in present:
+                skipped += 1
+                metrics.inc('downloads_total', result='skipped')
+                continue
+
+            ok, msg = download_with_retries(build_download_url(pattern), Path(dest))
+            if ok:
+                downloaded += 1
+                # Otras variaciones con el mismo destino ya no se descargan
+                present.add(dest_key)
+            else:
+                failed += 1
+                errors.append(f"{pattern}: {msg}")
+        info.update(downloaded=downloaded, skipped=skipped, failed=failed)
 
     return downloaded, skipped, failed, errors
 
 
+def _print_errors(errors: List[str], limit: int = 10) -> None:
+    for e in errors[:limit]:
+        print(" -", e)
+    if len(errors) > limit:
+        print(f" ... y {len(errors) - limit} errores más (detalle completo con --metrics)")
+
+
 def show_final_popup(downloaded: int, skipped: int, failed: int, errors: List[str]) -> None:
     try:
         import tkinter as tk
@@ -280,11 +369,51 @@ def show_final_popup(downloaded: int, skipped: int, failed: int, errors: List[st
 
 
 def main(argv: Optional[List[str]] = None) -> int:
+    from compress_textures import DEFAULT_QUALITY, QUALITIES
+    from sync_profile import profile_session
+
     parser = argparse.ArgumentParser(description="Descarga texturas de MayerFabrics según collections.json")
     parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
     parser.add_argument('--no-gui', action='store_true', help='No mostrar popup final (solo consola)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignorar la caché del catálogo (Python/.cache)')
+    parser.add_argument('--compress', nargs='?', const=DEFAULT_QUALITY, default=None, choices=QUALITIES, metavar='CALIDAD',
+                        help='Tras descargar, comprimir a DDS BC1/BC5 con mips (compress_textures.py; '
+                             f'calidad {"/".join(QUALITIES)}, por defecto {DEFAULT_QUALITY})')
+    parser.add_argument('--metrics', help='Eventos JSON lines a este archivo (o CLOTHFIG_METRICS)')
+    parser.add_argument('--prom', help='Snapshot Prometheus textfile al terminar (o CLOTHFIG_METRICS_PROM)')
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='DIR',
+                        help='Perfilar con cProfile + tracemalloc; escribe .pstats/.collapsed/.alloc.txt en DIR (por defecto Python/.profile). En el Editor: CLOTHFIG_PROFILE=1')
     args = parser.parse_args(argv)
 
+    metrics = configure_metrics('download', args.metrics, args.prom)
+    exit_code = 2
+    try:
+        with profile_session('download', args.profile):
+            exit_code = _run(args)
+            if args.compress and exit_code != 2:
+                exit_code = max(exit_code, _compress(args))
+        return exit_code
+    finally:
+        metrics.close(exit_code=exit_code)
+
+
+def _compress(args: argparse.Namespace) -> int:
+    """Etapa opcional después de las descargas: DDS precomprimidos para la importación."""
+    from compress_textures import REPORT_FILENAME, compress_tree, print_summary
+
+    json_file = find_json_file(args.json_path)
+    dest_root = (resolve_project_root(json_file) / DEST_RELATIVE).resolve()
+    try:
+        report = compress_tree(dest_root, json_file.parent / REPORT_FILENAME, quality=args.compress)
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+    print_summary(report)
+    return 0 if not report['failed'] else 1
+
+
+def _run(args: argparse.Namespace) -> int:
+
     try:
         json_file = find_json_file(args.json_path)
     except FileNotFoundError as e:
@@ -294,16 +423,17 @@ def main(argv: Optional[List[str]] = None) -> int:
     project_root = resolve_project_root(json_file)
     dest_root = (project_root / DEST_RELATIVE).resolve()
 
+    use_cache = False if args.no_cache else None
+
     print(f"Usando JSON: {json_file}")
     print(f"Destino: {dest_root}")
 
     if args.no_gui:
         # Modo sin interfaz
-        downloaded, skipped, failed, errors = process_all(json_file, dest_root)
+        downloaded, skipped, failed, errors = process_all(json_file, dest_root, use_cache)
         print(f"Descargados: {downloaded}, Saltados: {skipped}, Fallidos: {failed}")
         if errors:
-            for e in errors[:10]:
-                print(" -", e)
+            _print_errors(errors)
         return 0 if failed == 0 else 1
 
     # Con interfaz: construir lista de tareas y mostrar confirmación + ventana de progreso simple
@@ -312,39 +442,21 @@ def main(argv: Optional[List[str]] = None) -> int:
         from tkinter import messagebox
     except ImportError:
         # Sin Tk disponible, ejecuta en modo consola
-        downloaded, skipped, failed, errors = process_all(json_file, dest_root)
+        downloaded, skipped, failed, errors = process_all(json_file, dest_root, use_cache)
         print(f"Descargados: {downloaded}, Saltados: {skipped}, Fallidos: {failed}")
         if errors:
-            for e in errors[:10]:
-                print(" -", e)
+            _print_errors(errors)
         show_final_popup(downloaded, skipped, failed, errors)
         return 0 if failed == 0 else 1
 
     # Construir tareas a descargar (excluyendo ya existentes y entradas sin pattern)
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
     tasks: List[Tuple[str, str, str, str, Path]] = []  # (coll, sub, pattern, url, dest_file)
-    for coll in data or []:
-        coll_name = _get_collection_name(coll)
-        if not coll_name:
+    present = existing_files(dest_root)
+    for coll_name, sub_name, pattern, dest in load_download_plan(json_file, dest_root, use_cache):
+        if not pattern or os.path.normcase(dest) in present:
             continue
-        coll_folder = sanitize_folder(coll_name)
-        for sub in _get_subcollection_list(coll):
-            sub_name = _get_subcollection_name(sub)
-            if not sub_name:
-                continue
-            sub_folder = sanitize_folder(sub_name)
-            target_dir = (dest_root / coll_folder / sub_folder).resolve()
-            for var in _get_variations_list(sub):
-                pattern = _get_variation_pattern(var)
-                if not pattern:
-                    continue
-                url = build_download_url(pattern)
-                dest_file = target_dir / f"{pattern}.jpg"
-                if dest_file.exists():
-                    continue
-                tasks.append((coll_name, sub_name, pattern, url, dest_file))
+        present.add(os.path.normcase(dest))  # un destino compartido se descarga una sola vez
+        tasks.append((coll_name, sub_name, pattern, build_download_url(pattern), Path(dest)))
 
     total = len(tasks)
 
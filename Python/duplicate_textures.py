@@ -0,0 +1,258 @@
+"""Detección de texturas duplicadas / casi duplicadas con hashes perceptuales.
+
+- Calcula dHash y pHash (64 bits cada uno) de cada textura descargada por downloadTextures.py
+- Los hashes se guardan junto al reporte y solo se recalculan para imágenes nuevas o modificadas
+- Compara todos los pares con distancia de Hamming vectorizada (XOR + popcount en NumPy)
+- Agrupa los casi duplicados (union-find) y escribe un reporte JSON con los grupos
+- En cada grupo se conserva como canónico el primer pattern según el orden de collections.json;
+  el resto queda marcado como duplicado (create_materials.py --skip-duplicates los omite)
+
+Requiere Pillow y NumPy.
+
+Uso:
+    python duplicate_textures.py
+    python duplicate_textures.py --threshold 6 --dhash-threshold 8
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from downloadTextures import DEST_RELATIVE, find_json_file, resolve_project_root
+from similar_fabrics import _scan_images, load_catalog_patterns
+
+
+# ---------------------------------- Config ----------------------------------
+REPORT_FILENAME = 'duplicate_textures.json'
+# 2: pHash sin la componente DC (los hashes guardados con la versión 1 se recalculan)
+REPORT_VERSION = 2
+
+# Distancia de Hamming máxima (sobre 64 bits) para considerar dos imágenes casi iguales.
+# Un duplicado debe cumplir AMBOS umbrales: pHash tolera recortes/reescalados leves,
+# dHash evita falsos positivos entre telas lisas de color parecido.
+DEFAULT_PHASH_THRESHOLD = 8
+DEFAULT_DHASH_THRESHOLD = 10
+
+# Filas por bloque al comparar todos contra todos (limita la memoria de la matriz XOR)
+BLOCK_ROWS = 256
+
+
+def _require_imaging():
+    try:
+        import numpy as np
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("Se necesitan Pillow y NumPy (pip install pillow numpy).") from e
+    return np, Image
+
+
+# ---------------------------------- Hashes ----------------------------------
+def _bits_to_int(bits) -> int:
+    value = 0
+    for bit in bits.ravel():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def _dct_matrix(n: int):
+    np, _ = _require_imaging()
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0, :] /= np.sqrt(2.0)
+    return m
+
+
+_DCT32 = None
+
+
+def image_hashes(image_path: Path) -> Tuple[int, int]:
+    """Devuelve (dhash, phash) de 64 bits de una imagen."""
+    global _DCT32
+    np, Image = _require_imaging()
+    with Image.open(image_path) as im:
+        gray = im.convert('L')
+        small = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+        big = np.asarray(gray.resize((32, 32), Image.LANCZOS), dtype=np.float64)
+
+    dhash = _bits_to_int(small[:, 1:] > small[:, :-1])
+
+    if _DCT32 is None:
+        _DCT32 = _dct_matrix(32)
+    # Como libpHash: bloque 8x8 de frecuencias 1..8. Sin la fila/columna 0, la componente DC
+    # (brillo medio, casi siempre por encima de la mediana) no entra ni en la mediana ni en los bits
+    low = (_DCT32 @ big @ _DCT32.T)[1:9, 1:9]
+    phash = _bits_to_int(low > np.median(low))
+    return dhash, phash
+
+
+# ------------------------------ Hamming vectorizado ------------------------------
+def _popcount64(x):
+    np, _ = _require_imaging()
+    if hasattr(np, 'bitwise_count'):  # NumPy >= 2.0
+        return np.bitwise_count(x)
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return table[x.view(np.uint8)].reshape(*x.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+def near_duplicate_pairs(dhashes: List[int], phashes: List[int],
+                         phash_threshold: int, dhash_threshold: int) -> List[Tuple[int, int, int]]:
+    """Pares (i, j, distancia pHash) con i < j que cumplen ambos umbrales."""
+    np, _ = _require_imaging()
+    d = np.array(dhashes, dtype=np.uint64)
+    p = np.array(phashes, dtype=np.uint64)
+    n = len(d)
+    pairs: List[Tuple[int, int, int]] = []
+    for start in range(0, n, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, n)
+        pdist = _popcount64(p[start:stop, None] ^ p[None, :])
+        ddist = _popcount64(d[start:stop, None] ^ d[None, :])
+        rows = np.arange(start, stop)[:, None]
+        cols = np.arange(n)[None, :]
+        mask = (pdist <= phash_threshold) & (ddist <= dhash_threshold) & (cols > rows)
+        for r, c in zip(*np.nonzero(mask)):
+            pairs.append((start + int(r), int(c), int(pdist[r, c])))
+    return pairs
+
+
+def _group_pairs(n: int, pairs: List[Tuple[int, int, int]]) -> List[List[int]]:
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return [sorted(g) for g in groups.values() if len(g) > 1]
+
+
+# ---------------------------------- Reporte ----------------------------------
+def load_report(report_path: Path) -> Dict[str, Any]:
+    if not report_path.exists():
+        return {}
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    return report if report.get('version') == REPORT_VERSION else {}
+
+
+def save_report(report_path: Path, report: Dict[str, Any]) -> None:
+    tmp = report_path.with_suffix(report_path.suffix + '.part')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    tmp.replace(report_path)
+
+
+def detect_duplicates(json_path: Path, images_root: Path, report_path: Path,
+                      phash_threshold: int = DEFAULT_PHASH_THRESHOLD,
+                      dhash_threshold: int = DEFAULT_DHASH_THRESHOLD) -> Dict[str, Any]:
+    """Actualiza hashes, agrupa casi duplicados y guarda el reporte. Retorna el reporte."""
+    catalog = load_catalog_patterns(json_path)
+    order = {pattern: i for i, pattern in enumerate(catalog)}
+    previous = load_report(report_path).get('hashes') or {}
+
+    hashes: Dict[str, Dict[str, Any]] = {}
+    computed = failed = 0
+    for pattern, path, mtime_ns, size in _scan_images(images_root):
+        if pattern not in catalog or pattern in hashes:
+            continue
+        old = previous.get(pattern)
+        if old and old.get('mtime_ns') == mtime_ns and old.get('size') == size:
+            hashes[pattern] = old
+            continue
+        try:
+            dh, ph = image_hashes(Path(path))
+        except (OSError, ValueError) as e:
+            print(f"[WARN] No se pudo analizar {path}: {e}")
+            failed += 1
+            continue
+        hashes[pattern] = {'mtime_ns': mtime_ns, 'size': size, 'dhash': f"{dh:016x}", 'phash': f"{ph:016x}"}
+        computed += 1
+
+    patterns = sorted(hashes, key=lambda p: order[p])
+    pairs = near_duplicate_pairs(
+        [int(hashes[p]['dhash'], 16) for p in patterns],
+        [int(hashes[p]['phash'], 16) for p in patterns],
+        phash_threshold,
+        dhash_threshold,
+    )
+    pair_dist = {(i, j): dist for i, j, dist in pairs}
+
+    groups = []
+    duplicates: Dict[str, str] = {}
+    for members in _group_pairs(len(patterns), pairs):
+        canonical = patterns[members[0]]
+        group = []
+        for m in members:
+            pattern = patterns[m]
+            group.append({**catalog[pattern], 'pattern': pattern,
+                          'phash_distance': pair_dist.get((members[0], m))})
+            if pattern != canonical:
+                duplicates[pattern] = canonical
+        groups.append({'canonical': canonical, 'members': group})
+
+    report = {
+        'version': REPORT_VERSION,
+        'phash_threshold': phash_threshold,
+        'dhash_threshold': dhash_threshold,
+        'stats': {'hashed': len(hashes), 'computed': computed, 'failed': failed,
+                  'groups': len(groups), 'duplicates': len(duplicates)},
+        'groups': groups,
+        'duplicates': duplicates,
+        'hashes': hashes,
+    }
+    save_report(report_path, report)
+    return report
+
+
+# ---------------------------------- CLI ----------------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Detecta texturas duplicadas o casi duplicadas (dHash/pHash)")
+    parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
+    parser.add_argument('--report', dest='report_path', help=f'Ruta del reporte (por defecto: junto al JSON, {REPORT_FILENAME})')
+    parser.add_argument('--threshold', type=int, default=DEFAULT_PHASH_THRESHOLD, help='Distancia pHash máxima (0-64)')
+    parser.add_argument('--dhash-threshold', type=int, default=DEFAULT_DHASH_THRESHOLD, help='Distancia dHash máxima (0-64)')
+    args = parser.parse_args(argv)
+
+    try:
+        json_file = find_json_file(args.json_path)
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+    report_path = Path(args.report_path) if args.report_path else json_file.parent / REPORT_FILENAME
+    images_root = resolve_project_root(json_file) / DEST_RELATIVE
+
+    print(f"Usando JSON: {json_file}")
+    print(f"Imágenes: {images_root}")
+    t0 = time.perf_counter()
+    try:
+        report = detect_duplicates(json_file, images_root, report_path, args.threshold, args.dhash_threshold)
+    except RuntimeError as e:
+        print(str(e))
+        return 2
+
+    for group in report['groups']:
+        print(f"Grupo (canónico {group['canonical']}):")
+        for m in group['members']:
+            dist = '' if m['phash_distance'] is None else f"  d={m['phash_distance']}"
+            print(f"  - {m['pattern']:<12} {m['collection']} / {m['subcollection']} / {m['name']}{dist}")
+    stats = report['stats']
+    print(f"Hashes: {stats['hashed']} (calculados {stats['computed']}, fallidos {stats['failed']}), "
+          f"Grupos: {stats['groups']}, Duplicados: {stats['duplicates']} ({time.perf_counter() - t0:.1f}s)")
+    print(f"Reporte: {report_path}")
+    return 0 if stats['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Auditoría de Material Instances usando solo metadatos del Asset Registry (sin cargar paquetes).
+
+Para cada MI bajo /Game/Materials/<MANUFACTURER> se leen del registro:
+- clase del asset
+- tag `Parent` (propiedad AssetRegistrySearchable de UMaterialInstance)
+- dependencias del paquete que son texturas
+
+y se comparan con las specs de create_materials.py:
+    missing       spec sin asset en el registro                  -> se crea
+    wrong_parent  parent distinto de PARENT_MATERIAL_OBJECT_PATH -> se carga y corrige
+    wrong_class   existe un asset con ese nombre pero no es MIC  -> solo reporte
+    no_texture    el MI no referencia ninguna textura            -> solo reporte
+    orphaned      MI que ya no está en collections.json          -> solo reporte (nunca se borra)
+
+Solo `missing` y `wrong_parent` pasan a create_material_instances, así que el Editor
+únicamente carga los paquetes que de verdad cambian.
+
+Uso (dentro del Editor):
+    create_materials.py --audit [--audit-report informe.json] [--dry-run]
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+MIC_CLASS = 'MaterialInstanceConstant'
+TEXTURE_CLASSES = frozenset(('Texture2D', 'TextureCube', 'Texture2DArray', 'VirtualTexture2D', 'TextureRenderTarget2D'))
+
+# Categorías que create_material_instances sabe reparar
+FIXABLE = ('missing', 'wrong_parent')
+
+_QUOTED_PATH_RE = re.compile(r"'([^']+)'")
+
+
+def normalize_object_path(value: Optional[str]) -> str:
+    """Tag de referencia a objeto -> ruta de objeto.
+
+    "/Script/Engine.MaterialInstanceConstant'/Game/M/MI_X.MI_X'" -> "/Game/M/MI_X.MI_X"
+    """
+    if not value or value == 'None':
+        return ''
+    m = _QUOTED_PATH_RE.search(value)
+    return (m.group(1) if m else value).strip()
+
+
+# ---------------------------------- Registro ----------------------------------
+def _asset_class(asset_data: Any) -> str:
+    # UE 5.1+: asset_class_path (TopLevelAssetPath); antes: asset_class (Name)
+    try:
+        return str(asset_data.asset_class_path.asset_name)
+    except AttributeError:
+        return str(asset_data.asset_class)
+
+
+def _class_filter(unreal: Any, class_names: Iterable[str], package_paths: Optional[List[str]] = None) -> Any:
+    kwargs: Dict[str, Any] = {'recursive_paths': True}
+    if package_paths:
+        kwargs['package_paths'] = package_paths
+    try:
+        return unreal.ARFilter(class_paths=[unreal.TopLevelAssetPath('/Script/Engine', c) for c in class_names], **kwargs)
+    except (AttributeError, TypeError):
+        return unreal.ARFilter(class_names=list(class_names), **kwargs)
+
+
+def read_registry(base_package_path: str) -> Dict[str, Dict[str, Any]]:
+    """object_path -> {class, parent, textures} de todos los assets bajo base_package_path.
+
+    Solo consulta el Asset Registry: ningún paquete se carga en memoria.
+    """
+    import unreal  # type: ignore
+
+    registry = unreal.AssetRegistryHelpers.get_asset_registry()
+    # El registro puede estar incompleto si el Editor aún está escaneando: forzar esta rama
+    registry.scan_paths_synchronous([base_package_path], True)
+
+    texture_packages = {str(a.package_name) for a in registry.get_assets(_class_filter(unreal, TEXTURE_CLASSES))}
+    dep_options = unreal.AssetRegistryDependencyOptions(include_hard_package_references=True,
+                                                        include_soft_package_references=True)
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    for asset in registry.get_assets_by_path(base_package_path, recursive=True):
+        package = str(asset.package_name)
+        name = str(asset.asset_name)
+        cls = _asset_class(asset)
+        parent = ''
+        textures: List[str] = []
+        if cls == MIC_CLASS:
+            parent = normalize_object_path(str(asset.get_tag_value('Parent') or ''))
+            deps = registry.get_dependencies(package, dep_options) or []
+            textures = sorted(str(d) for d in deps if str(d) in texture_packages)
+        entries[f"{package}.{name}"] = {'class': cls, 'parent': parent, 'textures': textures}
+    return entries
+
+
+# ---------------------------------- Auditoría ----------------------------------
+def audit_material_instances(specs: Iterable[Dict[str, Any]], entries: Dict[str, Dict[str, Any]],
+                             parent_object_path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Clasifica specs y assets del registro. Cada entrada lleva object_path y, si aplica, la spec."""
+    report: Dict[str, List[Dict[str, Any]]] = {
+        'missing': [], 'wrong_parent': [], 'wrong_class': [], 'no_texture': [], 'orphaned': [], 'ok': [],
+    }
+    expected = set()
+    for spec in specs:
+        object_path = spec['object_path']
+        expected.add(object_path)
+        entry = entries.get(object_path)
+        if entry is None:
+            report['missing'].append({'object_path': object_path, 'spec': spec})
+            continue
+        if entry['class'] != MIC_CLASS:
+            report['wrong_class'].append({'object_path': object_path, 'class': entry['class']})
+            continue
+        healthy = True
+        if entry['parent'] != parent_object_path:
+            report['wrong_parent'].append({'object_path': object_path, 'parent': entry['parent'], 'spec': spec})
+            healthy = False
+        if not entry['textures']:
+            report['no_texture'].append({'object_path': object_path})
+            healthy = False
+        if healthy:
+            report['ok'].append({'object_path': object_path})
+
+    for object_path, entry in entries.items():
+        if entry['class'] == MIC_CLASS and object_path not in expected:
+            report['orphaned'].append({'object_path': object_path, 'parent': entry['parent']})
+    return report
+
+
+def specs_to_fix(report: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    return [item['spec'] for category in FIXABLE for item in report[category]]
+
+
+def print_audit_report(report: Dict[str, List[Dict[str, Any]]], limit: int = 10) -> None:
+    print("Auditoría de Material Instances (Asset Registry):")
+    for category in ('ok', 'missing', 'wrong_parent', 'wrong_class', 'no_texture', 'orphaned'):
+        items = report[category]
+        print(f"  {category:<13}: {len(items)}")
+        if category == 'ok':
+            continue
+        for item in items[:limit]:
+            detail = item.get('parent') or item.get('class') or ''
+            print(f"      {item['object_path']}" + (f"  ({detail})" if detail else ''))
+        if len(items) > limit:
+            print(f"      ... y {len(items) - limit} más")
+
+
+def write_audit_report(report: Dict[str, List[Dict[str, Any]]], path: Path) -> None:
+    # Sin las specs completas: el reporte es para leerlo, no para reconstruir
+    slim = {k: [{f: v for f, v in item.items() if f != 'spec'} for item in items] for k, items in report.items()}
+    tmp = path.with_suffix(path.suffix + '.part')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(slim, f, indent=2, ensure_ascii=False)
+    tmp.replace(path)
@@ -0,0 +1,376 @@
+"""Índice de "telas similares" (vecinos más cercanos) sobre todo el catálogo.
+
+- Lee las imágenes descargadas por downloadTextures.py (Content/Texture/MayerFabrics/**/<pattern>.jpg)
+- Por cada variación calcula un vector: media/desviación en Lab + estadísticas de textura (gradiente de L)
+- Construye un KD-tree en memoria y responde consultas k-NN por variation-pattern
+- El índice se guarda en disco y se reconstruye de forma incremental: solo se recalculan
+  las imágenes nuevas o modificadas (mtime/tamaño) y se eliminan las que ya no están en el JSON
+
+Requiere Pillow y NumPy solo para extraer features (comando `build`).
+La consulta (`query`) usa el índice guardado y no necesita dependencias externas.
+
+Uso:
+    python similar_fabrics.py build
+    python similar_fabrics.py query 804-004 -k 10
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from downloadTextures import (
+    DEST_RELATIVE,
+    _get_collection_name,
+    _get_subcollection_list,
+    _get_subcollection_name,
+    _get_variation_pattern,
+    _get_variations_list,
+    find_json_file,
+    resolve_project_root,
+)
+
+
+# ---------------------------------- Config ----------------------------------
+INDEX_FILENAME = 'similar_fabrics_index.json'
+INDEX_VERSION = 1
+
+# Lado del cuadrado al que se reescala cada imagen antes de extraer features.
+# Fijo para que las estadísticas de gradiente sean comparables entre imágenes.
+FEATURE_SIZE = 128
+
+FEATURE_NAMES = ['L_mean', 'a_mean', 'b_mean', 'L_std', 'a_std', 'b_std', 'grad_mean', 'grad_std']
+# Peso relativo de cada dimensión (tras estandarizar). El color domina; la textura desempata.
+FEATURE_WEIGHTS = [1.0, 1.0, 1.0, 0.6, 0.6, 0.6, 0.5, 0.3]
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+# ------------------------------ Extracción features ------------------------------
+def _srgb_to_lab(rgb):
+    """Convierte un array HxWx3 sRGB [0..1] a CIE Lab (D65)."""
+    import numpy as np
+
+    lin = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    m = np.array([
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ], dtype=np.float32)
+    xyz = lin @ m.T
+    xyz /= np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+    eps = 216.0 / 24389.0
+    kappa = 24389.0 / 27.0
+    f = np.where(xyz > eps, np.cbrt(xyz), (kappa * xyz + 16.0) / 116.0)
+    L = 116.0 * f[..., 1] - 16.0
+    a = 500.0 * (f[..., 0] - f[..., 1])
+    b = 200.0 * (f[..., 1] - f[..., 2])
+    return np.stack([L, a, b], axis=-1)
+
+
+def extract_features(image_path: Path) -> List[float]:
+    """Devuelve el vector de features (ver FEATURE_NAMES) de una imagen."""
+    try:
+        import numpy as np
+        from PIL import Image
+    except ImportError as e:
+        raise RuntimeError("Para construir el índice se necesitan Pillow y NumPy (pip install pillow numpy).") from e
+
+    with Image.open(image_path) as im:
+        im = im.convert('RGB').resize((FEATURE_SIZE, FEATURE_SIZE), Image.BILINEAR)
+        rgb = np.asarray(im, dtype=np.float32) / 255.0
+
+    lab = _srgb_to_lab(rgb)
+    gy, gx = np.gradient(lab[..., 0])
+    grad = np.hypot(gx, gy)
+    means = lab.reshape(-1, 3).mean(axis=0)
+    stds = lab.reshape(-1, 3).std(axis=0)
+    return [float(x) for x in (*means, *stds, grad.mean(), grad.std())]
+
+
+# ---------------------------------- KD-tree ----------------------------------
+class KDTree:
+    """KD-tree estático sobre puntos de dimensión fija.
+
+    Los nodos se guardan en listas planas (eje, corte, hijo izq., hijo der., hoja)
+    para que la consulta sea un recorrido iterativo sin objetos por nodo. Las hojas
+    agrupan hasta LEAF_SIZE puntos: en 8 dimensiones es más rápido medir un grupo
+    pequeño con math.dist que seguir bajando por el árbol.
+    """
+
+    LEAF_SIZE = 16
+
+    def __init__(self, points: Sequence[Sequence[float]]):
+        self.points: List[Tuple[float, ...]] = [tuple(p) for p in points]
+        self.dims = len(self.points[0]) if self.points else 0
+        self._axis: List[int] = []
+        self._split: List[float] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+        self._leaf: List[Optional[List[int]]] = []
+        self._root = self._build(list(range(len(self.points)))) if self.points else -1
+
+    def _build(self, ids: List[int]) -> int:
+        node = len(self._axis)
+        self._axis.append(-1)
+        self._split.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        if len(ids) <= self.LEAF_SIZE:
+            self._leaf.append(ids)
+            return node
+        self._leaf.append(None)
+        # Eje de mayor dispersión: árbol más equilibrado que alternar ejes
+        pts = self.points
+        axis = max(range(self.dims), key=lambda d: max(pts[i][d] for i in ids) - min(pts[i][d] for i in ids))
+        ids.sort(key=lambda i: pts[i][axis])
+        mid = len(ids) // 2
+        self._axis[node] = axis
+        self._split[node] = pts[ids[mid]][axis]
+        self._left[node] = self._build(ids[:mid])
+        self._right[node] = self._build(ids[mid:])
+        return node
+
+    def query(self, target: Sequence[float], k: int = 5, exclude: Optional[int] = None) -> List[Tuple[float, int]]:
+        """Devuelve hasta k pares (distancia, índice) ordenados por distancia."""
+        if k <= 0 or self._root < 0:
+            return []
+        points = self.points
+        dist = math.dist
+        heap: List[Tuple[float, int]] = []  # max-heap de (-dist, idx)
+        worst = math.inf
+        # Pila de (nodo, distancia mínima posible a la región del nodo)
+        stack: List[Tuple[int, float]] = [(self._root, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound >= worst:
+                continue
+            leaf = self._leaf[node]
+            if leaf is not None:
+                for pid in leaf:
+                    if pid == exclude:
+                        continue
+                    d = dist(points[pid], target)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d, pid))
+                        if len(heap) == k:
+                            worst = -heap[0][0]
+                    elif d < worst:
+                        heapq.heapreplace(heap, (-d, pid))
+                        worst = -heap[0][0]
+                continue
+            diff = target[self._axis[node]] - self._split[node]
+            near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+            # Se apila primero el lado lejano para visitar antes el cercano
+            stack.append((far, max(bound, abs(diff))))
+            stack.append((near, bound))
+        return sorted((-nd, pid) for nd, pid in heap)
+
+
+# ---------------------------------- Catálogo ----------------------------------
+def load_catalog_patterns(json_path: Path) -> Dict[str, Dict[str, str]]:
+    """Mapa variation-pattern -> {collection, subcollection, name} desde collections.json."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    catalog: Dict[str, Dict[str, str]] = {}
+    for coll in data or []:
+        coll_name = _get_collection_name(coll)
+        if not coll_name:
+            continue
+        for sub in _get_subcollection_list(coll):
+            sub_name = _get_subcollection_name(sub)
+            if not sub_name:
+                continue
+            for var in _get_variations_list(sub):
+                pattern = _get_variation_pattern(var)
+                if not pattern:
+                    continue
+                catalog[pattern] = {
+                    'collection': coll_name,
+                    'subcollection': sub_name,
+                    'name': (var.get('variation-name') or '').strip(),
+                }
+    return catalog
+
+
+def _scan_images(root: Path) -> Iterator[Tuple[str, str, int, int]]:
+    """Recorre root con os.scandir y produce (pattern, ruta, mtime_ns, tamaño) por imagen.
+
+    Los mapas auxiliares (`<pattern>_normal.jpg`) se ignoran.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() not in IMAGE_EXTENSIONS or stem.endswith('_normal'):
+                    continue
+                st = entry.stat()
+                yield stem, entry.path, st.st_mtime_ns, st.st_size
+
+
+# ---------------------------------- Índice ----------------------------------
+class SimilarityIndex:
+    """Features por pattern + KD-tree sobre los vectores estandarizados y ponderados."""
+
+    def __init__(self, entries: Dict[str, Dict[str, Any]]):
+        self.entries = entries
+        self.patterns: List[str] = sorted(entries)
+        self._pos = {p: i for i, p in enumerate(self.patterns)}
+        raw = [entries[p]['vec'] for p in self.patterns]
+        self.center, self.scale = _standardization(raw)
+        self.tree = KDTree([self._normalize(v) for v in raw])
+
+    def _normalize(self, vec: Sequence[float]) -> List[float]:
+        return [(x - c) / s * w for x, c, s, w in zip(vec, self.center, self.scale, FEATURE_WEIGHTS)]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self._pos
+
+    def nearest(self, pattern: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Las k variaciones más parecidas a `pattern` (excluyéndola)."""
+        pos = self._pos.get(pattern)
+        if pos is None:
+            raise KeyError(f"Pattern sin features en el índice: {pattern}")
+        hits = self.tree.query(self.tree.points[pos], k=k, exclude=pos)
+        return [(self.patterns[i], d) for d, i in hits]
+
+    @classmethod
+    def load(cls, index_path: Path) -> 'SimilarityIndex':
+        return cls(load_index_entries(index_path))
+
+
+def _standardization(vectors: List[List[float]]) -> Tuple[List[float], List[float]]:
+    dims = len(FEATURE_NAMES)
+    n = len(vectors)
+    if n == 0:
+        return [0.0] * dims, [1.0] * dims
+    center = [sum(v[d] for v in vectors) / n for d in range(dims)]
+    scale = []
+    for d in range(dims):
+        var = sum((v[d] - center[d]) ** 2 for v in vectors) / n
+        scale.append(math.sqrt(var) or 1.0)
+    return center, scale
+
+
+def load_index_entries(index_path: Path) -> Dict[str, Dict[str, Any]]:
+    if not index_path.exists():
+        return {}
+    with open(index_path, 'r', encoding='utf-8') as f:
+        payload = json.load(f)
+    if payload.get('version') != INDEX_VERSION or payload.get('features') != FEATURE_NAMES:
+        # Formato antiguo: se recalcula todo
+        return {}
+    return payload.get('entries') or {}
+
+
+def save_index_entries(index_path: Path, entries: Dict[str, Dict[str, Any]]) -> None:
+    payload = {'version': INDEX_VERSION, 'features': FEATURE_NAMES, 'entries': entries}
+    tmp = index_path.with_suffix(index_path.suffix + '.part')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+    tmp.replace(index_path)
+
+
+def build_index(json_path: Path, images_root: Path, index_path: Path, full: bool = False) -> Dict[str, int]:
+    """Actualiza el índice en disco. Retorna contadores (reutilizados, calculados, eliminados, fallidos)."""
+    catalog = load_catalog_patterns(json_path)
+    previous = {} if full else load_index_entries(index_path)
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    reused = computed = failed = 0
+    for pattern, path, mtime_ns, size in _scan_images(images_root):
+        info = catalog.get(pattern)
+        if info is None or pattern in entries:
+            continue
+        old = previous.get(pattern)
+        if old and old.get('mtime_ns') == mtime_ns and old.get('size') == size:
+            entries[pattern] = {**old, **info}
+            reused += 1
+            continue
+        try:
+            vec = extract_features(Path(path))
+        except (OSError, ValueError) as e:
+            print(f"[WARN] No se pudo analizar {path}: {e}")
+            failed += 1
+            continue
+        entries[pattern] = {**info, 'mtime_ns': mtime_ns, 'size': size, 'vec': vec}
+        computed += 1
+
+    removed = len(set(previous) - set(entries))
+    save_index_entries(index_path, entries)
+    return {'reused': reused, 'computed': computed, 'removed': removed, 'failed': failed, 'total': len(entries)}
+
+
+# ---------------------------------- CLI ----------------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Índice de telas similares (k-NN sobre color Lab + textura)")
+    parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
+    parser.add_argument('--index', dest='index_path', help=f'Ruta del índice (por defecto: junto al JSON, {INDEX_FILENAME})')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help='Construye/actualiza el índice desde las imágenes descargadas')
+    p_build.add_argument('--full', action='store_true', help='Recalcular todas las features (ignora el índice previo)')
+
+    p_query = sub.add_parser('query', help='Telas más parecidas a un variation-pattern')
+    p_query.add_argument('pattern', help='variation-pattern, ej. 804-004')
+    p_query.add_argument('-k', type=int, default=10, help='Número de vecinos (por defecto 10)')
+    args = parser.parse_args(argv)
+
+    try:
+        json_file = find_json_file(args.json_path)
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+    index_path = Path(args.index_path) if args.index_path else json_file.parent / INDEX_FILENAME
+
+    if args.command == 'build':
+        images_root = resolve_project_root(json_file) / DEST_RELATIVE
+        print(f"Usando JSON: {json_file}")
+        print(f"Imágenes: {images_root}")
+        t0 = time.perf_counter()
+        try:
+            stats = build_index(json_file, images_root, index_path, full=args.full)
+        except RuntimeError as e:
+            print(str(e))
+            return 2
+        print(f"Índice: {index_path}")
+        print(f"Reutilizadas: {stats['reused']}, Calculadas: {stats['computed']}, "
+              f"Eliminadas: {stats['removed']}, Fallidas: {stats['failed']}, Total: {stats['total']} "
+              f"({time.perf_counter() - t0:.1f}s)")
+        return 0 if stats['failed'] == 0 else 1
+
+    index = SimilarityIndex.load(index_path)
+    if args.pattern not in index:
+        print(f"'{args.pattern}' no está en el índice ({len(index)} variaciones). Ejecuta primero: build")
+        return 1
+    t0 = time.perf_counter()
+    hits = index.nearest(args.pattern, k=args.k)
+    elapsed_us = (time.perf_counter() - t0) * 1e6
+    ref = index.entries[args.pattern]
+    print(f"Similares a {args.pattern} ({ref['collection']} / {ref['subcollection']} / {ref['name']}):")
+    for rank, (pattern, dist) in enumerate(hits, start=1):
+        e = index.entries[pattern]
+        print(f"  {rank:>2}. {pattern:<12} d={dist:6.3f}  {e['collection']} / {e['subcollection']} / {e['name']}")
+    print(f"({elapsed_us:.0f} µs)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
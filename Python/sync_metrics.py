@@ -0,0 +1,247 @@
+"""Métricas estructuradas para los scripts de sincronización.
+
+- Eventos JSON lines (una línea por evento) con run_id, script, timestamp y campos libres
+- `stage(...)`: context manager que mide la duración de una etapa y la emite como evento
+- Contadores e histogramas en memoria; al cerrar se emite un evento `summary`
+- Snapshot en formato textfile de Prometheus (node_exporter --collector.textfile)
+
+Desactivado por defecto (los métodos no hacen nada). Se activa con:
+    --metrics FILE.jsonl / --prom FILE.prom en cada script, o
+    CLOTHFIG_METRICS=FILE.jsonl / CLOTHFIG_METRICS_PROM=FILE.prom (útil dentro del Editor)
+
+Uso típico:
+    metrics = sync_metrics.configure('download', args.metrics, args.prom)
+    with metrics.stage('json_load'):
+        ...
+    metrics.observe('download_seconds', dt, result='ok')
+    metrics.close()
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Anotaciones diferidas: `typing` no se carga en tiempo de ejecución (ver catalog_cache)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+METRIC_PREFIX = 'clothfig'
+
+# Buckets (segundos) para duraciones; cubren desde un stat hasta una descarga lenta
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _labels_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(pairs: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(pairs) + ([extra] if extra else [])
+    if not items:
+        return ''
+    body = ','.join('{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                    for k, v in items)
+    return '{' + body + '}'
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'min': round(self.min, 6) if self.count else None,
+            'max': round(self.max, 6) if self.count else None,
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+        }
+
+
+class Metrics:
+    """Colector de eventos/contadores/histogramas de una ejecución."""
+
+    def __init__(self, script: str, events_path: Optional[str] = None, prom_path: Optional[str] = None):
+        self.script = script
+        self.run_id = os.urandom(6).hex()
+        self.enabled = bool(events_path or prom_path)
+        self.prom_path = Path(prom_path) if prom_path else None
+        self._lock = threading.Lock()
+        self._out: Optional[TextIO] = None
+        if events_path == '-':
+            self._out = sys.stdout
+        elif events_path:
+            Path(events_path).parent.mkdir(parents=True, exist_ok=True)
+            self._out = open(events_path, 'a', encoding='utf-8')
+        self._t0 = time.perf_counter()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._closed = False
+        if self.enabled:
+            self.event('run_start', pid=os.getpid(), python=sys.version.split()[0])
+
+    # ------------------------------ API ------------------------------
+    def event(self, name: str, **fields: Any) -> None:
+        if self._out is None:
+            return
+        record = {'ts': round(time.time(), 6), 'run_id': self.run_id, 'script': self.script, 'event': name, **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._out.write(line + '\n')
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = _labels_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.observe(value)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """Mide una etapa. El dict devuelto permite añadir campos al evento final."""
+        extra: Dict[str, Any] = {}
+        listeners = list(_stage_listeners)
+        if not self.enabled and not listeners:
+            yield extra
+            return
+        for listener in listeners:
+            listener(name, 'start')
+        t0 = time.perf_counter()
+        status = 'ok'
+        try:
+            yield extra
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            duration = time.perf_counter() - t0
+            for listener in reversed(listeners):
+                listener(name, 'end')
+            if self.enabled:
+                self.observe('stage_duration_seconds', duration, stage=name)
+                self.event('stage', stage=name, duration_s=round(duration, 6), status=status, **fields, **extra)
+
+    def close(self, **fields: Any) -> None:
+        """Emite el resumen final, escribe el snapshot Prometheus y cierra el archivo de eventos."""
+        if self._closed or not self.enabled:
+            return
+        self._closed = True
+        duration = time.perf_counter() - self._t0
+        self.observe('run_duration_seconds', duration)
+        self.event('summary', duration_s=round(duration, 6), counters=self._counters_dict(),
+                   histograms=self._histograms_dict(), **fields)
+        if self.prom_path:
+            self.write_prometheus(self.prom_path)
+        if self._out is not None and self._out is not sys.stdout:
+            self._out.close()
+        self._out = None
+
+    # ------------------------------ Export ------------------------------
+    def _counters_dict(self) -> Dict[str, Any]:
+        return {name: {_format_labels(k) or 'total': v for k, v in series.items()}
+                for name, series in self.counters.items()}
+
+    def _histograms_dict(self) -> Dict[str, Any]:
+        return {name: {_format_labels(k) or 'all': h.as_dict() for k, h in series.items()}
+                for name, series in self.histograms.items()}
+
+    def prometheus_text(self) -> str:
+        base = (('script', self.script),)
+        lines: List[str] = []
+        for name, series in sorted(self.counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{metric}{_format_labels(base + key)} {value}")
+        for name, series in sorted(self.histograms.items()):
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for key, hist in sorted(series.items()):
+                labels = base + key
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f"{metric}_bucket{_format_labels(labels, ('le', repr(bound)))} {count}")
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {hist.count}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {hist.sum}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {hist.count}")
+        metric = f"{METRIC_PREFIX}_last_run_timestamp_seconds"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric}{_format_labels(base)} {time.time():.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: Path) -> None:
+        # Escritura atómica: node_exporter nunca debe leer un archivo a medias
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.part')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        tmp.replace(path)
+
+
+_current: Optional[Metrics] = None
+
+# Callbacks (etapa, 'start' | 'end') llamados por Metrics.stage aunque las métricas estén desactivadas.
+# Los usa sync_profile.py para el reporte de memoria por etapa.
+_stage_listeners: List[Callable[[str, str], None]] = []
+
+
+def add_stage_listener(listener: Callable[[str, str], None]) -> None:
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener: Callable[[str, str], None]) -> None:
+    if listener in _stage_listeners:
+        _stage_listeners.remove(listener)
+
+
+def configure(script: str, events_path: Optional[str] = None, prom_path: Optional[str] = None) -> Metrics:
+    """Crea el colector de esta ejecución (CLI > variables de entorno) y lo deja como actual."""
+    global _current
+    events_path = events_path or os.environ.get('CLOTHFIG_METRICS') or None
+    prom_path = prom_path or os.environ.get('CLOTHFIG_METRICS_PROM') or None
+    if _current is not None:
+        _current.close()
+    _current = Metrics(script, events_path, prom_path)
+    return _current
+
+
+def get_metrics() -> Metrics:
+    """Colector actual; uno desactivado si ningún script llamó a configure()."""
+    global _current
+    if _current is None:
+        _current = Metrics('unconfigured')
+    return _current
@@ -0,0 +1,210 @@
+"""Perfilado integrado (--profile) para create-folders.py, downloadTextures.py y create_materials.py.
+
+Con el perfilado activo, cada ejecución escribe en el directorio elegido:
+    <script>-<fecha>.pstats      cProfile (abrir con `python -m pstats` o snakeviz)
+    <script>-<fecha>.collapsed   stacks colapsados ("a;b;c <µs>") para flamegraph.pl / speedscope
+    <script>-<fecha>.alloc.txt   tracemalloc: top-N de asignaciones y pico de memoria por etapa
+
+Las etapas son las de sync_metrics (`metrics.stage(...)`), así que el reporte de memoria
+sigue la misma división que los eventos de métricas.
+
+Activación:
+    --profile [DIR]               en la línea de comandos (DIR por defecto: Python/.profile)
+    CLOTHFIG_PROFILE=1 | DIR      dentro del Editor de Unreal, donde no hay argumentos
+    CLOTHFIG_PROFILE_TOP=N        tamaño del top de asignaciones (por defecto 15)
+
+Los stacks colapsados se reconstruyen a partir del grafo de llamadas de cProfile
+(caller -> callee con su tiempo acumulado), repartiendo el tiempo de cada función
+proporcionalmente entre sus llamadores. Es una aproximación, no un muestreo real.
+"""
+
+import contextlib
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import sync_metrics
+
+DEFAULT_PROFILE_DIR = Path(__file__).resolve().parent / '.profile'
+DEFAULT_TOP_N = 15
+
+# Profundidad máxima de stack y tiempo mínimo (µs) para emitir una línea colapsada
+MAX_STACK_DEPTH = 64
+MIN_COLLAPSED_US = 1
+
+Func = Tuple[str, int, str]
+
+
+def resolve_profile_dir(cli_value: Optional[str]) -> Optional[Path]:
+    """CLI (--profile [DIR]) > CLOTHFIG_PROFILE. None si el perfilado no está activo."""
+    value = cli_value if cli_value is not None else os.environ.get('CLOTHFIG_PROFILE')
+    if value is None:
+        return None
+    value = value.strip()
+    if value.lower() in ('0', 'false', 'no'):
+        return None
+    if value.lower() in ('', '1', 'true', 'yes'):
+        return DEFAULT_PROFILE_DIR
+    return Path(value).expanduser()
+
+
+# ------------------------------ Stacks colapsados ------------------------------
+def _func_label(func: Func) -> str:
+    filename, line, name = func
+    if filename == '~':  # builtins: ('~', 0, "<built-in method ...>")
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: Any) -> List[str]:
+    """Convierte el grafo de llamadas de cProfile en líneas 'raíz;...;función <µs propios>'."""
+    raw: Dict[Func, tuple] = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[Func, List[Tuple[Func, float]]] = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    totals: Dict[str, float] = {}
+
+    def walk(func: Func, path: Tuple[str, ...], budget: float, seen: frozenset) -> None:
+        _cc, _nc, tt, ct, _callers = raw[func]
+        fraction = budget / ct if ct > 0 else 0.0
+        path = path + (_func_label(func),)
+        self_time = tt * fraction
+        if self_time > 0:
+            key = ';'.join(path)
+            totals[key] = totals.get(key, 0.0) + self_time
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, []):
+            if callee in seen or callee not in raw:
+                continue  # recursión: su tiempo ya cuenta en el primer nivel
+            share = edge_ct * fraction
+            if share * 1e6 >= MIN_COLLAPSED_US:
+                walk(callee, path, share, seen | {callee})
+
+    for func, (_cc, _nc, _tt, ct, callers) in raw.items():
+        if not callers:
+            walk(func, (), ct, frozenset({func}))
+
+    return [f"{stack} {int(round(t * 1e6))}" for stack, t in sorted(totals.items())
+            if int(round(t * 1e6)) >= MIN_COLLAPSED_US]
+
+
+# ---------------------------------- Sesión ----------------------------------
+class ProfileSession:
+    # cProfile/pstats/tracemalloc se importan aquí y no a nivel de módulo: sin --profile no cuestan nada
+    def __init__(self, script: str, out_dir: Path, top_n: int = DEFAULT_TOP_N):
+        import cProfile
+
+        self.script = script
+        self.out_dir = out_dir
+        self.top_n = top_n
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        self.base = out_dir / f"{script}-{stamp}-{os.getpid()}"
+        self.profiler = cProfile.Profile()
+        # Etapas abiertas: [nombre, snapshot inicial, pico propio] (anidables)
+        self._stage_snapshots: List[List[Any]] = []
+        self._report: List[str] = []
+        self._started_tracemalloc = False
+        self._start_snapshot: Any = None
+        self._run_peak = 0
+
+    # Listener de sync_metrics: snapshot al entrar/salir de cada etapa.
+    # cProfile se pausa mientras tanto para que el coste de tracemalloc no aparezca en el perfil.
+    def _on_stage(self, name: str, phase: str) -> None:
+        self.profiler.disable()
+        try:
+            self._stage_snapshot(name, phase)
+        finally:
+            self.profiler.enable()
+
+    def _fold_peak(self) -> int:
+        """Acumula el pico actual de tracemalloc en el de la ejecución y en el de cada etapa abierta."""
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        self._run_peak = max(self._run_peak, peak)
+        for entry in self._stage_snapshots:
+            entry[2] = max(entry[2], peak)
+        return current
+
+    def _stage_snapshot(self, name: str, phase: str) -> None:
+        import tracemalloc
+
+        if phase == 'start':
+            current = self._fold_peak()
+            # El pico se reinicia solo si la traza es nuestra: una traza ajena (p. ej. del Editor)
+            # conserva su pico y entonces el de cada etapa es el global desde que empezó
+            if self._started_tracemalloc:
+                tracemalloc.reset_peak()
+            self._stage_snapshots.append([name, tracemalloc.take_snapshot(), current])
+            return
+        if not self._stage_snapshots:
+            return
+        current = self._fold_peak()
+        _name, before, peak = self._stage_snapshots.pop()
+        after = tracemalloc.take_snapshot()
+        self._append_report(f"etapa '{name}'", after.compare_to(before, 'lineno'), current, peak)
+
+    def _append_report(self, title: str, diffs, current: int, peak: int) -> None:
+        self._report.append(f"=== {title} ===")
+        self._report.append(f"memoria trazada: actual {current / 2**20:.2f} MiB, pico {peak / 2**20:.2f} MiB")
+        for stat in diffs[:self.top_n]:
+            self._report.append(f"  {stat}")
+        self._report.append('')
+
+    def start(self) -> None:
+        import tracemalloc
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start_snapshot = tracemalloc.take_snapshot()
+        sync_metrics.add_stage_listener(self._on_stage)
+        self.profiler.enable()
+
+    def stop(self) -> List[Path]:
+        import pstats
+        import tracemalloc
+
+        self.profiler.disable()
+        sync_metrics.remove_stage_listener(self._on_stage)
+        end = tracemalloc.take_snapshot()
+        current = self._fold_peak()
+        self._append_report('ejecución completa', end.compare_to(self._start_snapshot, 'lineno'), current, self._run_peak)
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        pstats_path = self.base.with_suffix('.pstats')
+        collapsed_path = self.base.with_suffix('.collapsed')
+        alloc_path = self.base.with_suffix('.alloc.txt')
+        self.profiler.dump_stats(str(pstats_path))
+        stats = pstats.Stats(self.profiler)
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(collapsed_stacks(stats)) + '\n')
+        with open(alloc_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self._report))
+        return [pstats_path, collapsed_path, alloc_path]
+
+
+@contextlib.contextmanager
+def profile_session(script: str, cli_value: Optional[str] = None) -> Iterator[Optional[ProfileSession]]:
+    """Perfila el bloque si --profile / CLOTHFIG_PROFILE está activo; si no, no hace nada."""
+    out_dir = resolve_profile_dir(cli_value)
+    if out_dir is None:
+        yield None
+        return
+    try:
+        top_n = int(os.environ.get('CLOTHFIG_PROFILE_TOP') or DEFAULT_TOP_N)
+    except ValueError:
+        top_n = DEFAULT_TOP_N
+    session = ProfileSession(script, out_dir, top_n)
+    session.start()
+    try:
+        yield session
+    finally:
+        paths = session.stop()
+        print(f"[profile] Escrito: {', '.join(str(p) for p in paths)}")
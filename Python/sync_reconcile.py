@@ -0,0 +1,409 @@
+"""Reconciliador del árbol de texturas Content/Texture/MayerFabrics contra collections.json.
+
+Un único esquema de nombres para carpetas: `sanitize_folder` (mantiene mayúsculas y
+espacios; es el que usan downloadTextures.py y las rutas de create_materials.py).
+Las carpetas `slugify` que creaba create-folders.py (p. ej. `impact/fuse`) son el
+esquema antiguo y se migran al nuevo (`Impact/Fuse`).
+
+1. Snapshot del árbol con un solo recorrido os.scandir (sin un stat por textura)
+2. Comparación con el layout esperado del catálogo
+3. Acciones en bloque: mover carpetas/archivos antiguos, crear carpetas, descargar faltantes
+4. Reporte de conflictos, carpetas con .uasset y archivos que el catálogo no espera
+   (el `.dds` que compress_textures.py escribe junto a cada imagen no cuenta como ajeno)
+
+Por defecto solo reporta. Nunca borra archivos; solo elimina carpetas antiguas que
+quedaron vacías tras moverlas.
+
+Las carpetas antiguas con .uasset no se mueven desde el disco (romperían las
+referencias del proyecto): muévelas en el Content Browser del Editor para que
+Unreal deje redirectors, o usa --include-assets si sabes que nada las referencia.
+
+Uso:
+    python sync_reconcile.py [--json RUTA]           # reporte
+    python sync_reconcile.py --apply [--download]    # migrar/crear (y descargar)
+    python clothfig.py reconcile ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from pathlib import Path
+
+from sync_metrics import configure as configure_metrics, get_metrics
+
+# Como en catalog_cache: `typing` solo lo ve el verificador de tipos
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Extensiones de Unreal que no se mueven desde el disco sin --include-assets
+ASSET_SUFFIXES = ('.uasset', '.umap', '.ubulk', '.uexp')
+
+# Máximo de ejemplos por categoría en el reporte
+REPORT_LIMIT = 10
+
+
+# ---------------------------------- Snapshot ----------------------------------
+class TreeSnapshot:
+    """Carpetas y archivos bajo `root` leídos con un único recorrido os.scandir.
+
+    - dirs:  rutas absolutas de carpetas (incluida la raíz si existe)
+    - files: ruta absoluta -> (mtime_ns, tamaño)
+    - children: carpeta -> nombres de archivos que contiene directamente
+    Los temporales `.part` de descargas en curso se ignoran.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.dirs: Set[str] = set()
+        self.files: Dict[str, Tuple[int, int]] = {}
+        self.children: Dict[str, List[str]] = {}
+
+    @classmethod
+    def scan(cls, root: str) -> 'TreeSnapshot':
+        snap = cls(root)
+        snap._walk(root)
+        return snap
+
+    def _walk(self, folder: str) -> None:
+        try:
+            it = os.scandir(folder)
+        except OSError:
+            return
+        self.dirs.add(folder)
+        names = self.children.setdefault(folder, [])
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        self._walk(entry.path)
+                    elif not entry.name.endswith('.part'):
+                        st = entry.stat(follow_symlinks=False)
+                        self.files[entry.path] = (st.st_mtime_ns, st.st_size)
+                        names.append(entry.name)
+                except OSError:
+                    continue
+
+
+def _load_slugify():
+    # create-folders.py lleva guion: no es importable con `import`
+    spec = importlib.util.spec_from_file_location('create_folders', os.path.join(_SCRIPT_DIR, 'create-folders.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module.slugify
+
+
+# ---------------------------------- Plan ----------------------------------
+class ReconcilePlan:
+    """Acciones calculadas a partir del snapshot; `apply_plan` las ejecuta."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.dir_moves: List[Tuple[str, str]] = []    # carpeta antigua -> nueva (no existía o solo cambian mayúsculas)
+        self.file_moves: List[Tuple[str, str]] = []   # archivo antiguo -> archivo nuevo (carpeta nueva ya existía)
+        self.conflicts: List[Tuple[str, str]] = []    # el archivo ya existe en ambos esquemas
+        self.asset_dirs: List[Tuple[str, str]] = []   # carpetas antiguas con .uasset (mover en el Editor)
+        self.mkdirs: List[str] = []
+        self.downloads: List[Tuple[str, str]] = []    # (pattern, archivo destino)
+        self.extra: List[str] = []                    # archivos que el catálogo no espera
+        self.unknown_dirs: List[str] = []             # carpetas sin colección/subcolección en el catálogo
+        self.legacy_collections: Set[str] = set()
+
+    def is_empty(self) -> bool:
+        return not (self.dir_moves or self.file_moves or self.mkdirs or self.downloads)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'dir_moves': len(self.dir_moves),
+            'file_moves': len(self.file_moves),
+            'conflicts': len(self.conflicts),
+            'asset_dirs': len(self.asset_dirs),
+            'mkdirs': len(self.mkdirs),
+            'downloads': len(self.downloads),
+            'extra': len(self.extra),
+            'unknown_dirs': len(self.unknown_dirs),
+        }
+
+
+def build_reconcile_plan(snap: TreeSnapshot, plan_items: Iterable[Tuple[str, str, Optional[str], str]],
+                         include_assets: bool = False) -> ReconcilePlan:
+    """Compara el snapshot con el plan de descargas (colección, subcolección, pattern, destino)."""
+    from compress_textures import DDS_EXTENSION, SOURCE_EXTENSIONS
+    from downloadTextures import sanitize_folder
+
+    slugify = _load_slugify()
+    root = snap.root
+    result = ReconcilePlan(root)
+
+    expected: Dict[str, str] = {}
+    folders: Dict[Tuple[str, str], str] = {}
+    for coll, sub, pattern, dest in plan_items:
+        key = (coll, sub)
+        if key not in folders:
+            folders[key] = os.path.join(root, sanitize_folder(coll), sanitize_folder(sub))
+        if pattern:
+            expected[dest] = pattern
+
+    present: Set[str] = set(snap.files)
+    moved_from: Set[str] = set()
+    canonical_dirs = set(folders.values())
+    known_dirs = {root} | canonical_dirs | {os.path.dirname(d) for d in canonical_dirs}
+    legacy_used: Dict[str, str] = {}
+
+    # Carpetas reales por nombre en minúsculas: en volúmenes sin distinción de mayúsculas
+    # `impact/Fuse` y `Impact/Fuse` son la misma carpeta y el snapshot solo tiene la real
+    by_lower = {d.lower(): d for d in snap.dirs}
+
+    def find_dir(path: str) -> Optional[str]:
+        if path in snap.dirs:
+            return path
+        actual = by_lower.get(path.lower())
+        return actual if actual is not None and _case_alias(actual, path) else None
+
+    # Colecciones que solo difieren en mayúsculas: se renombra la carpeta de la colección misma
+    # (si solo se movieran las subcarpetas, la colección conservaría el nombre antiguo)
+    coll_renames: Dict[str, str] = {}
+    for canonical_coll in sorted({os.path.dirname(d) for d in canonical_dirs}):
+        actual = find_dir(canonical_coll)
+        if actual is not None and actual != canonical_coll:
+            coll_renames[actual] = canonical_coll
+            result.dir_moves.append((actual, canonical_coll))
+            known_dirs.add(actual)
+
+    def rebase(path: str) -> str:
+        """Ruta tras renombrar su colección (las subcarpetas se mueven después)."""
+        rel = os.path.relpath(path, root)
+        first, _sep, rest = rel.partition(os.sep)
+        renamed = coll_renames.get(os.path.join(root, first))
+        if renamed is None:
+            return path
+        return os.path.join(renamed, rest) if rest else renamed
+
+    for (coll, sub), canonical in folders.items():
+        legacy_coll = os.path.join(root, slugify(coll))
+        legacy = os.path.join(legacy_coll, slugify(sub))
+        known_dirs.update((legacy, legacy_coll))
+        legacy_actual = find_dir(legacy)
+        if legacy == canonical or legacy_actual is None:
+            continue
+        if legacy_actual in legacy_used:
+            # Dos subcolecciones con el mismo slug: no se puede decidir a cuál pertenece
+            result.conflicts.append((legacy_actual, canonical))
+            continue
+        legacy_used[legacy_actual] = canonical
+        names = snap.children.get(legacy_actual, [])
+        if not include_assets and any(n.lower().endswith(ASSET_SUFFIXES) for n in names):
+            result.asset_dirs.append((legacy_actual, canonical))
+            continue
+        src_dir = rebase(legacy_actual)
+        if src_dir == canonical:
+            continue  # solo cambiaba la colección: ya planificado arriba
+        legacy_coll_actual = os.path.dirname(legacy_actual)
+        if legacy_coll_actual not in coll_renames:
+            result.legacy_collections.add(legacy_coll_actual)
+        canonical_actual = find_dir(canonical)
+        if canonical_actual is None or canonical_actual == legacy_actual:
+            # No existe la carpeta nueva, o es la misma con otras mayúsculas
+            result.dir_moves.append((src_dir, canonical))
+            for name in names:
+                moved_from.add(os.path.join(legacy_actual, name))
+                present.add(os.path.join(canonical, name))
+            continue
+        for name in names:
+            src, dst = os.path.join(legacy_actual, name), os.path.join(canonical, name)
+            if os.path.join(canonical_actual, name) in snap.files:
+                result.conflicts.append((src, dst))
+                continue
+            result.file_moves.append((os.path.join(src_dir, name), dst))
+            moved_from.add(src)
+            present.add(dst)
+
+    # Archivos bajo una colección renombrada: cuentan con su ruta nueva
+    if coll_renames:
+        for path in snap.files:
+            new_path = rebase(path)
+            if new_path != path and path not in moved_from:
+                moved_from.add(path)
+                present.add(new_path)
+
+    moved_dirs = {dst for _src, dst in result.dir_moves}
+    result.mkdirs = sorted(d for d in canonical_dirs if find_dir(d) is None and d not in moved_dirs)
+    # normcase: en volúmenes sin distinción de mayúsculas (Windows) 804-001.JPG satisface 804-001.jpg
+    present_keys = {os.path.normcase(p) for p in present}
+    expected_keys = {os.path.normcase(p) for p in expected}
+    result.downloads = [(pattern, dest) for dest, pattern in expected.items() if os.path.normcase(dest) not in present_keys]
+    # <stem>.dds que compress_textures genera junto a una imagen esperada o presente
+    source_stems = {stem for stem, ext in map(os.path.splitext, set(expected) | present) if ext.lower() in SOURCE_EXTENSIONS}
+    derived = {p for p in snap.files if os.path.splitext(p)[1].lower() == DDS_EXTENSION
+               and os.path.splitext(p)[0] in source_stems}
+    result.extra = sorted(p for p in snap.files
+                          if os.path.normcase(p) not in expected_keys and p not in moved_from and p not in derived)
+    # Solo la carpeta más alta de cada rama desconocida
+    result.unknown_dirs = sorted(d for d in snap.dirs if d not in known_dirs and rebase(d) not in known_dirs
+                                 and (os.path.dirname(d) == root or os.path.dirname(d) in known_dirs))
+    return result
+
+
+# ---------------------------------- Aplicación ----------------------------------
+def _case_alias(actual: str, wanted: str) -> bool:
+    """True si `wanted` es la carpeta `actual` escrita con otras mayúsculas (volumen sin distinción)."""
+    if actual == wanted or actual.lower() != wanted.lower():
+        return False
+    return os.path.normcase(actual) == os.path.normcase(wanted) or os.path.isdir(wanted)
+
+
+def _rename_dir(src: str, dst: str) -> None:
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if src.lower() == dst.lower():
+        # Cambio solo de mayúsculas (en un volumen que no las distingue es la misma carpeta): vía un nombre temporal
+        tmp = src + '.migrating'
+        os.rename(src, tmp)
+        os.rename(tmp, dst)
+    else:
+        os.rename(src, dst)
+
+
+def apply_plan(plan: ReconcilePlan, download: bool = False) -> Dict[str, int]:
+    """Ejecuta movimientos y creación de carpetas (y descargas si `download`). Devuelve conteos."""
+    metrics = get_metrics()
+    done = {'dir_moves': 0, 'file_moves': 0, 'mkdirs': 0, 'downloaded': 0, 'failed': 0}
+    errors: List[str] = []
+
+    with metrics.stage('migrate') as info:
+        # Carpetas de colección antes que sus subcarpetas: se ordenan por profundidad
+        for src, dst in sorted(plan.dir_moves, key=lambda m: m[1].count(os.sep)):
+            try:
+                _rename_dir(src, dst)
+                done['dir_moves'] += 1
+            except OSError as e:
+                errors.append(f"{src} -> {dst}: {e}")
+        made: Set[str] = set()
+        for src, dst in plan.file_moves:
+            try:
+                folder = os.path.dirname(dst)
+                if folder not in made:
+                    os.makedirs(folder, exist_ok=True)
+                    made.add(folder)
+                os.rename(src, dst)
+                done['file_moves'] += 1
+            except OSError as e:
+                errors.append(f"{src} -> {dst}: {e}")
+        # Carpetas antiguas que quedaron vacías (rmdir falla si no lo están: no se pierde nada)
+        leftovers = sorted({os.path.dirname(src) for src, _dst in plan.file_moves}) + sorted(plan.legacy_collections)
+        for folder in leftovers:
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+        info.update(dir_moves=done['dir_moves'], file_moves=done['file_moves'])
+
+    with metrics.stage('folder_creation') as info:
+        for folder in plan.mkdirs:
+            try:
+                os.makedirs(folder, exist_ok=True)
+                done['mkdirs'] += 1
+            except OSError as e:
+                errors.append(f"{folder}: {e}")
+        info.update(created=done['mkdirs'])
+
+    if download and plan.downloads:
+        from downloadTextures import build_download_url, download_with_retries
+
+        with metrics.stage('downloads') as info:
+            for pattern, dest in plan.downloads:
+                ok, msg = download_with_retries(build_download_url(pattern), Path(dest))
+                if ok:
+                    done['downloaded'] += 1
+                else:
+                    done['failed'] += 1
+                    errors.append(f"{pattern}: {msg}")
+            info.update(downloaded=done['downloaded'], failed=done['failed'])
+
+    for e in errors[:REPORT_LIMIT]:
+        print(" -", e)
+    if len(errors) > REPORT_LIMIT:
+        print(f" ... y {len(errors) - REPORT_LIMIT} errores más")
+    return done
+
+
+def print_report(plan: ReconcilePlan) -> None:
+    def rel(p: str) -> str:
+        return os.path.relpath(p, plan.root)
+
+    def section(title: str, rows: List[str]) -> None:
+        if not rows:
+            return
+        print(f"{title} ({len(rows)}):")
+        for row in rows[:REPORT_LIMIT]:
+            print(f"  {row}")
+        if len(rows) > REPORT_LIMIT:
+            print(f"  ... y {len(rows) - REPORT_LIMIT} más")
+
+    section("Carpetas antiguas a mover", [f"{rel(s)} -> {rel(d)}" for s, d in plan.dir_moves])
+    section("Archivos antiguos a mover", [f"{rel(s)} -> {rel(d)}" for s, d in plan.file_moves])
+    section("Conflictos (no se tocan)", [f"{rel(s)} <-> {rel(d)}" for s, d in plan.conflicts])
+    section("Carpetas antiguas con .uasset (moverlas en el Content Browser)",
+            [f"{rel(s)} -> {rel(d)}" for s, d in plan.asset_dirs])
+    section("Carpetas sin correspondencia en el catálogo", [rel(d) for d in plan.unknown_dirs])
+    section("Carpetas a crear", [rel(d) for d in plan.mkdirs])
+    section("Texturas a descargar", [f"{p} -> {rel(d)}" for p, d in plan.downloads])
+    section("Archivos no esperados por el catálogo (se conservan)", [rel(p) for p in plan.extra])
+
+
+# ---------------------------------- CLI ----------------------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcilia Content/Texture/MayerFabrics con collections.json")
+    parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
+    parser.add_argument('--apply', action='store_true', help='Ejecutar movimientos y creación de carpetas (por defecto solo reporta)')
+    parser.add_argument('--download', action='store_true', help='Con --apply, descargar también las texturas faltantes')
+    parser.add_argument('--include-assets', action='store_true',
+                        help='Mover también carpetas antiguas con .uasset desde el disco (sin redirectors)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignorar la caché del catálogo (Python/.cache)')
+    parser.add_argument('--metrics', help='Eventos JSON lines a este archivo (o CLOTHFIG_METRICS)')
+    parser.add_argument('--prom', help='Snapshot Prometheus textfile al terminar (o CLOTHFIG_METRICS_PROM)')
+    args = parser.parse_args(argv)
+
+    from downloadTextures import DEST_RELATIVE, find_json_file, load_download_plan, resolve_project_root
+
+    try:
+        json_file = find_json_file(args.json_path)
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+    dest_root = (resolve_project_root(json_file) / DEST_RELATIVE).resolve()
+    use_cache = False if args.no_cache else None
+
+    metrics = configure_metrics('reconcile', args.metrics, args.prom)
+    try:
+        t0 = time.perf_counter()
+        with metrics.stage('scan') as info:
+            snap = TreeSnapshot.scan(str(dest_root))
+            info.update(dirs=len(snap.dirs), files=len(snap.files))
+        with metrics.stage('reconcile_plan') as info:
+            plan = build_reconcile_plan(snap, load_download_plan(json_file, dest_root, use_cache), args.include_assets)
+            info.update(plan.summary())
+        print(f"JSON   : {json_file}")
+        print(f"Árbol  : {dest_root} ({len(snap.dirs)} carpetas, {len(snap.files)} archivos, "
+              f"{(time.perf_counter() - t0) * 1000:.0f} ms)")
+        print_report(plan)
+
+        if not args.apply:
+            if not plan.is_empty():
+                print("Solo reporte. Usa --apply para ejecutar (y --download para descargar).")
+            return 0
+        done = apply_plan(plan, download=args.download)
+        print(f"Carpetas movidas: {done['dir_moves']}, archivos movidos: {done['file_moves']}, "
+              f"carpetas creadas: {done['mkdirs']}, descargadas: {done['downloaded']}, fallidas: {done['failed']}")
+        return 0 if done['failed'] == 0 else 1
+    finally:
+        metrics.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
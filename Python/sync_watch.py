@@ -0,0 +1,553 @@
+"""Modo watch: mantiene carpetas, texturas y Material Instances al día mientras corre.
+
+Vigila collections.json y el árbol Content/Texture/MayerFabrics:
+- Linux: inotify (vía ctypes, sin dependencias); el resto: sondeo con TreeSnapshot (sync_reconcile.py)
+  Si el árbol aún no existe se vigila su carpeta existente más cercana y se engancha al crearse
+- Ráfagas de eventos (guardado del editor, copia de carpetas) se agrupan con un debounce
+- El catálogo (plan de descargas + specs de MI) queda en memoria entre eventos; un cambio
+  del JSON se compara contra la versión anterior y solo se aplica la diferencia:
+    * carpetas de subcolecciones nuevas
+    * descargas de patterns nuevos (o de texturas esperadas que se borraron)
+    * Material Instances nuevos: se listan; con --create-mis (solo dentro del Editor) se crean
+- Nunca borra nada: las variaciones eliminadas del JSON solo se reportan
+- Dentro del Editor no hay bucle bloqueante: el watch avanza en cada tick de Slate
+  (register_slate_post_tick_callback) y el Editor sigue respondiendo
+
+Uso:
+    python sync_watch.py [--json RUTA] [--poll] [--interval 2] [--debounce 0.5] [--initial-sync]
+    python clothfig.py watch ...
+    Editor:  py sync_watch.py [--create-mis] ...   /   py sync_watch.py --stop
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from catalog_cache import file_sha256
+from sync_metrics import configure as configure_metrics, get_metrics
+from sync_reconcile import TreeSnapshot
+
+# ---------------------------------- Config ----------------------------------
+DEFAULT_DEBOUNCE_S = 0.5
+# Una ráfaga continua no retrasa el trabajo más de esto
+DEFAULT_MAX_DELAY_S = 5.0
+DEFAULT_POLL_INTERVAL_S = 2.0
+
+# Marca en el conjunto de cambios: el watcher perdió eventos y hay que reconciliar todo
+RESCAN = '<rescan>'
+
+
+# ---------------------------------- Watchers ----------------------------------
+class PollingWatcher:
+    """Compara snapshots (stat del JSON + recorrido scandir del árbol) cada `interval` segundos."""
+
+    name = 'polling'
+
+    def __init__(self, json_path: str, tree_root: str, interval: float = DEFAULT_POLL_INTERVAL_S):
+        self.json_path = json_path
+        self.tree_root = tree_root
+        self.interval = interval
+        self._last = self._snapshot()
+        self._next = time.monotonic() + interval
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snap = TreeSnapshot.scan(self.tree_root).files
+        try:
+            st = os.stat(self.json_path)
+            snap[self.json_path] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        return snap
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Rutas cambiadas desde la llamada anterior; vacío si vence `timeout` sin cambios."""
+        delay = self._next - time.monotonic()
+        if timeout is not None and delay > timeout:
+            time.sleep(max(timeout, 0.0))
+            return set()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = time.monotonic() + self.interval
+        snap = self._snapshot()
+        old, self._last = self._last, snap
+        changed = {p for p, sig in snap.items() if old.get(p) != sig}
+        changed.update(p for p in old if p not in snap)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """inotify vía ctypes: el directorio del JSON + cada carpeta del árbol de texturas."""
+
+    name = 'inotify'
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_MASK_ADD = 0x20000000
+    IN_ISDIR = 0x40000000
+
+    TREE_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    # Carpeta existente más cercana al árbol mientras este no exista: solo interesa que aparezca
+    ANCESTOR_MASK = IN_CREATE | IN_MOVED_TO | IN_MASK_ADD
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, json_path: str, tree_root: str):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        self.fd = fd
+        self.json_path = json_path
+        self.tree_root = tree_root
+        self._dirs: Dict[int, str] = {}
+        # Watches que solo esperan a que aparezca tree_root (no pertenecen al árbol ni al JSON)
+        self._ancestor_wds: Set[int] = set()
+        self._pending = b''
+        self._add_watch(os.path.dirname(json_path), self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_MODIFY)
+        self._attach_root()
+
+    def _add_watch(self, path: str, mask: int, ancestor: bool = False) -> None:
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (2, 20):  # ENOENT / ENOTDIR: se borró antes de vigilarla
+                return
+            raise OSError(err, f"inotify_add_watch({path})")
+        if ancestor and wd not in self._dirs:
+            self._ancestor_wds.add(wd)
+        elif not ancestor:
+            self._ancestor_wds.discard(wd)
+        self._dirs[wd] = path
+
+    def _attach_root(self) -> List[str]:
+        """Vigila tree_root si existe; si no, su carpeta existente más cercana hasta que aparezca."""
+        watched = None
+        while not os.path.isdir(self.tree_root):
+            parent = os.path.dirname(self.tree_root)
+            while not os.path.isdir(parent) and os.path.dirname(parent) != parent:
+                parent = os.path.dirname(parent)
+            if parent == watched:
+                return []
+            # Tras añadir el watch se vuelve a comprobar: una carpeta creada entre medias no se pierde
+            self._add_watch(parent, self.ANCESTOR_MASK, ancestor=True)
+            watched = parent
+        return self._add_tree(self.tree_root)
+
+    def _on_root_path(self, path: str) -> bool:
+        return path == self.tree_root or self.tree_root.startswith(path + os.sep)
+
+    def _add_tree(self, root: str) -> List[str]:
+        """Vigila `root` y sus subcarpetas; devuelve los archivos que ya contenía (p. ej. carpeta movida)."""
+        if not os.path.isdir(root):
+            return []
+        self._add_watch(root, self.TREE_MASK)
+        files: List[str] = []
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        files.extend(self._add_tree(entry.path))
+                    else:
+                        files.append(entry.path)
+        except OSError:
+            pass
+        return files
+
+    def _read(self) -> Set[str]:
+        changed: Set[str] = set()
+        while True:
+            try:
+                chunk = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            buf = self._pending + chunk
+            offset = 0
+            while offset + self._EVENT.size <= len(buf):
+                wd, mask, _cookie, length = self._EVENT.unpack_from(buf, offset)
+                end = offset + self._EVENT.size + length
+                if end > len(buf):
+                    break
+                name = buf[offset + self._EVENT.size:end].rstrip(b'\0')
+                offset = end
+                if mask & self.IN_Q_OVERFLOW:
+                    changed.add(RESCAN)
+                    continue
+                base = self._dirs.get(wd)
+                if mask & self.IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    self._ancestor_wds.discard(wd)
+                    if base == self.tree_root:
+                        # Se borró o movió la raíz: volver a esperar a que aparezca
+                        changed.update(self._attach_root())
+                        changed.add(RESCAN)
+                    continue
+                if base is None:
+                    continue
+                path = os.path.join(base, os.fsdecode(name)) if name else base
+                if path.endswith('.part'):
+                    continue
+                if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO) and self._on_root_path(path):
+                    changed.update(self._attach_root())
+                    changed.add(RESCAN)
+                    continue
+                if wd in self._ancestor_wds:
+                    continue
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO) and base != os.path.dirname(self.json_path):
+                        changed.update(self._add_tree(path))
+                    elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                        changed.add(RESCAN)  # no sabemos qué archivos contenía
+                    continue
+                changed.add(path)
+            self._pending = buf[offset:]
+        # Del directorio del JSON solo interesa el JSON
+        json_dir = os.path.dirname(self.json_path)
+        if json_dir != self.tree_root and not self.tree_root.startswith(json_dir + os.sep):
+            changed = {p for p in changed if p == RESCAN or p == self.json_path or not p.startswith(json_dir + os.sep)}
+        return changed
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        return self._read()
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(json_path: str, tree_root: str, poll: bool = False, interval: float = DEFAULT_POLL_INTERVAL_S):
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(json_path, tree_root)
+        except (OSError, AttributeError) as e:
+            print(f"[watch] inotify no disponible ({e}); se usa sondeo cada {interval}s")
+    return PollingWatcher(json_path, tree_root, interval)
+
+
+# ---------------------------------- Estado ----------------------------------
+class CatalogWatch:
+    """Catálogo en memoria (plan de descargas + specs de MI) y aplicación incremental de cambios."""
+
+    def __init__(self, json_path: Path, dest_root: Path, download: bool = True, create_mis: bool = False,
+                 specs_jsonl: Optional[str] = None):
+        self.json_path = json_path
+        self.dest_root = dest_root
+        self.download = download
+        self.create_mis = create_mis
+        self.specs_jsonl = specs_jsonl
+        self.catalog_hash = ''
+        # archivo destino -> (colección, subcolección, pattern)
+        self.expected: Dict[str, Tuple[str, str, str]] = {}
+        # object_path -> spec
+        self.specs: Dict[str, Dict[str, Any]] = {}
+        # normcase(archivo destino) -> archivo destino
+        self._expected_keys: Dict[str, str] = {}
+        # Archivos presentes pasados por os.path.normcase (como downloadTextures.existing_files)
+        self.present: Set[str] = set()
+
+    # ------------------------------ Carga ------------------------------
+    def load(self) -> Tuple[List[str], List[Dict[str, Any]], int]:
+        """(Re)carga el catálogo si cambió. Devuelve (destinos nuevos, specs nuevas, variaciones quitadas)."""
+        import create_materials
+        from downloadTextures import existing_files, load_download_plan
+
+        digest = file_sha256(self.json_path)
+        if digest == self.catalog_hash:
+            return [], [], 0
+        plan = load_download_plan(self.json_path, self.dest_root)
+        roots = create_materials.resolve_roots(self.json_path)
+        specs = create_materials.load_material_specs(self.json_path, roots)
+
+        expected = {dest: (coll, sub, pattern) for coll, sub, pattern, dest in plan if pattern}
+        spec_map = {s['object_path']: s for s in specs}
+        first = not self.catalog_hash
+        added_dests = [d for d in expected if d not in self.expected]
+        added_specs = [s for p, s in spec_map.items() if p not in self.specs]
+        removed = sum(1 for d in self.expected if d not in expected)
+
+        self.catalog_hash = digest
+        self.expected = expected
+        self._expected_keys = {os.path.normcase(d): d for d in expected}
+        self.specs = spec_map
+        if first:
+            self.present = existing_files(self.dest_root)
+        return added_dests, added_specs, removed
+
+    def missing(self, dests: Optional[Iterable[str]] = None) -> List[str]:
+        return [d for d in (self.expected if dests is None else dests) if os.path.normcase(d) not in self.present]
+
+    # ------------------------------ Eventos ------------------------------
+    def handle(self, changed: Set[str]) -> None:
+        metrics = get_metrics()
+        with metrics.stage('watch_apply', events=len(changed)) as info:
+            dests: List[str] = []
+            new_specs: List[Dict[str, Any]] = []
+            if RESCAN in changed:
+                from downloadTextures import existing_files
+
+                self.present = existing_files(self.dest_root)
+            if RESCAN in changed or str(self.json_path) in changed:
+                try:
+                    dests, new_specs, removed = self.load()
+                except (OSError, ValueError) as e:
+                    # JSON a medio guardar o inválido: se conserva el catálogo anterior
+                    print(f"[watch] No se pudo recargar {self.json_path.name}: {e}")
+                    return
+                if dests or new_specs or removed:
+                    print(f"[watch] Catálogo: +{len(dests)} texturas, +{len(new_specs)} MIs, {removed} variaciones quitadas (no se borra nada)")
+
+            for path in changed:
+                if path == RESCAN or path == str(self.json_path):
+                    continue
+                key = os.path.normcase(path)
+                if os.path.exists(path):
+                    self.present.add(key)
+                else:
+                    self.present.discard(key)
+                    if key in self._expected_keys:
+                        dests.append(self._expected_keys[key])  # textura esperada borrada: se vuelve a descargar
+            if RESCAN in changed:
+                dests = self.missing()
+
+            info.update(folders=self._ensure_folders(dests), downloads=self._download(self.missing(dict.fromkeys(dests))),
+                        mis=self._apply_specs(new_specs))
+
+    def _ensure_folders(self, dests: Iterable[str]) -> int:
+        created = 0
+        for folder in {os.path.dirname(d) for d in dests}:
+            if not os.path.isdir(folder):
+                os.makedirs(folder, exist_ok=True)
+                created += 1
+        if created:
+            print(f"[watch] Carpetas creadas: {created}")
+        return created
+
+    def _download(self, dests: List[str]) -> int:
+        if not dests or not self.download:
+            if dests:
+                print(f"[watch] {len(dests)} texturas por descargar (descargas desactivadas)")
+            return 0
+        from downloadTextures import build_download_url, download_with_retries
+
+        ok_count = 0
+        for dest in dests:
+            _coll, _sub, pattern = self.expected[dest]
+            ok, msg = download_with_retries(build_download_url(pattern), Path(dest))
+            if ok:
+                ok_count += 1
+                self.present.add(os.path.normcase(dest))
+            else:
+                print(f"[watch] {pattern}: {msg}")
+        print(f"[watch] Descargadas {ok_count}/{len(dests)}")
+        return ok_count
+
+    def _apply_specs(self, specs: List[Dict[str, Any]]) -> int:
+        if not specs:
+            return 0
+        import create_materials
+
+        with contextlib.ExitStack() as stack:
+            stream: Iterable[Dict[str, Any]] = specs
+            if self.specs_jsonl:
+                out = stack.enter_context(open(self.specs_jsonl, 'a', encoding='utf-8'))
+                stream = create_materials.write_specs_jsonl(stream, out)
+            if self.create_mis:
+                create_materials.create_material_instances(stream)
+            else:
+                for spec in stream:
+                    print(f"[watch] MI nuevo: {spec['object_path']}")
+        return len(specs)
+
+
+def _in_unreal() -> bool:
+    try:
+        import unreal  # type: ignore  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+# ---------------------------------- Bucle ----------------------------------
+def run(state: CatalogWatch, watcher, debounce: float = DEFAULT_DEBOUNCE_S, max_delay: float = DEFAULT_MAX_DELAY_S,
+        max_batches: Optional[int] = None) -> None:
+    """Espera cambios, agrupa la ráfaga (debounce) y aplica el lote. Ctrl+C para salir."""
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        changed = watcher.wait(None)
+        if not changed:
+            continue
+        first = time.monotonic()
+        while time.monotonic() - first < max_delay:
+            more = watcher.wait(debounce)
+            if not more:
+                break
+            changed |= more
+        t0 = time.perf_counter()
+        state.handle(changed)
+        batches += 1
+        print(f"[watch] Lote de {len(changed)} eventos aplicado en {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+class EditorWatch:
+    """`run` sin bloquear para el Editor: cada tick de Slate consulta el watcher (timeout 0),
+    acumula la ráfaga y la aplica en el hilo del juego cuando vence el debounce."""
+
+    def __init__(self, state: CatalogWatch, watcher, debounce: float = DEFAULT_DEBOUNCE_S,
+                 max_delay: float = DEFAULT_MAX_DELAY_S):
+        self.state = state
+        self.watcher = watcher
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._changed: Set[str] = set()
+        self._first = 0.0
+        self._last = 0.0
+        self._handle = None
+
+    def start(self) -> None:
+        import unreal  # type: ignore
+
+        self._handle = unreal.register_slate_post_tick_callback(self.tick)
+
+    def tick(self, _delta_seconds: float = 0.0) -> None:
+        try:
+            more = self.watcher.wait(0)
+        except OSError as e:
+            print(f"[watch] Error del watcher, se detiene: {e}")
+            self.stop()
+            return
+        now = time.monotonic()
+        if more:
+            if not self._changed:
+                self._first = now
+            self._changed |= more
+            self._last = now
+        if self._changed and (now - self._last >= self.debounce or now - self._first >= self.max_delay):
+            changed, self._changed = self._changed, set()
+            t0 = time.perf_counter()
+            self.state.handle(changed)
+            print(f"[watch] Lote de {len(changed)} eventos aplicado en {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    def stop(self) -> None:
+        if self._handle is not None:
+            import unreal  # type: ignore
+
+            unreal.unregister_slate_post_tick_callback(self._handle)
+            self._handle = None
+        self.watcher.close()
+        get_metrics().close()
+
+
+# Watch activo dentro del Editor (uno por proceso; `py sync_watch.py --stop` lo detiene)
+_editor_watch: Optional[EditorWatch] = None
+
+
+def stop_editor_watch() -> bool:
+    global _editor_watch
+    if _editor_watch is None:
+        return False
+    _editor_watch.stop()
+    _editor_watch = None
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Vigila collections.json y las texturas; aplica solo los cambios")
+    parser.add_argument('--json', dest='json_path', help='Ruta a collections.json (opcional)')
+    parser.add_argument('--poll', action='store_true', help='Forzar sondeo en lugar de inotify')
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL_S, help='Segundos entre sondeos (por defecto 2)')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE_S, help='Silencio (s) que cierra una ráfaga (por defecto 0.5)')
+    parser.add_argument('--initial-sync', action='store_true', help='Al arrancar, descargar todas las texturas que falten')
+    parser.add_argument('--no-download', action='store_true', help='Solo reportar texturas faltantes')
+    parser.add_argument('--specs-jsonl', metavar='ARCHIVO', help='Añadir las specs de MIs nuevos a ARCHIVO (JSON lines)')
+    parser.add_argument('--metrics', help='Eventos JSON lines a este archivo (o CLOTHFIG_METRICS)')
+    parser.add_argument('--prom', help='Snapshot Prometheus textfile al terminar (o CLOTHFIG_METRICS_PROM)')
+    parser.add_argument('--create-mis', action='store_true',
+                        help='Crear los Material Instances nuevos (solo dentro del Editor; por defecto solo se listan)')
+    parser.add_argument('--stop', action='store_true', help='Dentro del Editor: detener el watch en curso')
+    args = parser.parse_args(argv)
+
+    global _editor_watch
+    in_editor = _in_unreal()
+    if args.stop:
+        print("[watch] Detenido" if stop_editor_watch() else "[watch] No hay ningún watch en curso")
+        return 0
+
+    from downloadTextures import DEST_RELATIVE, find_json_file, resolve_project_root
+
+    try:
+        json_file = find_json_file(args.json_path).resolve()
+    except FileNotFoundError as e:
+        print(str(e))
+        return 2
+    dest_root = (resolve_project_root(json_file) / DEST_RELATIVE).resolve()
+
+    if args.create_mis and not in_editor:
+        print("[watch] --create-mis solo tiene efecto dentro del Editor; los MIs nuevos se listan")
+    if in_editor:
+        stop_editor_watch()  # volver a ejecutar el script reemplaza el watch anterior
+
+    metrics = configure_metrics('watch', args.metrics, args.prom)
+    state = CatalogWatch(json_file, dest_root, download=not args.no_download,
+                         create_mis=args.create_mis and in_editor, specs_jsonl=args.specs_jsonl)
+    watcher = None
+    try:
+        t0 = time.perf_counter()
+        state.load()
+        print(f"[watch] Catálogo: {len(state.expected)} texturas, {len(state.specs)} MIs "
+              f"({(time.perf_counter() - t0) * 1000:.0f} ms); faltan {len(state.missing())} texturas")
+        if args.initial_sync:
+            dests = state.missing()
+            state._ensure_folders(dests)
+            state._download(dests)
+
+        watcher = make_watcher(str(json_file), str(dest_root), poll=args.poll, interval=args.interval)
+        if in_editor:
+            # Sin bucle bloqueante: el Editor sigue respondiendo; watcher y métricas se cierran con --stop
+            _editor_watch = EditorWatch(state, watcher, debounce=args.debounce)
+            _editor_watch.start()
+            watcher = None
+            print(f"[watch] Vigilando {json_file} y {dest_root} ({_editor_watch.watcher.name}) en cada tick del Editor. "
+                  f"Detener: py sync_watch.py --stop")
+            return 0
+        print(f"[watch] Vigilando {json_file} y {dest_root} ({watcher.name}). Ctrl+C para salir.")
+        run(state, watcher, debounce=args.debounce)
+    except KeyboardInterrupt:
+        print("\n[watch] Detenido")
+    except json.JSONDecodeError as e:
+        print(f"[watch] JSON inválido: {e}")
+        return 2
+    finally:
+        if watcher is not None:
+            watcher.close()
+        if _editor_watch is None:
+            metrics.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""Configuración común de pytest: los scripts de Python/ se importan como módulos sueltos."""
+
+import os
+import sys
+
+import pytest
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(tmp_path, monkeypatch):
+    """Ninguna prueba lee ni escribe Python/.cache del repositorio."""
+    import catalog_cache
+
+    monkeypatch.setattr(catalog_cache, 'CACHE_DIR', tmp_path / '.cache' / 'catalog')
+    monkeypatch.setattr(catalog_cache, 'JSON_LOCATION_FILE', tmp_path / '.cache' / 'json_location.txt')
+    monkeypatch.delenv('COLLECTIONS_JSON', raising=False)
+    monkeypatch.delenv('CLOTHFIG_NO_CACHE', raising=False)
+    catalog_cache._key_memo.clear()
@@ -0,0 +1,75 @@
+"""Catálogos sintéticos, servidor de imágenes y comparación con el baseline de bench_sync."""
+
+import urllib.error
+import urllib.request
+
+import pytest
+
+import bench_sync
+
+TEMPLATE = [{'collection-name': 'Fuse', 'subcollection': [
+    {'subcollection-name': 'Berry', 'variations': [
+        {'variation-name': 'Ruby', 'variation-pattern': '804-001'},
+        {'variation-name': 'Sand', 'variation-pattern': '804-002'},
+    ]},
+]}]
+
+
+def test_synthetic_catalog_has_unique_names_and_patterns():
+    catalog = bench_sync.make_synthetic_catalog(TEMPLATE, 3)
+    assert [c['collection-name'] for c in catalog] == ['Fuse', 'Fuse 2', 'Fuse 3']
+    patterns = [v['variation-pattern'] for c in catalog for s in c['subcollection'] for v in s['variations']]
+    assert patterns == ['804-001', '804-002', '804-001-x1', '804-002-x1', '804-001-x2', '804-002-x2']
+    # La plantilla no se modifica
+    assert TEMPLATE[0]['collection-name'] == 'Fuse'
+
+
+def test_old_schema():
+    (coll,) = bench_sync.make_synthetic_catalog(TEMPLATE, 1, schema='old')
+    assert coll == {'collection': 'Fuse', 'subcollection': [{'name': 'Berry', 'variation': ['Ruby', 'Sand']}]}
+
+
+def test_fake_image_server():
+    with bench_sync.FakeImageServer(size_kb=2) as server:
+        with urllib.request.urlopen(f"{server.base_url}/item/804-001/image") as resp:
+            body = resp.read()
+        assert len(body) == 2048 and body.startswith(b'\xff\xd8')
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(f"{server.base_url}/other")
+        assert excinfo.value.code == 404
+    with bench_sync.FakeImageServer(error_rate=1.0) as server:
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            urllib.request.urlopen(f"{server.base_url}/item/804-001/image")
+        assert excinfo.value.code == 503
+
+
+def test_percentile():
+    values = [float(i) for i in range(101)]
+    assert bench_sync.percentile(values, 0.5) == 50.0
+    assert bench_sync.percentile(values, 0.99) == 99.0
+    assert bench_sync.percentile(values, 1.5) == 100.0
+    assert bench_sync.percentile([], 0.5) == 0.0
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {'specs-1x': {'throughput': 1000.0, 'p50_ms': 1.0, 'p99_ms': 2.0, 'peak_rss_mb': 50.0}}
+    results = {
+        'specs-1x': {'throughput': 850.0, 'p50_ms': 1.05, 'p99_ms': 3.0, 'peak_rss_mb': 40.0},
+        'specs-10x': {'throughput': 1.0, 'p50_ms': 9.0, 'p99_ms': 9.0, 'peak_rss_mb': 9.0},
+    }
+    regressions = bench_sync.compare(results, baseline, threshold=0.10)
+    assert [r.split(':')[0] for r in regressions] == ['specs-1x throughput', 'specs-1x p99_ms']
+    assert results['specs-1x']['delta'] == {'throughput': -0.15, 'p50_ms': 0.05, 'p99_ms': 0.5, 'peak_rss_mb': -0.2}
+    assert 'delta' not in results['specs-10x']
+
+
+def test_old_schema_has_no_download_case():
+    cases = [case for case, *_rest in bench_sync.plan_cases(list(bench_sync.STAGES), ['new', 'old'], [1, 10], [1])]
+    assert cases == ['specs/new/1x', 'specs/new/10x', 'folders/new/1x', 'folders/new/10x', 'download/new/1x',
+                     'specs/old/1x', 'specs/old/10x', 'folders/old/1x', 'folders/old/10x']
+
+
+def test_old_schema_folders_are_the_real_layout():
+    catalog = bench_sync.make_synthetic_catalog(TEMPLATE, 2, schema='old')
+    plan = bench_sync._load_create_folders().build_folder_plan(catalog)
+    assert [(col_folder, [f for _n, f in subs]) for _c, col_folder, subs in plan] == [('Fuse', ['Berry']), ('Fuse 2', ['Berry'])]
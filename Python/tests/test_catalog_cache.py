@@ -0,0 +1,92 @@
+"""Claves e invalidación de catalog_cache."""
+
+import json
+import os
+
+import catalog_cache
+import create_materials
+from downloadTextures import load_download_plan
+
+CATALOG = [{
+    'collection-name': 'Fuse',
+    'subcollection': [{'subcollection-name': 'Berry', 'variations': [{'variation-pattern': '804-001'}]}],
+}]
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding='utf-8')
+    # Forzar otro mtime aunque el sistema de archivos tenga poca resolución
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_cached_reuses_until_json_changes(tmp_path):
+    json_file = tmp_path / 'collections.json'
+    _write(json_file, CATALOG)
+    calls = []
+
+    def builder():
+        calls.append(1)
+        return len(calls)
+
+    assert catalog_cache.cached(json_file, 'thing', builder) == 1
+    assert catalog_cache.cached(json_file, 'thing', builder) == 1
+
+    _write(json_file, CATALOG + [{'collection-name': 'Alta'}])
+    assert catalog_cache.cached(json_file, 'thing', builder) == 2
+    # La entrada de la clave anterior se elimina
+    assert len(list(catalog_cache.CACHE_DIR.glob('thing-*.pickle'))) == 1
+
+
+def test_cached_disabled_always_builds(tmp_path, monkeypatch):
+    json_file = tmp_path / 'collections.json'
+    _write(json_file, CATALOG)
+    monkeypatch.setenv('CLOTHFIG_NO_CACHE', '1')
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'a') == 'a'
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'b') == 'b'
+    assert not catalog_cache.CACHE_DIR.exists()
+
+
+def test_inputs_are_part_of_the_key(tmp_path):
+    json_file = tmp_path / 'collections.json'
+    _write(json_file, CATALOG)
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'a', inputs=('x',)) == 'a'
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'b', inputs=('y',)) == 'b'
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'c', inputs=('y',)) == 'b'
+
+
+def test_download_plan_follows_dest_root(tmp_path):
+    json_file = tmp_path / 'collections.json'
+    _write(json_file, CATALOG)
+    first = load_download_plan(json_file, tmp_path / 'a')
+    second = load_download_plan(json_file, tmp_path / 'b')
+    assert first[0][3].startswith(str((tmp_path / 'a').resolve()))
+    assert second[0][3].startswith(str((tmp_path / 'b').resolve()))
+
+
+def test_other_inputs_are_not_pruned(tmp_path):
+    json_file = tmp_path / 'collections.json'
+    _write(json_file, CATALOG)
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'a', inputs=('x',)) == 'a'
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'b', inputs=('y',)) == 'b'
+    # Alternar entre dos destinos no recalcula: cada uno conserva su entrada
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'c', inputs=('x',)) == 'a'
+
+    _write(json_file, CATALOG + [{'collection-name': 'Alta'}])
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'd', inputs=('x',)) == 'd'
+    # Solo se sustituye la versión anterior del mismo destino
+    assert len(list(catalog_cache.CACHE_DIR.glob('thing-*.pickle'))) == 2
+    assert catalog_cache.cached(json_file, 'thing', lambda: 'e', inputs=('y',)) == 'e'
+    assert len(list(catalog_cache.CACHE_DIR.glob('thing-*.pickle'))) == 2
+
+
+def test_material_specs_follow_roots(tmp_path):
+    json_file = tmp_path / 'collections.json'
+    _write(json_file, CATALOG)
+    roots = create_materials.resolve_roots(json_file)
+    first = create_materials.load_material_specs(json_file, roots)
+    other = dict(roots, base_fs_root_vendor=tmp_path / 'other', base_asset_root_vendor='/Game/Other')
+    second = create_materials.load_material_specs(json_file, other)
+    assert first[0]['object_path'].startswith(roots['base_asset_root_vendor'] + '/')
+    assert second[0]['object_path'].startswith('/Game/Other/')
+    assert second[0]['filesystem_path'].startswith(str(tmp_path / 'other'))
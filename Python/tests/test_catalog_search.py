@@ -0,0 +1,81 @@
+"""Tokenización, búsqueda por prefijo e invalidación del índice de catalog_search."""
+
+import json
+
+import catalog_search
+
+CATALOG = [
+    {'collection-name': 'Impact', 'subcollection': [
+        {'subcollection-name': 'Sanctuary', 'subcollection-description': 'A soft vinyl for the office',
+         'variations': [
+             {'variation-name': 'Ivory', 'variation-pattern': '643-001'},
+             {'variation-name': 'Iron', 'variation-pattern': '643-002'},
+         ]},
+        {'subcollection-name': 'Fuse', 'variations': [{'variation-name': 'Café Ivory', 'variation-pattern': '804-004'}]},
+    ]},
+    {'collection-name': 'Alta', 'subcollection': [
+        {'subcollection-name': 'Sandstone', 'variations': [{'variation-name': 'Sand', 'variation-pattern': '700-001'}]},
+    ]},
+]
+
+
+def _index():
+    return catalog_search.CatalogSearchIndex(catalog_search.build_search_data(CATALOG))
+
+
+def _patterns(results):
+    return [doc[0] for _score, doc in results]
+
+
+def test_tokenize_strips_accents_and_splits_hyphens():
+    assert catalog_search.tokenize('Café  804-004') == ['cafe', '804-004', '804', '004']
+
+
+def test_prefix_matches_score_by_field_weight_and_prefix_factor():
+    weights, factor = catalog_search.FIELD_WEIGHTS, catalog_search.PREFIX_FACTOR
+    # 'sand' es palabra exacta de la variación de 700-001
+    assert _index().search('sand') == [(weights['variation'], ('700-001', 'Alta', 'Sandstone', 'Sand'))]
+    # 'san' solo es prefijo: Sand (variación) pesa más que Sanctuary (subcolección)
+    results = _index().search('san')
+    assert _patterns(results) == ['700-001', '643-001', '643-002']
+    assert [score for score, _doc in results] == [weights['variation'] * factor] + [weights['subcollection'] * factor] * 2
+
+
+def test_all_tokens_must_match():
+    assert _patterns(_index().search('ivory sanctuary')) == ['643-001']
+    assert _patterns(_index().search('iv')) == ['643-001', '804-004']
+    assert _index().search('ivory alta') == []
+
+
+def test_pattern_field_has_the_highest_weight():
+    results = _index().search('643')
+    assert _patterns(results) == ['643-001', '643-002']
+    assert results[0][0] == catalog_search.FIELD_WEIGHTS['pattern']
+
+
+def test_description_stopwords_are_not_indexed():
+    index = _index()
+    assert index.search('the') == []
+    assert _patterns(index.search('office')) == ['643-001', '643-002']
+
+
+def test_limit_and_empty_query():
+    index = _index()
+    assert len(index.search('i', limit=1)) == 1
+    assert index.search('') == []
+
+
+def test_index_is_rebuilt_only_when_the_json_changes(tmp_path, monkeypatch):
+    json_file = tmp_path / 'collections.json'
+    json_file.write_text(json.dumps(CATALOG), encoding='utf-8')
+    builds = []
+    real = catalog_search.build_search_data
+    monkeypatch.setattr(catalog_search, 'build_search_data', lambda data: builds.append(1) or real(data))
+
+    assert _patterns(catalog_search.load_search_index(json_file).search('643-001')) == ['643-001']
+    assert _patterns(catalog_search.load_search_index(json_file).search('643-001')) == ['643-001']
+    assert len(builds) == 1
+
+    json_file.write_text(json.dumps(CATALOG[1:]), encoding='utf-8')
+    assert catalog_search.load_search_index(json_file).search('643') == []
+    assert len(builds) == 2
@@ -0,0 +1,102 @@
+"""Entrada clothfig: orden de búsqueda de collections.json, códigos de salida y `plan`."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import catalog_cache
+import clothfig
+import create_materials
+import downloadTextures
+
+
+@pytest.fixture
+def remembered(tmp_path):
+    other = tmp_path / 'elsewhere' / 'collections.json'
+    other.parent.mkdir()
+    other.write_text('[]', encoding='utf-8')
+    catalog_cache.remember_json_path(other)
+    assert catalog_cache.remembered_json_path() == other
+    return other
+
+
+def _script_local(module):
+    for name in ('collections.json', 'okcollections.json'):
+        path = Path(module.__file__).resolve().parent / name
+        if path.exists():
+            return path
+    pytest.skip('no hay collections.json junto a los scripts')
+
+
+def test_download_script_local_json_beats_remembered(remembered):
+    assert downloadTextures.find_json_file(None) == _script_local(downloadTextures)
+
+
+def test_env_beats_remembered(remembered, tmp_path, monkeypatch):
+    env = tmp_path / 'env.json'
+    env.write_text('[]', encoding='utf-8')
+    monkeypatch.setenv('COLLECTIONS_JSON', str(env))
+    assert downloadTextures.find_json_file(None) == env.resolve()
+    assert create_materials.find_json_file(None) == env.resolve()
+
+
+def test_materials_manual_list_beats_remembered(remembered, tmp_path, monkeypatch):
+    manual = tmp_path / 'manual.json'
+    manual.write_text('[]', encoding='utf-8')
+    monkeypatch.setattr(create_materials, 'JSON', [str(manual)])
+    assert create_materials.find_json_file(None) == manual.resolve()
+    monkeypatch.setattr(create_materials, 'JSON', [])
+    assert create_materials.find_json_file(None) == _script_local(create_materials)
+
+
+def test_materials_exit_status_is_propagated(tmp_path, capsys):
+    assert clothfig.main(['materials', '--json', str(tmp_path / 'missing.json')]) == 2
+    json_file = tmp_path / 'collections.json'
+    json_file.write_text(json.dumps([]), encoding='utf-8')
+    assert clothfig.main(['materials', '--json', str(json_file)]) == 0
+    assert clothfig.main(['materials', '--json', str(json_file), '--audit']) == 2
+
+
+def test_unknown_command():
+    assert clothfig.main(['nope']) == 2
+
+
+def _plan_catalog(tmp_path):
+    json_file = tmp_path / 'Python' / 'collections.json'
+    json_file.parent.mkdir()
+    json_file.write_text(json.dumps([{'collection-name': 'Impact', 'subcollection': [
+        {'subcollection-name': 'Fuse', 'variations': [
+            {'variation-name': 'Ruby', 'variation-pattern': '804-001'},
+            {'variation-name': 'Sand', 'variation-pattern': '804-002'},
+            {'variation-name': 'Sin pattern'},
+        ]},
+    ]}]), encoding='utf-8')
+    return json_file
+
+
+def test_plan_counts_textures_with_normcase(tmp_path, monkeypatch, capsys):
+    json_file = _plan_catalog(tmp_path)
+    # Volumen sin distinción de mayúsculas: 804-001.JPG cuenta como presente (como process_all)
+    monkeypatch.setattr(os.path, 'normcase', str.lower)
+    dest_dir = tmp_path / downloadTextures.DEST_RELATIVE / 'Impact' / 'Fuse'
+    dest_dir.mkdir(parents=True)
+    (dest_dir / '804-001.JPG').write_bytes(b'x')
+    assert clothfig.main(['plan', '--json', str(json_file)]) == 0
+    out = capsys.readouterr().out
+    assert 'Variaciones     : 3 (1 sin pattern)' in out
+    assert 'Texturas        : 1 presentes, 1 por descargar' in out
+
+
+def test_plan_cache_hit_skips_the_material_specs(tmp_path, monkeypatch, capsys):
+    json_file = _plan_catalog(tmp_path)
+    assert clothfig.main(['plan', '--json', str(json_file)]) == 0
+    first = capsys.readouterr().out
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError('plan no debe recalcular las specs con la caché caliente')
+
+    monkeypatch.setattr(create_materials, 'load_material_specs', fail)
+    assert clothfig.main(['plan', '--json', str(json_file)]) == 0
+    assert capsys.readouterr().out == first
@@ -0,0 +1,121 @@
+"""Codificadores BC1/BC5, cabecera DDS y selección de fuentes de compress_textures."""
+
+import os
+import struct
+
+import pytest
+
+import compress_textures
+
+np = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+
+def _psnr(a, b):
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float('inf') if mse == 0 else 10.0 * np.log10(255.0 ** 2 / mse)
+
+
+def _fabric(size=64, seed=0):
+    """Imagen suave con algo de ruido, parecida a una textura de tela."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float64)
+    base = np.stack([128 + 60 * np.sin(x / 5), 100 + 50 * np.cos(y / 7), 90 + 40 * np.sin((x + y) / 9)], axis=-1)
+    return np.clip(base + rng.normal(0, 4, base.shape), 0, 255).astype(np.uint8)
+
+
+def _normal_map(size=64):
+    y, x = np.mgrid[0:size, 0:size].astype(np.float64)
+    nx, ny = 0.4 * np.sin(x / 6), 0.4 * np.cos(y / 6)
+    nz = np.sqrt(1 - nx ** 2 - ny ** 2)
+    return np.clip(np.rint((np.stack([nx, ny, nz], axis=-1) + 1) * 127.5), 0, 255).astype(np.uint8)
+
+
+def test_dds_header_bc1():
+    header = compress_textures.dds_header(256, 128, 9, 'bc1', 256 * 128 // 2)
+    assert len(header) == 128
+    assert header[:4] == b'DDS '
+    size, _flags, height, width, pitch, _depth, mips = struct.unpack_from('<7I', header, 4)
+    assert (size, height, width, pitch, mips) == (124, 128, 256, 256 * 128 // 2, 9)
+    assert header[84:88] == b'DXT1'
+
+
+def test_dds_header_bc5_uses_dx10_extension():
+    header = compress_textures.dds_header(64, 64, 7, 'bc5', 64 * 64)
+    assert len(header) == 148
+    assert header[84:88] == b'DX10'
+    assert struct.unpack_from('<I', header, 128)[0] == 83  # DXGI_FORMAT_BC5_UNORM
+
+
+def test_mip_chain_goes_down_to_1x1():
+    levels = compress_textures.mip_chain(Image.fromarray(_fabric(32)), normal=False)
+    assert [lv.shape[:2] for lv in levels] == [(32, 32), (16, 16), (8, 8), (4, 4), (2, 2), (1, 1)]
+
+
+def test_bc1_flat_block_is_exact():
+    blocks = np.full((1, 16, 3), (8, 4, 0), dtype=np.uint8)  # representable exactamente en 5:6:5
+    data, decoded = compress_textures.encode_bc1(blocks)
+    assert len(data) == 8
+    assert (decoded == blocks).all()
+
+
+@pytest.mark.parametrize('quality', compress_textures.QUALITIES)
+def test_bc1_round_trip_through_pillow(tmp_path, quality):
+    src = tmp_path / '804-001.png'
+    original = _fabric()
+    Image.fromarray(original).save(src)
+    result = compress_textures.encode_file(str(src), str(tmp_path / '804-001.dds'), quality)
+    assert result['format'] == 'BC1' and result['mips'] == 7
+
+    with Image.open(tmp_path / '804-001.dds') as im:
+        decoded = np.asarray(im.convert('RGB'))
+    assert decoded.shape == original.shape
+    assert _psnr(original, decoded) > 30.0
+
+
+def test_bc5_round_trip_through_pillow(tmp_path):
+    src = tmp_path / '804-001_normal.png'
+    original = _normal_map()
+    Image.fromarray(original).save(src)
+    result = compress_textures.encode_file(str(src), str(tmp_path / '804-001_normal.dds'))
+    assert result['format'] == 'BC5'
+
+    with Image.open(tmp_path / '804-001_normal.dds') as im:
+        decoded = np.asarray(im.convert('RGB'))
+    assert _psnr(original[..., :2], decoded[..., :2]) > 40.0
+
+
+def test_find_sources_reports_name_collisions(tmp_path):
+    folder = tmp_path / 'Fuse' / 'Berry'
+    folder.mkdir(parents=True)
+    for name in ('804-001.jpg', '804-001.png', '804-002.jpg', '804-003.jpg', '804-003.dds'):
+        (folder / name).write_bytes(b'x')
+    old = os.stat(folder / '804-003.jpg').st_mtime_ns
+    os.utime(folder / '804-003.dds', ns=(old + 10 ** 9, old + 10 ** 9))
+
+    pending, fresh, collisions = compress_textures.find_sources(tmp_path)
+    assert pending == [(str(folder / '804-002.jpg'), str(folder / '804-002.dds'))]
+    assert fresh == 1
+    assert collisions == {str(folder / '804-001.dds'): [str(folder / '804-001.jpg'), str(folder / '804-001.png')]}
+
+
+def test_worker_errors_mark_the_texture_as_failed(tmp_path, monkeypatch, capsys):
+    import concurrent.futures
+
+    folder = tmp_path / 'Fuse' / 'Berry'
+    folder.mkdir(parents=True)
+    for name in ('804-001.jpg', '804-002.jpg'):
+        (folder / name).write_bytes(b'x')
+
+    def encode(src, dst, quality):
+        if src.endswith('804-001.jpg'):
+            raise RuntimeError('worker caído')
+        return {'format': 'BC1', 'seconds': 0.0}
+
+    # Hilos en lugar de procesos: el encode simulado no tiene que ser importable por un worker
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', concurrent.futures.ThreadPoolExecutor)
+    monkeypatch.setattr(compress_textures, 'encode_file', encode)
+    report = compress_textures.compress_tree(tmp_path, tmp_path / 'report.json', workers=2)
+    assert report['failed'] == 1
+    assert list(report['images']) == ['Fuse/Berry/804-002.jpg']
+    assert '[WARN] Fuse/Berry/804-001.jpg: RuntimeError: worker caído' in capsys.readouterr().out
@@ -0,0 +1,265 @@
+"""crawl_catalog contra un servidor HTML local con ETag/Last-Modified."""
+
+import hashlib
+import json
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+import crawl_catalog
+import create_materials
+import downloadTextures
+
+THUMB = 'https://images.mayerfabrics.com/item/{0}/image/thumbnail'
+
+PAGES = {
+    '/collections': (
+        '<html><body>'
+        '<a href="/collections/fuse"><img src="/img/fuse.jpg" alt="Fuse"> Fuse</a>'
+        '<a href="/collections/alta"><img src="/img/alta.jpg"> Alta</a>'
+        '<a href="/about">Sobre nosotros</a>'
+        '</body></html>'
+    ),
+    '/collections/fuse': (
+        '<html><h1>Fuse</h1>'
+        '<a href="/collections/fuse/berry"><img src="/img/berry.jpg"></a>'
+        '<a href="/collections/fuse/moss/"><img src="/img/moss.jpg"></a>'
+        '<a href="/collections/alta/one">otra colección</a>'
+        '</html>'
+    ),
+    '/collections/alta': '<html><h1>Alta</h1><a href="/collections/alta/one"><img src="/img/one.jpg"></a></html>',
+    '/collections/fuse/berry': (
+        '<html><head><meta name="description" content="meta"></head><h1>Berry</h1>'
+        '<div class="product-description"><p>Soft &amp; durable</p> vinyl</div>'
+        f'<img src="{THUMB.format("804-001")}" alt="Berry Ruby 804-001">'
+        f'<img src="{THUMB.format("804-002")}?w=200" alt="Berry Café 804-002">'
+        '</html>'
+    ),
+    '/collections/fuse/moss': (
+        '<html><head><meta name="description" content="Moss meta"></head><h1>Moss</h1>'
+        f'<img src="{THUMB.format("900-001")}" title="Olive">'
+        '</html>'
+    ),
+    '/collections/alta/one': (
+        '<html><h1>One</h1>'
+        f'<img src="{THUMB.format("700-001")}" alt="Sand">'
+        '</html>'
+    ),
+}
+
+
+class FixtureSite:
+    """Servidor HTTP en localhost que responde 304 si el ETag coincide y registra cada respuesta."""
+
+    def __init__(self, pages):
+        self.pages = dict(pages)
+        self.hits = []   # (ruta, status)
+        self.user_agents = set()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.user_agents.add(self.headers.get('User-Agent'))
+                path = self.path.rstrip('/') or '/'
+                body = site.pages.get(path)
+                if body is None:
+                    site.hits.append((path, 404))
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                data = body.encode('utf-8')
+                etag = '"%s"' % hashlib.md5(data).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    site.hits.append((path, 304))
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                site.hits.append((path, 200))
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', formatdate(usegmt=True))
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def statuses(self):
+        hits, self.hits = self.hits, []
+        return sorted(status for path, status in hits if path != '/robots.txt')
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    site = FixtureSite(PAGES)
+    monkeypatch.setattr(crawl_catalog, 'SITE_BASE_URL', site.base_url)
+    monkeypatch.setattr(crawl_catalog, 'CACHE_DIR', tmp_path / 'crawl')
+    yield site
+    site.stop()
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    """Cuenta las llamadas a cada parser (re-parseos)."""
+    calls = []
+    for kind, fn in list(crawl_catalog.PARSERS.items()):
+        def counting(url, html, _fn=fn):
+            calls.append(url)
+            return _fn(url, html)
+        monkeypatch.setitem(crawl_catalog.PARSERS, kind, counting)
+    return calls
+
+
+def _crawl(site, output, *extra):
+    return crawl_catalog.main(['--index-url', site.base_url + '/collections', '--output', str(output), '--workers', '4',
+                               '--rate', '0', *extra])
+
+
+def test_first_run_fetches_and_second_run_revalidates(site, tmp_path, parse_calls):
+    out = tmp_path / 'out.json'
+    assert _crawl(site, out) == 0
+    assert site.statuses() == [200] * 6
+    assert len(parse_calls) == 6
+    mtime = out.stat().st_mtime_ns
+
+    assert _crawl(site, out) == 0
+    assert site.statuses() == [304] * 6
+    assert len(parse_calls) == 6          # los 304 reutilizan el resultado parseado
+    assert out.stat().st_mtime_ns == mtime  # contenido igual: el archivo no se reescribe
+
+
+def test_output_schema(site, tmp_path):
+    out = tmp_path / 'out.json'
+    assert _crawl(site, out) == 0
+    data = json.loads(out.read_text(encoding='utf-8'))
+    assert [c['collection-name'] for c in data] == ['Fuse', 'Alta']
+    fuse = data[0]
+    assert fuse['collection-image'] == site.base_url + '/img/fuse.jpg'
+    assert [s['subcollection-name'] for s in fuse['subcollection']] == ['Berry', 'Moss']
+    berry = fuse['subcollection'][0]
+    assert berry['subcollection-description'] == 'Soft & durable vinyl'
+    assert berry['variations'] == [
+        {'variation-name': 'Ruby', 'variation-pattern': '804-001', 'variation-image-thumbnail': THUMB.format('804-001')},
+        {'variation-name': 'Café', 'variation-pattern': '804-002', 'variation-image-thumbnail': THUMB.format('804-002')},
+    ]
+    moss = fuse['subcollection'][1]
+    assert moss['subcollection-description'] == 'Moss meta'
+    assert moss['variations'][0]['variation-name'] == 'Olive'
+
+
+def test_edited_page_is_the_only_refetch(site, tmp_path, parse_calls):
+    out = tmp_path / 'out.json'
+    assert _crawl(site, out) == 0
+    site.statuses()
+    del parse_calls[:]
+
+    site.pages['/collections/fuse/moss'] += f'<img src="{THUMB.format("900-002")}" alt="Moss Sage 900-002">'
+    assert _crawl(site, out) == 0
+    assert site.statuses() == [200] + [304] * 5
+    assert parse_calls == [site.base_url + '/collections/fuse/moss/']
+    data = json.loads(out.read_text(encoding='utf-8'))
+    assert [v['variation-pattern'] for v in data[0]['subcollection'][1]['variations']] == ['900-001', '900-002']
+
+
+def test_server_down_falls_back_to_cache(site, tmp_path, capsys):
+    out = tmp_path / 'out.json'
+    assert _crawl(site, out) == 0
+    before = out.read_text(encoding='utf-8')
+    site.stop()
+    capsys.readouterr()
+
+    assert _crawl(site, out) == 0
+    assert '6 páginas no respondieron' in capsys.readouterr().out
+    assert out.read_text(encoding='utf-8') == before
+
+
+def test_cold_cache_and_server_down_refuses_to_write(site, tmp_path):
+    site.stop()
+    out = tmp_path / 'out.json'
+    assert _crawl(site, out) == 1
+    assert not out.exists()
+
+
+def test_default_output_is_sibling_and_in_place_keeps_backup(site, tmp_path):
+    json_file = tmp_path / 'collections.json'
+    json_file.write_text('[]', encoding='utf-8')
+    args = ['--index-url', site.base_url + '/collections', '--json', str(json_file), '--rate', '0']
+
+    assert crawl_catalog.main(args) == 0
+    assert json_file.read_text(encoding='utf-8') == '[]'
+    assert (tmp_path / crawl_catalog.CRAWLED_JSON_NAME).exists()
+
+    assert crawl_catalog.main(args + ['--in-place']) == 0
+    assert (tmp_path / 'collections.json.bak').read_text(encoding='utf-8') == '[]'
+    assert json.loads(json_file.read_text(encoding='utf-8'))[0]['collection-name'] == 'Fuse'
+
+
+def test_output_feeds_download_plan_and_material_specs(site, tmp_path):
+    out = tmp_path / 'out.json'
+    assert _crawl(site, out) == 0
+    data = json.loads(out.read_text(encoding='utf-8'))
+
+    plan = downloadTextures.build_download_plan(data, tmp_path / 'dest')
+    assert [p[2] for p in plan] == ['804-001', '804-002', '900-001', '700-001']
+    assert Path(plan[0][3]) == (tmp_path / 'dest' / 'Fuse' / 'Berry' / '804-001.jpg').resolve()
+
+    specs = create_materials.build_material_specs(data, tmp_path / 'fs', '/Game/Materials/Mayer')
+    assert len(specs) == 4
+    assert all(spec['object_path'].startswith('/Game/Materials/Mayer/') for spec in specs)
+
+
+def test_identifies_itself_and_respects_robots(site, tmp_path, capsys):
+    site.pages['/robots.txt'] = 'User-agent: clothfigurator-crawler\nDisallow: /collections/alta\n'
+    out = tmp_path / 'out.json'
+    assert _crawl(site, out) == 1
+    assert site.user_agents == {crawl_catalog.USER_AGENT}
+    assert crawl_catalog.USER_AGENT.startswith('clothfigurator-crawler/')
+    assert '/collections/alta' not in [path for path, _status in site.hits]
+    assert 'prohibida por robots.txt' in capsys.readouterr().out
+    assert not out.exists()
+
+
+@pytest.mark.parametrize('path, markup', [
+    ('/collections/fuse/moss', '<html><h1>Moss</h1><img src="/new-cdn/900-001.webp"></html>'),
+    ('/collections/alta', '<html><h1>Alta</h1><a href="/alta-one">One</a></html>'),
+])
+def test_markup_change_is_a_parse_failure(site, tmp_path, capsys, path, markup):
+    out = tmp_path / 'out.json'
+    assert _crawl(site, out) == 0
+    before = out.read_text(encoding='utf-8')
+    site.pages[path] = markup
+    capsys.readouterr()
+
+    assert _crawl(site, out) == 1
+    assert '(¿cambió el HTML?)' in capsys.readouterr().out
+    assert out.read_text(encoding='utf-8') == before
+    # Con --allow-partial se escribe a sabiendas
+    assert _crawl(site, out, '--allow-partial') == 0
+    assert out.read_text(encoding='utf-8') != before
+
+
+def test_rate_limiter_spaces_requests_per_host(monkeypatch):
+    now = [100.0]
+    sleeps = []
+    monkeypatch.setattr(crawl_catalog.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(crawl_catalog.time, 'sleep', sleeps.append)
+    limiter = crawl_catalog.HostRateLimiter(rate=4)
+    for _ in range(3):
+        limiter.wait('https://a.example/x')
+    limiter.wait('https://b.example/x')
+    assert sleeps == [0.25, 0.5]
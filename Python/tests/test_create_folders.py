@@ -0,0 +1,38 @@
+"""Plan de carpetas de create-folders.py: mismo esquema de nombres que las descargas."""
+
+import importlib.util
+import os
+
+import pytest
+
+from downloadTextures import build_download_plan
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'create-folders.py')
+
+
+@pytest.fixture(scope='module')
+def create_folders():
+    spec = importlib.util.spec_from_file_location('create_folders', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _download_folders(catalog, root):
+    return sorted({os.path.relpath(os.path.dirname(dest), str(root)) for _c, _s, _p, dest in build_download_plan(catalog, root) if dest})
+
+
+@pytest.mark.parametrize('catalog', [
+    [{'collection-name': 'Impact', 'subcollection': [
+        {'subcollection-name': 'Fuse', 'variations': [{'variation-pattern': '804-001'}]},
+        {'subcollection-name': ' ', 'variations': [{'variation-pattern': '804-009'}]},
+    ]}, {'collection-name': '', 'subcollection': [{'subcollection-name': 'Lost', 'variations': []}]}],
+    # Esquema antiguo: "collection" / "name"
+    [{'collection': 'Impact', 'subcollection': [{'name': 'Fuse', 'variations': [{'variation-pattern': '804-001'}]}]},
+     {'collection': 'Alta Moda', 'subcollection': [{'name': 'Sand Stone', 'variations': [{'variation-pattern': '700-001'}]}]}],
+])
+def test_folder_plan_matches_download_plan(create_folders, catalog, tmp_path):
+    plan = create_folders.build_folder_plan(catalog)
+    folders = sorted(os.path.join(col_folder, sub_folder) for _c, col_folder, subs in plan for _s, sub_folder in subs)
+    assert folders == _download_folders(catalog, tmp_path)
+    assert 'collection' not in [col_folder for _c, col_folder, _subs in plan]
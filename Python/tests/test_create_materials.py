@@ -0,0 +1,64 @@
+"""Salida de specs de create_materials (fuera de Unreal)."""
+
+import json
+import subprocess
+import sys
+
+import create_materials
+
+CATALOG = [
+    {'collection-name': 'Fuse', 'subcollection': [
+        {'subcollection-name': 'Berry', 'variations': [
+            {'variation-name': 'Ruby', 'variation-pattern': '804-001'},
+            {'variation-name': 'Café', 'variation-pattern': '804-002'},
+        ]},
+    ]},
+    {'collection-name': 'Alta', 'subcollection': [
+        {'subcollection-name': 'One', 'variations': [{'variation-name': 'Sand', 'variation-pattern': '700-001'}]},
+    ]},
+]
+
+
+def _json_file(tmp_path):
+    path = tmp_path / 'collections.json'
+    path.write_text(json.dumps(CATALOG), encoding='utf-8')
+    return path
+
+
+def test_jsonl_stdout_only_carries_json_lines(tmp_path, capsys):
+    json_file = _json_file(tmp_path)
+    (tmp_path / 'duplicate_textures.json').write_text(json.dumps({'duplicates': {}}), encoding='utf-8')
+
+    create_materials.main(['--json', str(json_file), '--jsonl', '-', '--skip-duplicates', '--metrics', '-'])
+    out, err = capsys.readouterr()
+    specs = [json.loads(line) for line in out.splitlines()]
+    assert [s['pattern'] for s in specs] == ['804-001', '804-002', '700-001']
+    assert 'Starting material spec generation' in err
+    assert 'Omitidos 0 MI' in err
+    assert '"event": "summary"' in err
+
+
+def test_filters_without_jsonl_print_the_indented_dump(tmp_path, capsys):
+    json_file = _json_file(tmp_path)
+    create_materials.main(['--json', str(json_file), '--collection', 'Alta'])
+    out = capsys.readouterr().out
+    dump = json.loads(out[out.index('['):])
+    assert [s['pattern'] for s in dump] == ['700-001']
+
+
+def test_skip_duplicates_reports_the_specs_actually_skipped(tmp_path, capsys):
+    json_file = _json_file(tmp_path)
+    # 999-999 ya no está en el catálogo: no cuenta como omitido
+    report = {'duplicates': {'804-002': '804-001', '999-999': '804-001'}}
+    (tmp_path / 'duplicate_textures.json').write_text(json.dumps(report), encoding='utf-8')
+
+    assert create_materials.main(['--json', str(json_file), '--jsonl', '-', '--skip-duplicates']) == 0
+    out, err = capsys.readouterr()
+    assert [json.loads(line)['pattern'] for line in out.splitlines()] == ['804-001', '700-001']
+    assert 'Omitidos 1 MI de patterns duplicados' in err
+
+
+def test_script_exit_status(tmp_path):
+    result = subprocess.run([sys.executable, create_materials.__file__, '--json', str(tmp_path / 'missing.json')],
+                            capture_output=True, text=True)
+    assert result.returncode == 2
@@ -0,0 +1,54 @@
+"""process_all de downloadTextures con la descarga simulada."""
+
+import json
+import os
+
+import pytest
+
+import downloadTextures
+
+CATALOG = [{
+    'collection-name': 'Fuse',
+    'subcollection': [{
+        'subcollection-name': 'Berry',
+        # Dos variaciones con el mismo pattern comparten destino
+        'variations': [{'variation-pattern': '804-001'}, {'variation-pattern': '804-001'}, {'variation-pattern': '804-002'}],
+    }],
+}]
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    calls = []
+
+    def download(url, dest_path, *args, **kwargs):
+        calls.append(url)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        dest_path.write_bytes(b'jpg')
+        return True, 'OK'
+
+    monkeypatch.setattr(downloadTextures, 'download_with_retries', download)
+    return calls
+
+
+def _json_file(tmp_path):
+    path = tmp_path / 'collections.json'
+    path.write_text(json.dumps(CATALOG), encoding='utf-8')
+    return path
+
+
+def test_shared_destination_is_downloaded_once(tmp_path, fake_download):
+    downloaded, skipped, failed, errors = downloadTextures.process_all(_json_file(tmp_path), tmp_path / 'dest', use_cache=False)
+    assert (downloaded, skipped, failed, errors) == (2, 1, 0, [])
+    assert len(fake_download) == 2
+
+
+def test_existing_files_match_case_insensitively_on_windows(tmp_path, fake_download, monkeypatch):
+    folder = tmp_path / 'dest' / 'Fuse' / 'Berry'
+    folder.mkdir(parents=True)
+    (folder / '804-001.JPG').write_bytes(b'jpg')
+    # Simula un volumen de Windows: normcase pasa a minúsculas
+    monkeypatch.setattr(os.path, 'normcase', str.lower)
+    downloaded, skipped, _failed, _errors = downloadTextures.process_all(_json_file(tmp_path), tmp_path / 'dest', use_cache=False)
+    assert (downloaded, skipped) == (1, 2)
+    assert fake_download == [downloadTextures.build_download_url('804-002')]
@@ -0,0 +1,68 @@
+"""Hashes perceptuales y comparación vectorizada de duplicate_textures."""
+
+import random
+
+import pytest
+
+import duplicate_textures
+
+np = pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+
+def _hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _texture(path, seed, size=96):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float64)
+    fx, fy, phase = rng.uniform(2, 12, 3)
+    base = 128 + 60 * np.sin(x / fx + phase) * np.cos(y / fy) + rng.normal(0, 6, (size, size))
+    rgb = np.stack([base, base * rng.uniform(0.6, 1.0), base * rng.uniform(0.4, 0.9)], axis=-1)
+    Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8)).save(path)
+    return path
+
+
+def test_phash_has_no_constant_dc_bit(tmp_path):
+    phashes = [duplicate_textures.image_hashes(_texture(tmp_path / f'{i}.png', i))[1] for i in range(16)]
+    always_set = (1 << 64) - 1
+    for h in phashes:
+        always_set &= h
+    assert always_set == 0
+    # Mediana sobre los mismos 64 coeficientes: la mitad de los bits a 1
+    assert all(28 <= bin(h).count('1') <= 36 for h in phashes)
+
+
+def test_resized_copy_is_near_and_other_texture_is_far(tmp_path):
+    src = _texture(tmp_path / 'a.png', 1)
+    with Image.open(src) as im:
+        im.resize((80, 80), Image.LANCZOS).convert('RGB').save(tmp_path / 'a_small.jpg', quality=85)
+    da, pa = duplicate_textures.image_hashes(src)
+    db, pb = duplicate_textures.image_hashes(tmp_path / 'a_small.jpg')
+    dc, pc = duplicate_textures.image_hashes(_texture(tmp_path / 'c.png', 7))
+    assert _hamming(pa, pb) <= duplicate_textures.DEFAULT_PHASH_THRESHOLD
+    assert _hamming(da, db) <= duplicate_textures.DEFAULT_DHASH_THRESHOLD
+    assert _hamming(pa, pc) > duplicate_textures.DEFAULT_PHASH_THRESHOLD
+
+
+def test_near_duplicate_pairs_matches_brute_force(monkeypatch):
+    monkeypatch.setattr(duplicate_textures, 'BLOCK_ROWS', 7)  # varios bloques
+    rnd = random.Random(3)
+    base = [rnd.getrandbits(64) for _ in range(6)]
+    # Variantes de cada base con pocos bits cambiados
+    dh, ph = [], []
+    for _ in range(30):
+        b = rnd.choice(base)
+        flip = sum(1 << rnd.randrange(64) for _ in range(rnd.randrange(6)))
+        ph.append(b ^ flip)
+        dh.append(b ^ (flip >> 1))
+    expected = [(i, j, _hamming(ph[i], ph[j])) for i in range(30) for j in range(i + 1, 30)
+                if _hamming(ph[i], ph[j]) <= 5 and _hamming(dh[i], dh[j]) <= 6]
+    assert sorted(duplicate_textures.near_duplicate_pairs(dh, ph, 5, 6)) == expected
+    assert expected
+
+
+def test_group_pairs_is_transitive():
+    groups = duplicate_textures._group_pairs(6, [(0, 2, 1), (2, 4, 3), (1, 5, 0)])
+    assert sorted(sorted(g) for g in groups) == [[0, 2, 4], [1, 5]]
@@ -0,0 +1,55 @@
+"""Clasificación de Material Instances de mi_audit (sin Unreal: registro simulado)."""
+
+import json
+
+from mi_audit import MIC_CLASS, audit_material_instances, normalize_object_path, specs_to_fix, write_audit_report
+
+PARENT = '/Game/Materials/M_Fabric.M_Fabric'
+
+
+def _spec(name):
+    return {'object_path': f'/Game/Fabrics/{name}.{name}', 'name': name}
+
+
+def _entry(cls=MIC_CLASS, parent=PARENT, textures=('/Game/Fabrics/T_X',)):
+    return {'class': cls, 'parent': parent, 'textures': list(textures)}
+
+
+def test_normalize_object_path():
+    assert normalize_object_path("/Script/Engine.MaterialInstanceConstant'/Game/M/MI_X.MI_X'") == '/Game/M/MI_X.MI_X'
+    assert normalize_object_path(' /Game/M/MI_X.MI_X ') == '/Game/M/MI_X.MI_X'
+    assert normalize_object_path('None') == ''
+    assert normalize_object_path(None) == ''
+
+
+def test_audit_categories_and_fixable_specs(tmp_path):
+    specs = [_spec(n) for n in ('MI_Ok', 'MI_Missing', 'MI_Parent', 'MI_Class', 'MI_NoTex', 'MI_ParentNoTex')]
+    entries = {
+        '/Game/Fabrics/MI_Ok.MI_Ok': _entry(),
+        '/Game/Fabrics/MI_Parent.MI_Parent': _entry(parent='/Game/Old/M_Old.M_Old'),
+        '/Game/Fabrics/MI_Class.MI_Class': _entry(cls='Material'),
+        '/Game/Fabrics/MI_NoTex.MI_NoTex': _entry(textures=()),
+        '/Game/Fabrics/MI_ParentNoTex.MI_ParentNoTex': _entry(parent='', textures=()),
+        '/Game/Fabrics/MI_Stale.MI_Stale': _entry(),
+        '/Game/Fabrics/T_X.T_X': _entry(cls='Texture2D'),
+    }
+    report = audit_material_instances(specs, entries, PARENT)
+
+    def names(category):
+        return [item['object_path'].rsplit('.', 1)[1] for item in report[category]]
+
+    assert names('ok') == ['MI_Ok']
+    assert names('missing') == ['MI_Missing']
+    assert names('wrong_parent') == ['MI_Parent', 'MI_ParentNoTex']
+    assert names('wrong_class') == ['MI_Class']
+    assert names('no_texture') == ['MI_NoTex', 'MI_ParentNoTex']
+    # Solo los MIC fuera del catálogo son huérfanos; la textura no
+    assert names('orphaned') == ['MI_Stale']
+    assert [s['name'] for s in specs_to_fix(report)] == ['MI_Missing', 'MI_Parent', 'MI_ParentNoTex']
+
+    path = tmp_path / 'audit.json'
+    write_audit_report(report, path)
+    written = json.loads(path.read_text(encoding='utf-8'))
+    assert written['wrong_parent'][0] == {'object_path': '/Game/Fabrics/MI_Parent.MI_Parent',
+                                          'parent': '/Game/Old/M_Old.M_Old'}
+    assert all('spec' not in item for items in written.values() for item in items)
@@ -0,0 +1,85 @@
+"""KD-tree, features e índice incremental de similar_fabrics."""
+
+import json
+import math
+import random
+
+import pytest
+
+import similar_fabrics
+from similar_fabrics import KDTree, SimilarityIndex
+
+
+def _brute(points, target, k, exclude=None):
+    return sorted((math.dist(p, target), i) for i, p in enumerate(points) if i != exclude)[:k]
+
+
+@pytest.mark.parametrize('n, dims', [(1, 3), (15, 8), (16, 8), (17, 8), (600, 8), (300, 2)])
+def test_kdtree_matches_brute_force(n, dims):
+    rnd = random.Random(n * 31 + dims)
+    points = [[rnd.gauss(0, 1) for _ in range(dims)] for _ in range(n)]
+    tree = KDTree(points)
+    for _ in range(25):
+        target = [rnd.gauss(0, 1.5) for _ in range(dims)]
+        for k in (1, 5, 20):
+            got = tree.query(target, k=k)
+            want = _brute(points, target, k)
+            assert [i for _d, i in got] == [i for _d, i in want]
+            assert [d for d, _i in got] == pytest.approx([d for d, _i in want])
+
+
+def test_kdtree_exclude_and_duplicates():
+    points = [[0.0, 0.0]] * 40 + [[1.0, 1.0], [2.0, 2.0]]
+    tree = KDTree(points)
+    hits = tree.query([0.0, 0.0], k=45, exclude=3)
+    assert len(hits) == 41
+    assert 3 not in [i for _d, i in hits]
+    assert [d for d, _i in hits[-2:]] == pytest.approx([math.sqrt(2), math.sqrt(8)])
+
+
+def test_kdtree_empty_and_k_zero():
+    assert KDTree([]).query([0.0], k=3) == []
+    assert KDTree([[1.0]]).query([0.0], k=0) == []
+
+
+def test_similarity_index_nearest_excludes_itself():
+    rnd = random.Random(5)
+    dims = len(similar_fabrics.FEATURE_NAMES)
+    entries = {f'p{i:03d}': {'vec': [rnd.uniform(0, 100) for _ in range(dims)]} for i in range(50)}
+    index = SimilarityIndex(entries)
+    normalized = [index._normalize(entries[p]['vec']) for p in index.patterns]
+    for pattern in ('p000', 'p017', 'p049'):
+        pos = index.patterns.index(pattern)
+        want = [index.patterns[i] for _d, i in _brute(normalized, normalized[pos], 4, exclude=pos)]
+        assert [p for p, _d in index.nearest(pattern, k=4)] == want
+    with pytest.raises(KeyError):
+        index.nearest('missing')
+
+
+def test_features_and_incremental_build(tmp_path):
+    np = pytest.importorskip('numpy')
+    Image = pytest.importorskip('PIL.Image')
+
+    folder = tmp_path / 'images' / 'Fuse' / 'Berry'
+    folder.mkdir(parents=True)
+    Image.new('RGB', (32, 32), (255, 255, 255)).save(folder / '804-001.png')
+    noise = np.random.default_rng(0).integers(0, 255, (32, 32, 3), dtype=np.uint8)
+    Image.fromarray(noise).save(folder / '804-002.png')
+    Image.new('RGB', (32, 32), (0, 0, 0)).save(folder / '804-002_normal.png')
+
+    white = similar_fabrics.extract_features(folder / '804-001.png')
+    assert white[0] == pytest.approx(100.0, abs=0.01)
+    assert white[1:] == pytest.approx([0.0] * 7, abs=0.01)
+
+    json_file = tmp_path / 'collections.json'
+    json_file.write_text(json.dumps([{'collection-name': 'Fuse', 'subcollection': [
+        {'subcollection-name': 'Berry', 'variations': [{'variation-pattern': '804-001'}, {'variation-pattern': '804-002'}]},
+    ]}]), encoding='utf-8')
+    index_path = tmp_path / 'index.json'
+    assert similar_fabrics.build_index(json_file, tmp_path / 'images', index_path) == \
+        {'reused': 0, 'computed': 2, 'removed': 0, 'failed': 0, 'total': 2}
+    assert similar_fabrics.build_index(json_file, tmp_path / 'images', index_path)['reused'] == 2
+
+    (folder / '804-002.png').unlink()
+    stats = similar_fabrics.build_index(json_file, tmp_path / 'images', index_path)
+    assert (stats['removed'], stats['total']) == (1, 1)
@@ -0,0 +1,88 @@
+"""Eventos JSON lines y snapshot Prometheus de sync_metrics."""
+
+import json
+
+import pytest
+
+import sync_metrics
+
+
+@pytest.fixture(autouse=True)
+def _no_env(monkeypatch):
+    monkeypatch.delenv('CLOTHFIG_METRICS', raising=False)
+    monkeypatch.delenv('CLOTHFIG_METRICS_PROM', raising=False)
+
+
+def _events(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_disabled_collector_records_nothing():
+    metrics = sync_metrics.configure('test')
+    assert not metrics.enabled
+    metrics.inc('files_total')
+    with metrics.stage('scan') as info:
+        info['n'] = 1
+    metrics.close()
+    assert metrics.counters == {} and metrics.histograms == {}
+
+
+def test_stage_events_and_summary(tmp_path):
+    events_path = tmp_path / 'events.jsonl'
+    metrics = sync_metrics.configure('test', str(events_path))
+    with metrics.stage('scan', root='x') as info:
+        info['files'] = 3
+    with pytest.raises(RuntimeError):
+        with metrics.stage('load'):
+            raise RuntimeError('boom')
+    metrics.inc('downloads_total', result='ok')
+    metrics.inc('downloads_total', 2, result='ok')
+    metrics.close(exit_code=1)
+
+    events = _events(events_path)
+    assert [e['event'] for e in events] == ['run_start', 'stage', 'stage', 'summary']
+    assert len({e['run_id'] for e in events}) == 1
+    scan, load, summary = events[1:]
+    assert (scan['stage'], scan['status'], scan['root'], scan['files']) == ('scan', 'ok', 'x', 3)
+    assert (load['stage'], load['status']) == ('load', 'error')
+    assert summary['exit_code'] == 1
+    assert summary['counters'] == {'downloads_total': {'{result="ok"}': 3}}
+    assert summary['histograms']['stage_duration_seconds']['{stage="scan"}']['count'] == 1
+
+
+def test_prometheus_snapshot(tmp_path):
+    prom_path = tmp_path / 'out' / 'test.prom'
+    metrics = sync_metrics.configure('test', prom_path=str(prom_path))
+    metrics.inc('files_total', 4, kind='jpg')
+    metrics.observe('download_seconds', 0.02)
+    metrics.observe('download_seconds', 3.0)
+    metrics.close()
+
+    lines = prom_path.read_text(encoding='utf-8').splitlines()
+    assert not list(tmp_path.glob('out/*.part'))
+    assert '# TYPE clothfig_files_total counter' in lines
+    assert 'clothfig_files_total{script="test",kind="jpg"} 4' in lines
+    assert 'clothfig_download_seconds_bucket{script="test",le="0.025"} 1' in lines
+    assert 'clothfig_download_seconds_bucket{script="test",le="5.0"} 2' in lines
+    assert 'clothfig_download_seconds_bucket{script="test",le="+Inf"} 2' in lines
+    assert 'clothfig_download_seconds_count{script="test"} 2' in lines
+    assert any(line.startswith('clothfig_last_run_timestamp_seconds{script="test"} ') for line in lines)
+
+
+def test_label_values_are_escaped():
+    assert sync_metrics._format_labels((('path', 'C:\\a "b"\n'),)) == '{path="C:\\\\a \\"b\\"\\n"}'
+
+
+def test_stage_listeners_run_when_disabled():
+    calls = []
+
+    def listener(name, phase):
+        calls.append((name, phase))
+
+    sync_metrics.add_stage_listener(listener)
+    try:
+        with sync_metrics.configure('test').stage('scan'):
+            pass
+    finally:
+        sync_metrics.remove_stage_listener(listener)
+    assert calls == [('scan', 'start'), ('scan', 'end')]
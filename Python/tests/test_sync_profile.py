@@ -0,0 +1,40 @@
+"""Reporte de memoria por etapa de sync_profile."""
+
+import re
+
+import sync_metrics
+from sync_profile import profile_session
+
+PEAK_RE = re.compile(r"pico ([\d.]+) MiB")
+
+
+def _peaks(alloc_path):
+    peaks, title = {}, None
+    for line in alloc_path.read_text(encoding='utf-8').splitlines():
+        if line.startswith('==='):
+            title = line.strip('= ')
+        m = PEAK_RE.search(line)
+        if m:
+            peaks[title] = float(m.group(1))
+    return peaks
+
+
+def test_run_peak_covers_every_stage(tmp_path):
+    metrics = sync_metrics.configure('test')
+    with profile_session('test', str(tmp_path)):
+        with metrics.stage('big'):
+            blob = bytearray(16 * 2**20)
+            del blob
+        with metrics.stage('small'):
+            with metrics.stage('inner'):
+                small = [0] * 1000
+            del small
+    alloc = next(tmp_path.glob('test-*.alloc.txt'))
+    peaks = _peaks(alloc)
+
+    assert peaks["etapa 'big'"] >= 16
+    assert peaks["etapa 'small'"] < 16
+    assert peaks["etapa 'inner'"] <= peaks["etapa 'small'"]
+    # El pico de la ejecución no se pierde con los reinicios de cada etapa
+    assert peaks['ejecución completa'] >= peaks["etapa 'big'"]
+    assert next(tmp_path.glob('test-*.collapsed')).stat().st_size > 0
@@ -0,0 +1,129 @@
+"""Plan de reconciliación de sync_reconcile sobre árboles en tmp_path."""
+
+import os
+
+from downloadTextures import build_download_plan
+from sync_reconcile import TreeSnapshot, apply_plan, build_reconcile_plan
+
+CATALOG = [{
+    'collection-name': 'Impact',
+    'subcollection': [{
+        'subcollection-name': 'Fuse',
+        'variations': [{'variation-pattern': '804-001'}, {'variation-pattern': '804-003'}],
+    }],
+}]
+
+
+def _touch(root, *parts):
+    path = os.path.join(str(root), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x')
+    return path
+
+
+def _plan(root, catalog=CATALOG):
+    return build_reconcile_plan(TreeSnapshot.scan(str(root)), build_download_plan(catalog, root))
+
+
+def test_compressed_dds_next_to_textures_is_expected(tmp_path):
+    _touch(tmp_path, 'Impact', 'Fuse', '804-003.jpg')
+    _touch(tmp_path, 'Impact', 'Fuse', '804-003.dds')
+    _touch(tmp_path, 'Impact', 'Fuse', '804-003_normal.jpg')
+    _touch(tmp_path, 'Impact', 'Fuse', '804-003_normal.dds')
+    stray = _touch(tmp_path, 'Impact', 'Fuse', '999-999.dds')
+
+    plan = _plan(tmp_path)
+    # El normal map no está en el catálogo y se reporta; sus derivados .dds no
+    assert plan.extra == [os.path.join(str(tmp_path), 'Impact', 'Fuse', '804-003_normal.jpg'), stray]
+    assert [p for p, _d in plan.downloads] == ['804-001']
+
+
+def test_legacy_folder_is_moved_when_canonical_is_missing(tmp_path):
+    old = _touch(tmp_path, 'impact', 'fuse', '804-001.jpg')
+    plan = _plan(tmp_path)
+    canonical = os.path.join(str(tmp_path), 'Impact', 'Fuse')
+    assert plan.dir_moves == [(os.path.dirname(old), canonical)]
+    assert plan.file_moves == [] and plan.mkdirs == []
+    assert [p for p, _d in plan.downloads] == ['804-003']
+    assert plan.extra == []
+
+
+def test_legacy_files_merge_into_existing_canonical_folder(tmp_path):
+    moved = _touch(tmp_path, 'impact', 'fuse', '804-001.jpg')
+    both_old = _touch(tmp_path, 'impact', 'fuse', '804-003.jpg')
+    both_new = _touch(tmp_path, 'Impact', 'Fuse', '804-003.jpg')
+    plan = _plan(tmp_path)
+    assert plan.dir_moves == []
+    assert plan.file_moves == [(moved, os.path.join(os.path.dirname(both_new), '804-001.jpg'))]
+    assert plan.conflicts == [(both_old, both_new)]
+    assert plan.downloads == []
+
+
+def test_asset_folders_are_left_for_the_editor(tmp_path):
+    _touch(tmp_path, 'impact', 'fuse', 'T_804_001.uasset')
+    plan = _plan(tmp_path)
+    assert plan.dir_moves == [] and plan.file_moves == []
+    assert plan.asset_dirs == [(os.path.join(str(tmp_path), 'impact', 'fuse'), os.path.join(str(tmp_path), 'Impact', 'Fuse'))]
+
+
+def test_missing_folders_and_unknown_branches(tmp_path):
+    os.makedirs(os.path.join(str(tmp_path), 'Misc', 'Old'))
+    plan = _plan(tmp_path)
+    assert plan.mkdirs == [os.path.join(str(tmp_path), 'Impact', 'Fuse')]
+    assert plan.unknown_dirs == [os.path.join(str(tmp_path), 'Misc')]
+
+
+def test_apply_plan_moves_files_and_keeps_conflicts(tmp_path):
+    _touch(tmp_path, 'impact', 'fuse', '804-001.jpg')
+    _touch(tmp_path, 'impact', 'fuse', '804-003.jpg')
+    _touch(tmp_path, 'Impact', 'Fuse', '804-003.jpg')
+    plan = _plan(tmp_path)
+    done = apply_plan(plan)
+    assert done['file_moves'] == 1
+    assert os.path.exists(os.path.join(str(tmp_path), 'Impact', 'Fuse', '804-001.jpg'))
+    # El conflicto se conserva en la carpeta antigua: nada se borra
+    assert os.path.exists(os.path.join(str(tmp_path), 'impact', 'fuse', '804-003.jpg'))
+    assert _plan(tmp_path).file_moves == []
+
+
+def test_apply_plan_removes_emptied_legacy_folders(tmp_path):
+    _touch(tmp_path, 'impact', 'fuse', '804-001.jpg')
+    _touch(tmp_path, 'Impact', 'Fuse', '804-003.jpg')
+    apply_plan(_plan(tmp_path))
+    assert not os.path.exists(os.path.join(str(tmp_path), 'impact'))
+    assert sorted(os.listdir(os.path.join(str(tmp_path), 'Impact', 'Fuse'))) == ['804-001.jpg', '804-003.jpg']
+
+
+def _case_insensitive(monkeypatch):
+    # Simula un volumen sin distinción de mayúsculas (NTFS/APFS por defecto) sobre el tmp_path de Linux
+    import sync_reconcile
+    monkeypatch.setattr(sync_reconcile, '_case_alias', lambda actual, wanted: actual != wanted and actual.lower() == wanted.lower())
+
+
+def test_case_only_collection_rename(tmp_path, monkeypatch):
+    _case_insensitive(monkeypatch)
+    _touch(tmp_path, 'impact', 'Fuse', '804-001.jpg')
+    plan = _plan(tmp_path)
+    root = str(tmp_path)
+    assert plan.dir_moves == [(os.path.join(root, 'impact'), os.path.join(root, 'Impact'))]
+    assert plan.mkdirs == [] and plan.extra == [] and plan.unknown_dirs == []
+    assert [p for p, _d in plan.downloads] == ['804-003']
+
+    apply_plan(plan)
+    assert os.listdir(root) == ['Impact']
+    assert os.listdir(os.path.join(root, 'Impact')) == ['Fuse']
+
+
+def test_case_only_collection_and_slug_subfolder(tmp_path, monkeypatch):
+    _case_insensitive(monkeypatch)
+    _touch(tmp_path, 'impact', 'fuse', '804-001.jpg')
+    plan = _plan(tmp_path)
+    root = str(tmp_path)
+    assert plan.dir_moves == [(os.path.join(root, 'impact'), os.path.join(root, 'Impact')),
+                              (os.path.join(root, 'Impact', 'fuse'), os.path.join(root, 'Impact', 'Fuse'))]
+    assert plan.extra == [] and [p for p, _d in plan.downloads] == ['804-003']
+
+    apply_plan(plan)
+    assert os.listdir(root) == ['Impact']
+    assert os.listdir(os.path.join(root, 'Impact', 'Fuse')) == ['804-001.jpg']
@@ -0,0 +1,165 @@
+"""Watcher por sondeo y aplicación incremental de cambios de sync_watch."""
+
+import json
+import os
+import sys
+
+import pytest
+
+from sync_watch import RESCAN, CatalogWatch, EditorWatch, PollingWatcher
+
+
+def _catalog(*patterns):
+    return [{'collection-name': 'Impact', 'subcollection': [
+        {'subcollection-name': 'Fuse', 'variations': [{'variation-name': p, 'variation-pattern': p} for p in patterns]},
+    ]}]
+
+
+def _write_json(path, catalog):
+    path.write_text(json.dumps(catalog), encoding='utf-8')
+    # mtime distinto aunque el sistema de archivos tenga resolución gruesa
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_polling_watcher_reports_added_changed_and_removed(tmp_path):
+    tree = tmp_path / 'Texture'
+    tree.mkdir()
+    json_path = tmp_path / 'collections.json'
+    _write_json(json_path, _catalog('804-001'))
+    watcher = PollingWatcher(str(json_path), str(tree), interval=0)
+
+    assert watcher.wait(0) == set()
+    texture = tree / '804-001.jpg'
+    texture.write_bytes(b'x')
+    assert watcher.wait(0) == {str(texture)}
+    _write_json(json_path, _catalog('804-001', '804-002'))
+    assert watcher.wait(0) == {str(json_path)}
+    texture.unlink()
+    assert watcher.wait(0) == {str(texture)}
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    json_path = tmp_path / 'Python' / 'collections.json'
+    json_path.parent.mkdir()
+    _write_json(json_path, _catalog('804-001'))
+    state = CatalogWatch(json_path, tmp_path / 'Texture', download=False, create_mis=False)
+    state.requested = []
+    monkeypatch.setattr(state, '_download', lambda dests: state.requested.append(sorted(dests)) or 0)
+    return state
+
+
+def test_only_the_catalog_difference_is_applied(state, capsys):
+    state.handle({RESCAN})
+    (first,) = state.expected
+    assert state.requested == [[first]]
+    assert os.path.isdir(os.path.dirname(first))
+
+    open(first, 'wb').close()
+    state.handle({first})
+    assert state.requested[-1] == []
+
+    _write_json(state.json_path, _catalog('804-001', '804-002'))
+    state.handle({str(state.json_path)})
+    (added,) = [d for d in state.expected if d != first]
+    assert state.requested[-1] == [added]
+    assert 'MI nuevo' in capsys.readouterr().out and len(state.specs) == 2
+
+    # El mismo contenido no vuelve a cargar nada
+    assert state.load() == ([], [], 0)
+
+
+def test_deleted_texture_is_requested_again(state):
+    state.handle({RESCAN})
+    (dest,) = state.expected
+    open(dest, 'wb').close()
+    state.handle({dest})
+    os.remove(dest)
+    state.handle({dest})
+    assert state.requested[-1] == [dest]
+
+
+def test_invalid_json_keeps_the_previous_catalog(state, capsys):
+    state.handle({RESCAN})
+    expected = dict(state.expected)
+    state.json_path.write_text('[{"collection-name": ', encoding='utf-8')
+    state.handle({str(state.json_path)})
+    assert state.expected == expected
+    assert 'No se pudo recargar' in capsys.readouterr().out
+
+
+def test_mis_are_only_listed_by_default(tmp_path):
+    assert CatalogWatch(tmp_path / 'collections.json', tmp_path).create_mis is False
+
+
+def test_present_textures_compare_with_normcase(state, monkeypatch):
+    # Volumen sin distinción de mayúsculas: 804-001.JPG satisface 804-001.jpg (como process_all)
+    monkeypatch.setattr(os.path, 'normcase', str.lower)
+    state.handle({RESCAN})
+    (dest,) = state.expected
+    upper = dest[:-4] + '.JPG'
+    open(upper, 'wb').close()
+    state.handle({upper})
+    assert state.missing() == [] and state.requested[-1] == []
+    os.remove(upper)
+    state.handle({upper})
+    assert state.requested[-1] == [dest]
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify')
+def test_inotify_picks_up_a_tree_created_later(tmp_path):
+    from sync_watch import InotifyWatcher
+
+    json_path = tmp_path / 'Python' / 'collections.json'
+    json_path.parent.mkdir()
+    _write_json(json_path, _catalog('804-001'))
+    root = tmp_path / 'Content' / 'Texture' / 'MayerFabrics'
+    watcher = InotifyWatcher(str(json_path), str(root))
+    try:
+        (tmp_path / 'unrelated.txt').write_text('x')
+        assert watcher.wait(0.2) == set()
+        (root / 'Impact').mkdir(parents=True)
+        assert RESCAN in watcher.wait(1.0)
+        texture = root / 'Impact' / '804-001.jpg'
+        texture.write_bytes(b'x')
+        assert str(texture) in watcher.wait(1.0)
+    finally:
+        watcher.close()
+
+
+class _FakeWatcher:
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.closed = False
+
+    def wait(self, timeout):
+        assert timeout == 0  # nunca bloquea el tick del Editor
+        return self.batches.pop(0) if self.batches else set()
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeState:
+    def __init__(self):
+        self.batches = []
+
+    def handle(self, changed):
+        self.batches.append(set(changed))
+
+
+def test_editor_tick_debounces_without_blocking():
+    state = _FakeState()
+    editor = EditorWatch(state, _FakeWatcher([{'a'}, {'b'}]), debounce=60, max_delay=60)
+    editor.tick()
+    editor.tick()
+    editor.tick()
+    assert state.batches == []
+    editor.debounce = 0
+    editor.tick()
+    assert state.batches == [{'a', 'b'}]
+    editor.tick()
+    assert len(state.batches) == 1
+    editor.stop()
+    assert editor.watcher.closed